@@ -3,7 +3,7 @@
 Script de démarrage du serveur MCP complet
 """
 
-import asyncio
+import argparse
 import sys
 import os
 
@@ -14,27 +14,33 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 if __name__ == "__main__":
-    from src.mcp.mcp_server import start_mcp_server
+    from src.mcp.mcp_server import IO_BACKENDS, run_mcp_server
     from src.core.knowledge_base import KnowledgeBase
     from src.rag.vector_store import VectorStore
     
+    parser = argparse.ArgumentParser(description="Serveur MCP complet")
+    parser.add_argument(
+        "--io-backend",
+        choices=IO_BACKENDS,
+        default="auto",
+        help="Boucle d'événements du serveur (auto : uvloop si installé, sinon asyncio)"
+    )
+    args = parser.parse_args()
+    
     print("🚀 Démarrage du serveur MCP complet...")
     print("📍 Port: 8002")
     print("🌐 URL: ws://localhost:8002")
     print("=" * 50)
     
-    async def main():
-        try:
-            # Initialise les composants
-            kb = KnowledgeBase()
-            vs = VectorStore()
-            
-            # Démarre le serveur MCP
-            await start_mcp_server(kb, vs, host="localhost", port=8002)
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Serveur MCP arrêté par l'utilisateur")
-        except Exception as e:
-            print(f"❌ Erreur lors du démarrage du serveur MCP: {e}")
-    
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        # Initialise les composants
+        kb = KnowledgeBase()
+        vs = VectorStore()
+        
+        # Démarre le serveur MCP
+        run_mcp_server(kb, vs, host="localhost", port=8002, io_backend=args.io_backend)
+        
+    except KeyboardInterrupt:
+        print("\n🛑 Serveur MCP arrêté par l'utilisateur")
+    except Exception as e:
+        print(f"❌ Erreur lors du démarrage du serveur MCP: {e}") 
\ No newline at end of file
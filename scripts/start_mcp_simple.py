@@ -3,7 +3,7 @@
 Script de démarrage du serveur MCP simplifié
 """
 
-import asyncio
+import argparse
 import sys
 import os
 
@@ -11,7 +11,16 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 if __name__ == "__main__":
-    from src.mcp.mcp_server_simple import start_simple_mcp_server
+    from src.mcp.mcp_server_simple import run_simple_mcp_server
+    
+    parser = argparse.ArgumentParser(description="Serveur MCP simplifié")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Nombre de processus serveur se partageant le port (SO_REUSEPORT)"
+    )
+    args = parser.parse_args()
     
     print("🚀 Démarrage du serveur MCP simplifié...")
     print("📍 Port: 8002")
@@ -19,7 +28,7 @@ if __name__ == "__main__":
     print("=" * 50)
     
     try:
-        asyncio.run(start_simple_mcp_server(port=8002))
+        run_simple_mcp_server(port=8002, workers=args.workers)
     except KeyboardInterrupt:
         print("\n🛑 Serveur MCP arrêté par l'utilisateur")
     except Exception as e:
@@ -8,10 +8,18 @@ import json
 from typing import Dict, List, Optional, Tuple
 from src.core.knowledge_base import KnowledgeBase
 from src.rag.vector_store import VectorStore
+from src.llm.llm_interface import format_product_line
 from src.core.rule_engine import AdvancedRuleEngine
 from src.mcp.mcp_client import create_mcp_interface
 from src.mcp import tools
 
+# Requêtes de recherche fixes de _handle_recommend_products (alternatives, variantes, recherche générique) :
+# leurs embeddings peuvent être préchargés au démarrage
+CANONICAL_SEARCH_QUERIES = (
+    "produit similaire", "produit informatique", "accessoire ordinateur", "hub usb",
+    "produit gaming", "souris gaming", "ordinateur portable", "laptop",
+)
+
 
 class CognitiveOrderAgent:
     def __init__(self, knowledge_base: KnowledgeBase, vector_store: VectorStore, 
@@ -47,6 +55,9 @@ class CognitiveOrderAgent:
         # Initialisation du moteur de règles avancé avec la base de connaissances
         self.rule_engine = AdvancedRuleEngine(knowledge_base=knowledge_base)
         
+        # Lignes du prompt de recommandation, par produit : (champs formatés, ligne)
+        self._product_lines: Dict[str, Tuple[Tuple, str]] = {}
+        
         # Patterns améliorés pour l'extraction d'intentions (fallback si pas de LLM)
         self.intent_patterns = {
             'create_order': [
@@ -718,34 +729,39 @@ class CognitiveOrderAgent:
             if not products:
                 return "❌ Aucun produit spécifié dans la commande."
             
-            validated_items = []
-            total_amount = 0.0
-            
+            # Résolution de tous les produits avant toute réservation de stock
+            requested_items = []
             for product_info in products:
                 product_name = product_info['product_name']
-                quantity = product_info['quantity']
-                
-                # Recherche du produit dans la base de connaissances
                 product_id = self.kb.find_product_by_name(product_name)
                 if not product_id:
                     return f"❌ Produit '{product_name}' non trouvé dans le catalogue."
-                
-                # Vérification du stock
-                success, message = tools.check_stock_tool(product_id, quantity, self.kb)
-                if not success:
-                    # Utilise le LLM pour une explication d'erreur intelligente
-                    if self.llm_interface:
-                        error_explanation = self.llm_interface.get_error_explanation(
-                            "stock_insufficient", 
-                            f"Produit: {product_name}, Quantité demandée: {quantity}"
-                        )
-                        return f"❌ {message}\n\n{error_explanation}"
-                    else:
-                        return f"❌ {message}"
-                
-                # Récupération des détails pour le calcul du montant
-                product_details = self.kb.get_product_details(product_id)
-                price = float(product_details.get('hasPrice', 0))
+                requested_items.append({'product_id': product_id, 'quantity': product_info['quantity']})
+            
+            # Vérification et réservation du stock de tout le panier en une seule transaction :
+            # rien n'est réservé si un seul article manque
+            success, message = tools.check_stock_batch_tool(requested_items, self.kb)
+            if not success:
+                # Utilise le LLM pour une explication d'erreur intelligente
+                if self.llm_interface:
+                    requested = ", ".join(f"{product_info['product_name']} x{product_info['quantity']}"
+                                          for product_info in products)
+                    error_explanation = self.llm_interface.get_error_explanation(
+                        "stock_insufficient", 
+                        f"Produits demandés: {requested}"
+                    )
+                    return f"❌ {message}\n\n{error_explanation}"
+                else:
+                    return f"❌ {message}"
+            
+            # Récupération des détails pour le calcul du montant (une seule requête)
+            details_by_product = self.kb.get_products_details([item['product_id'] for item in requested_items])
+            validated_items = []
+            total_amount = 0.0
+            
+            for item in requested_items:
+                product_id, quantity = item['product_id'], item['quantity']
+                price = float(details_by_product[product_id].get('hasPrice', 0))
                 item_total = price * quantity
                 total_amount += item_total
                 
@@ -814,7 +830,7 @@ class CognitiveOrderAgent:
                 if "stock insuffisant" in message.lower():
                     recommendations = tools.recommend_products_tool("produit similaire", self.vector_store, self.kb, 3)
                     if recommendations:
-                        alt_products = ", ".join([rec['name'] for rec in recommendations])
+                        alt_products = ", ".join([rec.name for rec in recommendations])
                         return f"❌ {message}\n\n💡 Alternatives suggérées: {alt_products}"
                 
                 return f"❌ {message}"
@@ -911,11 +927,18 @@ class CognitiveOrderAgent:
                 for product_uri in self.kb.get_instances_of_class("http://example.org/ontology/Product"):
                     product_id = product_uri.split('/')[-1]
                     product_details = self.kb.get_product_details(product_id)
-                    all_products.append({
+                    product = {
                         'name': product_details.get('hasName', ''),
                         'description': product_details.get('hasDescription', ''),
                         'price': product_details.get('hasPrice', 0)
-                    })
+                    }
+                    # Ligne du prompt mémorisée par produit, reformatée seulement si le produit a changé
+                    fields = (product['name'], product['description'], product['price'])
+                    cached = self._product_lines.get(product_id)
+                    if cached is None or cached[0] != fields:
+                        cached = self._product_lines[product_id] = (fields, format_product_line(product))
+                    product['_llm_line'] = cached[1]
+                    all_products.append(product)
                 
                 # Utilise le LLM pour des recommandations plus intelligentes
                 llm_recommendations = self.llm_interface.get_product_recommendations(
@@ -928,10 +951,10 @@ class CognitiveOrderAgent:
             # Fallback vers les recommandations vectorielles
             response = f"🎯 Voici mes recommandations pour '{best_query}':\n\n"
             for i, rec in enumerate(recommendations, 1):
-                response += f"{i}. **{rec['name']}** - {rec['price']}€\n"
-                response += f"   {rec['description']}\n"
-                response += f"   Stock: {rec['stock']} unités\n"
-                response += f"   Score de similarité: {rec['similarity_score']:.2f}\n\n"
+                response += f"{i}. **{rec.name}** - {rec.price}€\n"
+                response += f"   {rec.description}\n"
+                response += f"   Stock: {rec.stock} unités\n"
+                response += f"   Score de similarité: {rec.similarity_score:.2f}\n\n"
             
             return response
             
@@ -970,7 +993,7 @@ class CognitiveOrderAgent:
                 
                 response = f"📋 Historique des commandes pour '{client_name}':\n\n"
                 for order in orders:
-                    response += f"   {order['order_id']}: {order['amount']}€ - {order['status']}\n"
+                    response += f"   {order.order_id}: {order.amount}€ - {order.status}\n"
                 
                 return response
             
@@ -1271,7 +1294,7 @@ class CognitiveOrderAgent:
             
             response = "📋 Liste des commandes:\n\n"
             for order in orders:
-                response += f"   ID: {order['order_id']}, Montant: {order['amount']}€, Statut: {order['status']}\n"
+                response += f"   ID: {order.order_id}, Montant: {order.amount}€, Statut: {order.status}\n"
             
             return response
             
@@ -1315,7 +1338,7 @@ class CognitiveOrderAgent:
             
             response = "🔧 Outils disponibles via MCP:\n\n"
             for tool in tools:
-                response += f"   - {tool['name']}: {tool['description']}\n"
+                response += f"   - {tool.name}: {tool.description}\n"
             
             return response
         except Exception as e:
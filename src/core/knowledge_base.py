@@ -3,15 +3,228 @@ Module Base de Connaissances - Gestion de l'ontologie et des entités
 Implémente une base de connaissances sémantique avec support RDF et réflexion
 """
 
+import functools
 import json
 import re
-from typing import Dict, List, Optional, Any, Union, Tuple
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Union, Tuple, Iterator
 from datetime import datetime
 from rdflib import Graph, Namespace, Literal, URIRef
 from rdflib.namespace import RDF, RDFS, OWL, XSD
+from rdflib.plugins.sparql import prepareQuery
 import uuid
 
 
+# Durée de validité (secondes) de l'instantané de statistiques
+STATS_SNAPSHOT_TTL = 5.0
+
+# Nombre maximum de fiches mémorisées (LRU) par type d'entité
+DETAILS_CACHE_SIZE = 4096
+
+# Namespace de l'ontologie
+EX = Namespace('http://example.org/ontology/')
+
+# URIs des classes métier, construites une seule fois
+_CLIENT_CLASS_URI = EX.Client
+_PRODUCT_CLASS_URI = EX.Product
+_ORDER_CLASS_URI = EX.Order
+
+
+def _local_name(uri) -> str:
+    """Retourne le dernier segment d'une URI (identifiant ou nom de propriété)"""
+    uri = str(uri)
+    return uri[uri.rfind('/') + 1:]
+
+
+# Type Python des propriétés numériques connues (littéraux non typés, graphes chargés depuis un fichier)
+_NUMERIC_PROPERTIES = {'hasStock': int, 'hasPrice': float, 'hasAmount': float}
+
+
+def _coerce(prop_name: Optional[str], value: Any) -> Any:
+    """Convertit une valeur textuelle d'une propriété numérique connue, la laisse inchangée sinon"""
+    cast = _NUMERIC_PROPERTIES.get(prop_name)
+    if cast is None or not isinstance(value, str):
+        return value
+    try:
+        return cast(value)
+    except ValueError:
+        try:
+            return cast(float(value))
+        except ValueError:
+            return value
+
+
+def _typed_literal(prop_name: str, value: Any) -> Literal:
+    """Littéral à écrire pour une propriété : typé XSD (integer, double) pour les propriétés numériques connues"""
+    return Literal(_coerce(prop_name, value))
+
+
+def _to_python(term, prop_name: Optional[str] = None) -> Any:
+    """Valeur Python d'un terme RDF : littéral converti selon son type XSD (float, int, datetime...), sinon chaîne"""
+    if isinstance(term, Literal):
+        value = term.toPython()
+        return _coerce(prop_name, str(value) if isinstance(value, Literal) else value)
+    return str(term)
+
+# Requêtes SPARQL fixes, analysées une seule fois au chargement du module
+_CLIENT_EMAIL_QUERY = prepareQuery("""
+    ASK { ?client a ex:Client ; ex:hasEmail ?email }
+""", initNs={'ex': EX})
+
+_STATS_QUERY = prepareQuery("""
+    SELECT ?type ?s (SAMPLE(?n) AS ?name) (SAMPLE(?p) AS ?price) WHERE {
+        VALUES ?type { ex:Client ex:Product ex:Order }
+        ?s a ?type .
+        OPTIONAL { ?s ex:hasName ?n }
+        OPTIONAL { ?s ex:hasPrice ?p }
+    }
+    GROUP BY ?type ?s
+""", initNs={'ex': EX})
+
+_ORDERS_BY_CLIENT_QUERY = prepareQuery("""
+    SELECT ?order ?client ?amount ?status ?date WHERE {
+        ?order a ex:Order ;
+               ex:hasClient ?client .
+        OPTIONAL { ?order ex:hasAmount ?amount }
+        OPTIONAL { ?order ex:hasStatus ?status }
+        OPTIONAL { ?order ex:hasDate ?date }
+    }
+    ORDER BY DESC(?date)
+""", initNs={'ex': EX})
+
+_ALL_ORDERS_QUERY = prepareQuery("""
+    SELECT ?order ?client ?amount ?status ?date WHERE {
+        ?order a ex:Order .
+        OPTIONAL { ?order ex:hasClient ?client }
+        OPTIONAL { ?order ex:hasAmount ?amount }
+        OPTIONAL { ?order ex:hasStatus ?status }
+        OPTIONAL { ?order ex:hasDate ?date }
+    }
+""", initNs={'ex': EX})
+
+
+class _LockSide:
+    """Côté lecture ou écriture d'un ReadWriteLock, utilisable avec `with`"""
+    
+    __slots__ = ("acquire", "release")
+    
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class ReadWriteLock:
+    """
+    Verrou lecteurs/écrivain : plusieurs lectures simultanées, une écriture exclusive
+    
+    Les écrivains en attente sont prioritaires sur les nouveaux lecteurs. Le côté
+    écriture est réentrant, et le thread qui le détient peut aussi prendre le côté
+    lecture ; un lecteur ne peut en revanche pas passer en écriture.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._owner = None
+        self._depth = 0
+        self._writers_waiting = 0
+        self.reader = _LockSide(self._acquire_read, self._release_read)
+        self.writer = _LockSide(self._acquire_write, self._release_write)
+    
+    def _acquire_read(self):
+        with self._condition:
+            if self._owner == threading.get_ident():
+                self._depth += 1
+                return
+            while self._owner is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+    
+    def _release_read(self):
+        with self._condition:
+            if self._owner == threading.get_ident():
+                self._depth -= 1
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+    
+    def _acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._owner == me:
+                self._depth += 1
+                return
+            self._writers_waiting += 1
+            while self._owner is not None or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._owner = me
+            self._depth = 1
+    
+    def _release_write(self):
+        with self._condition:
+            self._depth -= 1
+            if not self._depth:
+                self._owner = None
+                self._condition.notify_all()
+
+
+def _lru_get(cache: "OrderedDict[str, Dict]", key: str) -> Optional[Dict]:
+    """Lit une entrée d'un cache LRU et la marque comme récemment utilisée"""
+    value = cache.get(key)
+    if value is not None:
+        try:
+            cache.move_to_end(key)
+        except KeyError:
+            # Évincée entre-temps par un autre thread : la valeur lue reste valable
+            pass
+    return value
+
+
+def _lru_put(cache: "OrderedDict[str, Dict]", key: str, value: Dict):
+    """Insère une entrée dans un cache LRU borné à DETAILS_CACHE_SIZE"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > DETAILS_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _copy_snapshot(snapshot: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+    """Copie d'un instantané de statistiques (listes et lignes)"""
+    return {class_name: [dict(row) for row in rows] for class_name, rows in snapshot.items()}
+
+
+def _writes(method):
+    """Exécute une méthode d'écriture de la base sous le verrou en écriture du graphe"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.wlock:
+            # Génération incrémentée avant et après l'écriture la plus externe (impaire pendant
+            # l'écriture) : une lecture concurrente du graphe ne mémorise ses détails que si
+            # aucune écriture ne l'a chevauchée
+            outermost = self._write_generation % 2 == 0
+            if outermost:
+                self._write_generation += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                if outermost:
+                    self._write_generation += 1
+                # Toute écriture périme l'instantané de statistiques
+                self._stats_snapshot = None
+    return wrapper
+
+
 class KnowledgeBase:
     def __init__(self, vector_store=None):
         """Initialise la base de connaissances avec un graphe RDF"""
@@ -26,7 +239,7 @@ class KnowledgeBase:
             'rdfs': RDFS,
             'owl': OWL,
             'xsd': XSD,
-            'ex': Namespace('http://example.org/ontology/'),
+            'ex': EX,
             'client': Namespace('http://example.org/client/'),
             'product': Namespace('http://example.org/product/'),
             'order': Namespace('http://example.org/order/'),
@@ -39,6 +252,23 @@ class KnowledgeBase:
         for prefix, namespace in self.ns.items():
             self.graph.bind(prefix, namespace)
         
+        # Verrous du graphe : chaque méthode d'écriture prend wlock ; `with kb.rlock:` / `with kb.wlock:`
+        # pour enchaîner lectures et écritures de façon atomique
+        lock = ReadWriteLock()
+        self.rlock = lock.reader
+        self.wlock = lock.writer
+        
+        # Détails des produits, clients et commandes déjà lus, par namespace puis identifiant (LRU) :
+        # chaque méthode d'écriture invalide les entités qu'elle modifie
+        self._details_cache: Dict[str, "OrderedDict[str, Dict]"] = {
+            kind: OrderedDict() for kind in ('product', 'client', 'order')
+        }
+        self._details_lock = threading.Lock()
+        self._write_generation = 0
+        
+        # Instantané des statistiques : (horodatage, résultat)
+        self._stats_snapshot: Optional[Tuple[float, Dict[str, List[Dict]]]] = None
+        
         # Initialisation minimale de l'ontologie (aucune classe métier ni instance)
         # Laisse la structure vide pour extension dynamique
         # self._initialize_ontology()  # SUPPRIMÉ
@@ -139,6 +369,7 @@ class KnowledgeBase:
         
         print(f"📊 Base de connaissances initialisée avec {len(clients_data)} clients et {len(products_data)} produits")
     
+    @_writes
     def add_triple(self, subject: str, predicate: str, object_value: str):
         """Ajoute un triplet au graphe RDF"""
         subject_uri = URIRef(subject)
@@ -147,9 +378,10 @@ class KnowledgeBase:
         if object_value.startswith('http'):
             object_uri = URIRef(object_value)
         else:
-            object_uri = Literal(object_value)
+            object_uri = _typed_literal(_local_name(predicate), object_value)
         
         self.graph.add((subject_uri, predicate_uri, object_uri))
+        self._forget_details()
     
     def get_properties(self, subject_uri: str, 
                       predicate_uri: str = None) -> List[Tuple]:
@@ -173,42 +405,59 @@ class KnowledgeBase:
         
         return instances
     
+    @_writes
     def update_triple(self, subject: str, predicate: str, old_object: str,
                      new_object: str):
         """Met à jour un triplet dans le graphe"""
         subject_uri = URIRef(subject)
         predicate_uri = URIRef(predicate)
         
-        # Supprime l'ancien triplet
+        # Supprime l'ancien triplet (sous sa forme typée ou textuelle)
         if old_object.startswith('http'):
-            old_obj_uri = URIRef(old_object)
+            self.graph.remove((subject_uri, predicate_uri, URIRef(old_object)))
         else:
-            old_obj_uri = Literal(old_object)
-        
-        self.graph.remove((subject_uri, predicate_uri, old_obj_uri))
+            self.graph.remove((subject_uri, predicate_uri, Literal(old_object)))
+            self.graph.remove((subject_uri, predicate_uri,
+                               _typed_literal(_local_name(predicate), old_object)))
         
         # Ajoute le nouveau triplet
         if new_object.startswith('http'):
             new_obj_uri = URIRef(new_object)
         else:
-            new_obj_uri = Literal(new_object)
+            new_obj_uri = _typed_literal(_local_name(predicate), new_object)
         
         self.graph.add((subject_uri, predicate_uri, new_obj_uri))
+        self._forget_details()
     
+    @_writes
     def add_client(self, client_id: str, name: str, email: str) -> str:
         """Ajoute un nouveau client"""
         # Vérifie si la classe Client existe, sinon la crée
-        if not self._class_exists(self.ns['ex'].Client):
+        if not self._class_exists(_CLIENT_CLASS_URI):
             self._create_client_class()
         
         client_uri = URIRef(f"{self.ns['client']}{client_id}")
         
-        self.graph.add((client_uri, RDF.type, self.ns['ex'].Client))
+        self.graph.add((client_uri, RDF.type, _CLIENT_CLASS_URI))
         self.graph.add((client_uri, self.ns['ex'].hasName, Literal(name)))
         self.graph.add((client_uri, self.ns['ex'].hasEmail, Literal(email)))
+        self._forget_details('client', client_id)
         
         return client_id
     
+    def client_email_exists(self, email: str) -> bool:
+        """
+        Vérifie qu'un client utilise déjà cet email (requête ASK sur l'index du graphe)
+        
+        Args:
+            email: Email recherché
+        
+        Returns:
+            bool: True si un client a cet email
+        """
+        result = self.graph.query(_CLIENT_EMAIL_QUERY, initBindings={'email': Literal(email)})
+        return result.askAnswer
+    
     def _class_exists(self, class_uri) -> bool:
         """Vérifie si une classe existe dans le graphe"""
         return (class_uri, RDF.type, OWL.Class) in self.graph
@@ -239,30 +488,34 @@ class KnowledgeBase:
         return ((property_uri, RDF.type, OWL.DatatypeProperty) in self.graph or 
                 (property_uri, RDF.type, OWL.ObjectProperty) in self.graph)
     
+    @_writes
     def add_product(self, product_id: str, name: str, price: float,
                    stock: int, description: str) -> str:
         """Ajoute un nouveau produit"""
         product_uri = URIRef(f"{self.ns['product']}{product_id}")
         
-        self.graph.add((product_uri, RDF.type, self.ns['ex'].Product))
+        self.graph.add((product_uri, RDF.type, _PRODUCT_CLASS_URI))
         self.graph.add((product_uri, self.ns['ex'].hasName, Literal(name)))
         self.graph.add((product_uri, self.ns['ex'].hasPrice, Literal(price)))
         self.graph.add((product_uri, self.ns['ex'].hasStock, Literal(stock)))
         self.graph.add((product_uri, self.ns['ex'].hasDescription,
                        Literal(description)))
+        self._forget_details('product', product_id)
         
         return product_id
     
+    @_writes
     def add_order(self, order_id: str, client_id: str, amount: float,
                  status: str = "en_attente") -> str:
         """Ajoute une nouvelle commande"""
         order_uri = URIRef(f"{self.ns['order']}{order_id}")
         client_uri = URIRef(f"{self.ns['client']}{client_id}")
         
-        self.graph.add((order_uri, RDF.type, self.ns['ex'].Order))
+        self.graph.add((order_uri, RDF.type, _ORDER_CLASS_URI))
         self.graph.add((order_uri, self.ns['ex'].hasClient, client_uri))
         self.graph.add((order_uri, self.ns['ex'].hasAmount, Literal(amount)))
         self.graph.add((order_uri, self.ns['ex'].hasStatus, Literal(status)))
+        self._forget_details('order', order_id)
         
         return order_id
     
@@ -270,57 +523,145 @@ class KnowledgeBase:
         """Trouve un client par son nom"""
         for s, p, o in self.graph.triples((None, self.ns['ex'].hasName,
                                          Literal(name))):
-            if (s, RDF.type, self.ns['ex'].Client) in self.graph:
-                return str(s).split('/')[-1]  # Retourne l'ID du client
+            if (s, RDF.type, _CLIENT_CLASS_URI) in self.graph:
+                return _local_name(s)  # Retourne l'ID du client
         return None
     
     def find_product_by_name(self, name: str) -> Optional[str]:
         """Trouve un produit par son nom"""
         for s, p, o in self.graph.triples((None, self.ns['ex'].hasName,
                                          Literal(name))):
-            if (s, RDF.type, self.ns['ex'].Product) in self.graph:
-                return str(s).split('/')[-1]  # Retourne l'ID du produit
+            if (s, RDF.type, _PRODUCT_CLASS_URI) in self.graph:
+                return _local_name(s)  # Retourne l'ID du produit
         return None
     
     def get_product_details(self, product_id: str) -> Dict:
-        """Récupère les détails d'un produit"""
-        product_uri = URIRef(f"{self.ns['product']}{product_id}")
-        details = {}
+        """Récupère les détails d'un produit (mémorisés jusqu'à la prochaine écriture sur le produit)"""
+        return self._get_details('product', product_id)
+    
+    def _get_details(self, kind: str, entity_id: str) -> Dict:
+        """
+        Détails d'une entité métier, lus dans le graphe puis mémorisés (LRU) jusqu'à la prochaine écriture
         
-        for s, p, o in self.graph.triples((product_uri, None, None)):
-            if p == RDF.type:
-                continue
-            prop_name = str(p).split('/')[-1]
-            details[prop_name] = str(o)
+        Args:
+            kind: Namespace de l'entité ('product', 'client' ou 'order')
+            entity_id: Identifiant de l'entité
         
-        return details
-    
-    def get_client_details(self, client_id: str) -> Dict:
-        """Récupère les détails d'un client"""
-        client_uri = URIRef(f"{self.ns['client']}{client_id}")
+        Returns:
+            Dict: Copie des propriétés de l'entité (vide si elle n'existe pas)
+        """
+        cache = self._details_cache[kind]
+        cached = _lru_get(cache, entity_id)
+        if cached is not None:
+            return dict(cached)
+        
+        generation = self._write_generation
+        entity_uri = URIRef(f"{self.ns[kind]}{entity_id}")
         details = {}
         
-        for s, p, o in self.graph.triples((client_uri, None, None)):
+        for s, p, o in self.graph.triples((entity_uri, None, None)):
             if p == RDF.type:
                 continue
-            prop_name = str(p).split('/')[-1]
-            details[prop_name] = str(o)
+            prop_name = _local_name(p)
+            details[prop_name] = _to_python(o, prop_name)
         
-        return details
+        self._remember_details(kind, generation, {entity_id: details})
+        return dict(details)
     
-    def get_order_details(self, order_id: str) -> Dict:
-        """Récupère les détails d'une commande"""
-        order_uri = URIRef(f"{self.ns['order']}{order_id}")
-        details = {}
+    def _remember_details(self, kind: str, generation: int, details_by_id: Dict[str, Dict]):
+        """
+        Mémorise des détails lus dans le graphe, sauf si une écriture a eu lieu depuis le début de la lecture
         
-        for s, p, o in self.graph.triples((order_uri, None, None)):
-            if p == RDF.type:
-                continue
-            prop_name = str(p).split('/')[-1]
-            details[prop_name] = str(o)
+        Args:
+            kind: Namespace des entités
+            generation: Valeur de _write_generation relevée avant la lecture
+            details_by_id: Détails lus, par identifiant
+        """
+        with self._details_lock:
+            if generation != self._write_generation or generation % 2:
+                return
+            cache = self._details_cache[kind]
+            for entity_id, details in details_by_id.items():
+                _lru_put(cache, entity_id, details)
+    
+    def get_cached_details(self, kind: str, entity_id: str) -> Optional[Dict]:
+        """
+        Détails d'une entité s'ils sont déjà mémorisés, sans lecture du graphe
         
-        return details
+        Args:
+            kind: Namespace de l'entité ('product', 'client' ou 'order')
+            entity_id: Identifiant de l'entité
+        
+        Returns:
+            Optional[Dict]: Copie des détails, ou None s'ils ne sont pas en mémoire
+        """
+        cached = _lru_get(self._details_cache[kind], entity_id)
+        return dict(cached) if cached is not None else None
     
+    def _forget_details(self, kind: Optional[str] = None, entity_id: Optional[str] = None):
+        """
+        Invalide les détails mémorisés après une écriture
+        
+        Args:
+            kind: Namespace de l'entité écrite (None : toutes les entités)
+            entity_id: Identifiant de l'entité écrite
+        """
+        with self._details_lock:
+            if kind is None:
+                for cache in self._details_cache.values():
+                    cache.clear()
+            else:
+                self._details_cache[kind].pop(entity_id, None)
+
+    def get_products_details(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Récupère les détails de plusieurs produits, ceux non mémorisés en une seule requête SPARQL
+
+        Args:
+            product_ids: Identifiants des produits
+
+        Returns:
+            Dict[str, Dict]: Détails par identifiant (dictionnaire vide pour un produit inconnu)
+        """
+        found: Dict[str, Dict] = {}
+        missing = []
+        for product_id in dict.fromkeys(product_ids):
+            cached = _lru_get(self._details_cache['product'], product_id)
+            if cached is not None:
+                found[product_id] = cached
+            else:
+                missing.append(product_id)
+
+        if missing:
+            generation = self._write_generation
+            fetched: Dict[str, Dict] = {product_id: {} for product_id in missing}
+            uris = {URIRef(f"{self.ns['product']}{product_id}"): product_id for product_id in missing}
+            values = " ".join(uri.n3() for uri in uris)
+            results = self.graph.query(f"""
+                SELECT ?product ?p ?o WHERE {{
+                    VALUES ?product {{ {values} }}
+                    ?product ?p ?o .
+                    FILTER (?p != rdf:type)
+                }}
+            """, initNs={'rdf': RDF})
+
+            for row in results:
+                prop_name = _local_name(row.p)
+                fetched[uris[row.product]][prop_name] = _to_python(row.o, prop_name)
+            self._remember_details('product', generation, fetched)
+            found.update(fetched)
+
+        return {product_id: dict(found[product_id]) for product_id in product_ids}
+
+    def get_client_details(self, client_id: str) -> Dict:
+        """Récupère les détails d'un client (mémorisés jusqu'à la prochaine écriture)"""
+        return self._get_details('client', client_id)
+    
+    def get_order_details(self, order_id: str) -> Dict:
+        """Récupère les détails d'une commande (mémorisés jusqu'à la prochaine écriture)"""
+        return self._get_details('order', order_id)
+    
+    @_writes
     def update_order_status(self, order_id: str, new_status: str):
         """Met à jour le statut d'une commande"""
         order_uri = URIRef(f"{self.ns['order']}{order_id}")
@@ -333,7 +674,9 @@ class KnowledgeBase:
         # Ajoute le nouveau statut
         self.graph.add((order_uri, self.ns['ex'].hasStatus, 
                        Literal(new_status)))
+        self._forget_details('order', order_id)
     
+    @_writes
     def update_product_stock(self, product_id: str, new_stock: int):
         """Met à jour le stock d'un produit"""
         product_uri = URIRef(f"{self.ns['product']}{product_id}")
@@ -346,14 +689,61 @@ class KnowledgeBase:
         # Ajoute le nouveau stock
         self.graph.add((product_uri, self.ns['ex'].hasStock, 
                        Literal(new_stock)))
+        self._forget_details('product', product_id)
+    
+    def get_products_stock(self, product_ids: List[str]) -> Dict[str, Tuple[int, str]]:
+        """
+        Récupère en une seule requête SPARQL le stock et le nom de plusieurs produits
+        
+        Args:
+            product_ids: Identifiants des produits
+        
+        Returns:
+            Dict[str, Tuple[int, str]]: (stock, nom) par identifiant, pour les produits trouvés
+        """
+        if not product_ids:
+            return {}
+        
+        values = " ".join(URIRef(f"{self.ns['product']}{product_id}").n3() for product_id in product_ids)
+        results = self.graph.query(f"""
+            SELECT ?product ?stock ?name WHERE {{
+                VALUES ?product {{ {values} }}
+                ?product a ex:Product .
+                OPTIONAL {{ ?product ex:hasStock ?stock }}
+                OPTIONAL {{ ?product ex:hasName ?name }}
+            }}
+        """, initNs={'ex': self.ns['ex']})
+        
+        return {
+            _local_name(row.product): (
+                _to_python(row.stock, 'hasStock') if row.stock is not None else 0,
+                str(row.name) if row.name is not None else 'Produit inconnu'
+            )
+            for row in results
+        }
+    
+    @_writes
+    def set_products_stock(self, stock_by_product: Dict[str, int]):
+        """
+        Met à jour le stock de plusieurs produits
+        
+        Args:
+            stock_by_product: Nouveau stock par identifiant de produit
+        """
+        for product_id, new_stock in stock_by_product.items():
+            product_uri = URIRef(f"{self.ns['product']}{product_id}")
+            self.graph.set((product_uri, self.ns['ex'].hasStock, Literal(new_stock)))
+            self._forget_details('product', product_id)
     
     def save_graph_to_file(self, filename: str):
         """Sauvegarde le graphe dans un fichier Turtle"""
         self.graph.serialize(destination=filename, format='turtle')
     
+    @_writes
     def load_graph_from_file(self, filename: str):
         """Charge le graphe depuis un fichier Turtle"""
         self.graph.parse(filename, format='turtle')
+        self._forget_details()
     
     def query_graph(self, sparql_query: str) -> List[Dict]:
         """Exécute une requête SPARQL sur le graphe"""
@@ -364,6 +754,102 @@ class KnowledgeBase:
             print(f"❌ Erreur lors de l'exécution de la requête SPARQL: {e}")
             return []
     
+    def get_stats_snapshot(self) -> Dict[str, List[Dict]]:
+        """
+        Récupère en une seule requête SPARQL les clients, produits et commandes
+        
+        Le résultat est mémorisé STATS_SNAPSHOT_TTL secondes, et invalidé par toute écriture
+        passant par les méthodes de la base.
+        
+        Returns:
+            Dict[str, List[Dict]]: Instances par classe (Client, Product, Order),
+            chacune avec id, name et price (copie, modifiable par l'appelant)
+        """
+        now = time.monotonic()
+        if self._stats_snapshot and now - self._stats_snapshot[0] < STATS_SNAPSHOT_TTL:
+            return _copy_snapshot(self._stats_snapshot[1])
+        
+        snapshot = {'Client': [], 'Product': [], 'Order': []}
+        results = self.graph.query(_STATS_QUERY)
+        
+        for row in results:
+            snapshot[_local_name(row.type)].append({
+                'id': _local_name(row.s),
+                'name': str(row.name) if row.name is not None else 'N/A',
+                'price': str(row.price) if row.price is not None else 'N/A'
+            })
+        
+        self._stats_snapshot = (now, snapshot)
+        return _copy_snapshot(snapshot)
+    
+    def _iter_orders(self, prepared_query, **bindings) -> Iterator[Dict]:
+        """
+        Exécute une requête de commandes et produit chaque ligne mise en forme, une à une
+        
+        Args:
+            prepared_query: Requête SELECT préparée liant ?order, ?client, ?amount, ?status et ?date
+            **bindings: Variables pré-liées de la requête
+        
+        Returns:
+            Iterator[Dict]: Commandes avec order_id, client_id, amount, status, date (None si absent)
+        """
+        for row in self.graph.query(prepared_query, initBindings=bindings):
+            yield {
+                'order_id': _local_name(row.order),
+                'client_id': _local_name(row.client) if row.client is not None else None,
+                'amount': _to_python(row.amount, 'hasAmount') if row.amount is not None else None,
+                'status': str(row.status) if row.status is not None else None,
+                'date': _to_python(row.date) if row.date is not None else None
+            }
+    
+    def get_orders_by_client(self, client_id: str) -> List[Dict]:
+        """
+        Récupère en une seule requête SPARQL les commandes d'un client, de la plus récente à la plus ancienne
+        
+        Args:
+            client_id: Identifiant du client
+        
+        Returns:
+            List[Dict]: Commandes avec order_id, client_id, amount, status, date (None si absent)
+        """
+        return list(self._iter_orders(_ORDERS_BY_CLIENT_QUERY, client=URIRef(f"{self.ns['client']}{client_id}")))
+    
+    def get_all_orders(self) -> List[Dict]:
+        """
+        Récupère en une seule requête SPARQL toutes les commandes
+        
+        Returns:
+            List[Dict]: Commandes avec order_id, client_id, amount, status, date (None si absent)
+        """
+        return list(self.iter_all_orders())
+    
+    def iter_all_orders(self) -> Iterator[Dict]:
+        """
+        Parcourt toutes les commandes sans construire de liste intermédiaire
+        
+        Returns:
+            Iterator[Dict]: Commandes avec order_id, client_id, amount, status, date (None si absent)
+        """
+        return self._iter_orders(_ALL_ORDERS_QUERY)
+    
+    def iter_clients(self) -> Iterator[Dict]:
+        """
+        Parcourt tous les clients, un à un
+        
+        Returns:
+            Iterator[Dict]: Clients avec id, name, email
+        """
+        for client_uri in self.graph.subjects(RDF.type, _CLIENT_CLASS_URI):
+            # Extrait l'ID du client depuis l'URI
+            client_id = _local_name(client_uri)
+            client_details = self.get_client_details(client_id)
+            if client_details:
+                yield {
+                    'id': client_id,
+                    'name': client_details.get('hasName', 'N/A'),
+                    'email': client_details.get('hasEmail', 'N/A')
+                }
+    
     def get_clients(self) -> List[Dict]:
         """
         Récupère tous les clients avec leurs détails
@@ -372,22 +858,7 @@ class KnowledgeBase:
             List[Dict]: Liste des clients avec id, name, email
         """
         try:
-            clients = []
-            # Utilise le namespace correct au lieu de l'URI hardcodée
-            client_uris = self.get_instances_of_class(str(self.ns['ex'].Client))
-            
-            for client_uri in client_uris:
-                # Extrait l'ID du client depuis l'URI
-                client_id = str(client_uri).split('/')[-1]
-                client_details = self.get_client_details(client_id)
-                if client_details:
-                    clients.append({
-                        'id': client_id,
-                        'name': client_details.get('hasName', 'N/A'),
-                        'email': client_details.get('hasEmail', 'N/A')
-                    })
-            
-            return clients
+            return list(self.iter_clients())
             
         except Exception as e:
             print(f"❌ Erreur lors de la récupération des clients: {e}")
@@ -485,6 +956,7 @@ class KnowledgeBase:
                 properties[prop_name] = str(o)
         return properties
     
+    @_writes
     def extend_ontology_dynamically(self, class_name: str, properties: List[Dict], 
                                    namespace: str = None) -> bool:
         """
@@ -543,6 +1015,7 @@ class KnowledgeBase:
             print(f"❌ Erreur lors de l'extension de l'ontologie: {e}")
             return False
     
+    @_writes
     def create_instance_dynamically(self, class_name: str, properties: Dict, 
                                    instance_id: str = None) -> str:
         """
@@ -581,7 +1054,7 @@ class KnowledgeBase:
                 
                 # Vérifie si la propriété existe
                 if (prop_uri, RDF.type, OWL.DatatypeProperty) in self.graph:
-                    self.graph.add((instance_uri, prop_uri, Literal(value)))
+                    self.graph.add((instance_uri, prop_uri, _typed_literal(prop_name, value)))
                 elif (prop_uri, RDF.type, OWL.ObjectProperty) in self.graph:
                     # Pour les ObjectProperty, on suppose que c'est une URI
                     if value.startswith('http'):
@@ -713,6 +1186,7 @@ class KnowledgeBase:
         """Requête la structure complète de l'ontologie"""
         return self.introspect_ontology()
     
+    @_writes
     def add_behavior_class(self, class_name: str, methods: List[Dict]) -> bool:
         """
         Ajoute une classe avec des comportements (méthodes)
@@ -764,6 +1238,7 @@ class KnowledgeBase:
             print(f"❌ Erreur lors de l'ajout de la classe comportementale: {e}")
             return False
     
+    @_writes
     def add_state_machine(self, class_name: str, states: List[str], 
                          transitions: List[Dict]) -> bool:
         """
@@ -830,28 +1305,37 @@ class KnowledgeBase:
             print(f"❌ Erreur lors de la récupération de la propriété: {e}")
             return None
     
+    def get_instance_details(self, instance_id: str) -> Dict:
+        """Récupère toutes les propriétés d'une instance, quel que soit son namespace"""
+        for prefix in ('client', 'product', 'order', 'instance'):
+            properties = self._get_instance_properties(URIRef(f"{self.ns[prefix]}{instance_id}"))
+            if properties:
+                return properties
+        return {}
+
+    @_writes
     def update_instance_property(self, instance_id: str, property_name: str, value: any) -> bool:
         """Met à jour une propriété d'une instance"""
         try:
-            # Trouve l'instance dans tous les namespaces
-            for prefix, namespace in self.ns.items():
-                if prefix in ['client', 'product', 'order', 'instance']:
-                    instance_uri = URIRef(f"{namespace}{instance_id}")
-                    property_uri = URIRef(f"{self.ns['ex']}{property_name}")
-                    
-                    # Supprime l'ancienne valeur
-                    for s, p, o in self.graph.triples((instance_uri, property_uri, None)):
-                        self.graph.remove((s, p, o))
-                    
-                    # Ajoute la nouvelle valeur
-                    self.graph.add((instance_uri, property_uri, Literal(value)))
-                    return True
+            # Trouve le namespace dans lequel l'instance existe
+            for prefix in ('client', 'product', 'order', 'instance'):
+                instance_uri = URIRef(f"{self.ns[prefix]}{instance_id}")
+                if (instance_uri, None, None) not in self.graph:
+                    continue
+                property_uri = URIRef(f"{self.ns['ex']}{property_name}")
+                
+                # Remplace l'ancienne valeur
+                self.graph.set((instance_uri, property_uri, _typed_literal(property_name, value)))
+                if prefix in self._details_cache:
+                    self._forget_details(prefix, instance_id)
+                return True
             
             return False
         except Exception as e:
             print(f"❌ Erreur lors de la mise à jour de la propriété: {e}")
             return False
     
+    @_writes
     def add_business_handler(self, intent_name: str, handler_config: Dict) -> bool:
         """
         Ajoute un handler métier déclaratif dans l'ontologie
@@ -1205,6 +1689,7 @@ class KnowledgeBase:
             print(f"❌ Erreur lors de la recherche sémantique: {e}")
             return []
 
+    @_writes
     def add_entity(self, entity_name: str, entity_data: Dict) -> bool:
         """Ajoute une entité générique à la base de connaissances"""
         try:
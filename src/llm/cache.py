@@ -0,0 +1,121 @@
+"""
+Cache persistant des embeddings (sqlite)
+Permet de réutiliser entre deux sessions les embeddings déjà calculés par le LLM
+"""
+
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Optional
+
+
+class PersistentEmbeddingCache:
+    """
+    Cache d'embeddings stocké dans un fichier sqlite unique
+
+    Les lectures sont synchrones (un SELECT par clé primaire) ; les écritures
+    sont confiées à un thread dédié afin de ne pas ralentir le chemin critique.
+    """
+
+    _CREATE_TABLE = (
+        "CREATE TABLE IF NOT EXISTS emb("
+        "model TEXT, text_hash BLOB, vec BLOB, ts INTEGER, "
+        "PRIMARY KEY(model, text_hash))"
+    )
+    _SELECT = "SELECT vec FROM emb WHERE model = ? AND text_hash = ?"
+    _INSERT = "INSERT OR REPLACE INTO emb(model, text_hash, vec, ts) VALUES (?, ?, ?, ?)"
+
+    def __init__(self, path: str):
+        """
+        Initialise le cache et démarre le thread d'écriture
+
+        Args:
+            path: Chemin du fichier sqlite
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = self._connect()
+        self._conn.execute(self._CREATE_TABLE)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        self._pending: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="embedding-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion sqlite en mode WAL"""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        """Clé de cache d'un texte"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """
+        Récupère un embedding depuis le cache
+
+        Args:
+            model: Modèle d'embedding
+            text: Texte encodé
+
+        Returns:
+            Optional[np.ndarray]: Vecteur float32 ou None si absent
+        """
+        with self._lock:
+            row = self._conn.execute(self._SELECT, (model, self._hash(text))).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, model: str, text: str, vector: np.ndarray):
+        """
+        Enregistre un embedding (écriture différée)
+
+        Args:
+            model: Modèle d'embedding
+            text: Texte encodé
+            vector: Vecteur d'embedding
+        """
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        self._pending.put((model, self._hash(text), blob, int(time.time())))
+
+    def _write_loop(self):
+        """Écrit par lots les embeddings en attente"""
+        conn = self._connect()
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            while True:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+            conn.executemany(self._INSERT, batch)
+            conn.commit()
+        conn.close()
+
+    def close(self):
+        """Vide la file d'écriture et ferme le cache"""
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
@@ -2,9 +2,13 @@
 Assistants LLM pour la génération automatique de workflows, patterns d'extraction et règles métier
 """
 
+import ast
+import functools
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import operator
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from src.llm.llm_interface import LLMInterface
@@ -42,6 +46,146 @@ class BusinessRule:
     priority: int = 1
 
 
+# Opérateurs de comparaison supportés dans les conditions de règles
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+
+# Nœuds AST autorisés : comparaisons, booléens, noms et littéraux uniquement
+_ALLOWED_CONDITION_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.Compare, ast.Name, ast.Load, ast.Constant, ast.Tuple, ast.List, ast.Set,
+) + tuple(_COMPARE_OPS)
+
+# Cache des conditions compilées, indexé par le texte de la condition
+_compiled_conditions: Dict[str, Callable[[Dict[str, Any]], bool]] = {}
+
+
+def _compile_condition(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile une condition de règle (ex: 'stock < 5') en fonction évaluable sur un contexte
+    
+    La compilation n'a lieu qu'une fois par expression. Les formes courantes
+    `variable op littéral` et `variable` sont spécialisées en fermetures pures ;
+    les autres passent par un code objet évalué sans builtins.
+    Une variable absente du contexte rend la condition fausse.
+    
+    Args:
+        expr: Condition sous forme d'expression Python
+        
+    Returns:
+        Callable[[Dict], bool]: Fonction d'évaluation de la condition
+        
+    Raises:
+        ValueError: Si l'expression contient des constructions non autorisées
+    """
+    compiled = _compiled_conditions.get(expr)
+    if compiled is not None:
+        return compiled
+    
+    tree = ast.parse(expr, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_CONDITION_NODES):
+            raise ValueError(f"Construction non autorisée dans la condition: {expr}")
+    
+    body = tree.body
+    if (isinstance(body, ast.Compare) and len(body.ops) == 1
+            and isinstance(body.left, ast.Name)
+            and isinstance(body.comparators[0], ast.Constant)):
+        name = body.left.id
+        compare = _COMPARE_OPS[type(body.ops[0])]
+        value = body.comparators[0].value
+        
+        def compiled(context: Dict[str, Any]) -> bool:
+            if name not in context:
+                return False
+            try:
+                return bool(compare(context[name], value))
+            except TypeError:
+                return False
+    elif isinstance(body, ast.Name):
+        name = body.id
+        
+        def compiled(context: Dict[str, Any]) -> bool:
+            return bool(context.get(name))
+    else:
+        code = compile(tree, '<rule>', 'eval')
+        
+        def compiled(context: Dict[str, Any]) -> bool:
+            try:
+                return bool(eval(code, {'__builtins__': {}}, context))
+            except (NameError, TypeError):
+                return False
+    
+    _compiled_conditions[expr] = compiled
+    return compiled
+
+
+def _condition_variables(expr: str) -> frozenset:
+    """Retourne les variables du contexte référencées par une condition"""
+    return frozenset(node.id for node in ast.walk(ast.parse(expr, mode='eval'))
+                     if isinstance(node, ast.Name))
+
+
+def _freeze_rules(rules: List[Dict[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    """Fige des templates de règles, triés par priorité, avec leur condition compilée"""
+    frozen = [MappingProxyType({
+        **rule,
+        '_compiled': _compile_condition(rule['condition']),
+        '_vars': _condition_variables(rule['condition']),
+    }) for rule in rules]
+    return tuple(sorted(frozen, key=lambda rule: rule.get('priority', 1)))
+
+
+# Templates de règles par domaine, triés par priorité.
+# Alloués une seule fois à l'import et partagés en lecture seule par toutes les instances.
+_DEFAULT_RULES: Mapping[str, Tuple[Mapping[str, Any], ...]] = MappingProxyType({
+    'ecommerce': _freeze_rules([
+        {
+            'condition': 'amount >= 100',
+            'action': 'apply_free_shipping',
+            'description': 'Livraison gratuite pour commandes >= 100€',
+            'priority': 1
+        },
+        {
+            'condition': 'customer_type == "fidèle"',
+            'action': 'apply_loyalty_discount',
+            'description': 'Remise fidélité pour clients fidèles',
+            'priority': 2
+        },
+        {
+            'condition': 'stock < 5',
+            'action': 'send_low_stock_alert',
+            'description': 'Alerte stock faible',
+            'priority': 3
+        }
+    ]),
+    'restaurant': _freeze_rules([
+        {
+            'condition': 'guests >= 8',
+            'action': 'require_advance_reservation',
+            'description': 'Réservation à l\'avance pour groupes >= 8',
+            'priority': 1
+        },
+        {
+            'condition': 'time == "peak_hours"',
+            'action': 'apply_peak_hour_pricing',
+            'description': 'Tarification heures de pointe',
+            'priority': 2
+        }
+    ])
+})
+
+
 class LLMAssistant:
     """Assistant LLM de base pour la génération automatique"""
     
@@ -659,7 +803,7 @@ class RuleAssistant:
     def generate_rules_for_domain(self, domain: str, 
                                 business_context: str) -> List[BusinessRule]:
         """Génère des règles métier adaptées à un domaine"""
-        domain_rules = self.rule_templates.get(domain, [])
+        domain_rules = self.rule_templates.get(domain, ())
         
         # Personnalisation des règles avec le contexte
         rules = []
@@ -674,6 +818,38 @@ class RuleAssistant:
         
         return rules
     
+    def evaluate_rules(self, domain: str, context: Dict[str, Any],
+                       first_match: bool = False) -> List[BusinessRule]:
+        """
+        Évalue les règles d'un domaine sur un contexte, par ordre de priorité
+        
+        Les règles référençant une variable absente du contexte sont ignorées
+        sans être évaluées.
+        
+        Args:
+            domain: Domaine métier (ex: 'ecommerce', 'restaurant')
+            context: Valeurs des variables référencées par les conditions
+            first_match: S'arrête à la première règle vérifiée
+            
+        Returns:
+            List[BusinessRule]: Règles dont la condition est vérifiée
+        """
+        available = context.keys()
+        matched = []
+        for rule_template in self.rule_templates.get(domain, ()):
+            if not rule_template['_vars'] <= available:
+                continue
+            if rule_template['_compiled'](context):
+                matched.append(BusinessRule(
+                    condition=rule_template['condition'],
+                    action=rule_template['action'],
+                    description=rule_template['description'],
+                    priority=rule_template.get('priority', 1)
+                ))
+                if first_match:
+                    break
+        return matched
+    
     def is_available(self) -> bool:
         """Vérifie si l'assistant est disponible"""
         return True  # Toujours disponible en mode simulation
@@ -756,50 +932,28 @@ class RuleAssistant:
             )
         ]
     
-    def _load_rule_templates(self) -> Dict[str, List[Dict]]:
+    def _load_rule_templates(self) -> Mapping[str, Tuple[Mapping[str, Any], ...]]:
         """Charge les templates de règles par domaine"""
-        return {
-            'ecommerce': [
-                {
-                    'condition': 'amount >= 100',
-                    'action': 'apply_free_shipping',
-                    'description': 'Livraison gratuite pour commandes >= 100€',
-                    'priority': 1
-                },
-                {
-                    'condition': 'customer_type == "fidèle"',
-                    'action': 'apply_loyalty_discount',
-                    'description': 'Remise fidélité pour clients fidèles',
-                    'priority': 2
-                },
-                {
-                    'condition': 'stock < 5',
-                    'action': 'send_low_stock_alert',
-                    'description': 'Alerte stock faible',
-                    'priority': 3
-                }
-            ],
-            'restaurant': [
-                {
-                    'condition': 'guests >= 8',
-                    'action': 'require_advance_reservation',
-                    'description': 'Réservation à l\'avance pour groupes >= 8',
-                    'priority': 1
-                },
-                {
-                    'condition': 'time == "peak_hours"',
-                    'action': 'apply_peak_hour_pricing',
-                    'description': 'Tarification heures de pointe',
-                    'priority': 2
-                }
-            ]
-        }
+        return _DEFAULT_RULES
+
+
+# Instances globales des assistants, créées au premier accès
+@functools.cache
+def get_workflow_assistant() -> WorkflowAssistant:
+    """Retourne l'instance partagée du WorkflowAssistant"""
+    return WorkflowAssistant()
+
+
+@functools.cache
+def get_pattern_assistant() -> PatternAssistant:
+    """Retourne l'instance partagée du PatternAssistant"""
+    return PatternAssistant()
 
 
-# Instance globale des assistants
-workflow_assistant = WorkflowAssistant()
-pattern_assistant = PatternAssistant()
-rule_assistant = RuleAssistant()
+@functools.cache
+def get_rule_assistant() -> RuleAssistant:
+    """Retourne l'instance partagée du RuleAssistant"""
+    return RuleAssistant()
 
 
 if __name__ == "__main__":
@@ -807,21 +961,21 @@ if __name__ == "__main__":
     print("🧪 Test des Assistants LLM")
     
     # Test de génération de workflow
-    workflow = workflow_assistant.generate_workflow(
+    workflow = get_workflow_assistant().generate_workflow(
         "e-commerce",
         "Gestion des commandes en ligne"
     )
     print(f"📋 Workflow généré: {len(workflow)} étapes")
     
     # Test de génération de patterns
-    patterns = pattern_assistant.generate_patterns_for_entity(
+    patterns = get_pattern_assistant().generate_patterns_for_entity(
         "ecommerce",
         "Gestion des commandes en ligne"
     )
     print(f"🔍 Patterns générés: {len(patterns)} patterns")
     
     # Test de génération de règles
-    rules = rule_assistant.generate_rules_for_scenario(
+    rules = get_rule_assistant().generate_rules_for_scenario(
         "ecommerce",
         ["stock_available == False", "amount >= 100"]
     )
@@ -3,34 +3,117 @@ Interface avec un vrai LLM (OpenAI)
 Gère l'extraction d'intentions, de paramètres et la génération d'embeddings
 """
 
+import concurrent.futures
+import functools
+import io
 import os
-import json
-import openai
+import sys
+from collections import OrderedDict
+import numpy as np
+import orjson
 from typing import Dict, List, Optional, Tuple
-from dotenv import load_dotenv
 
-# Charge les variables d'environnement
-load_dotenv()
+from src.llm.cache import PersistentEmbeddingCache
+
+# Nombre maximum de produits candidats envoyés au LLM pour une recommandation
+MAX_PROMPT_PRODUCTS = 20
+
+# Budget de tokens du prompt de recommandation
+MAX_PROMPT_TOKENS = 2500
+
+# Nombre maximum d'embeddings produits conservés en mémoire (LRU)
+PRODUCT_EMBEDDINGS_CACHE_SIZE = 4096
+
+# Prompt de recommandation (substitution unique par %)
+RECOMMENDATION_PROMPT_TEMPLATE = """
+Tu es un assistant spécialisé dans les recommandations de produits informatiques.
+
+L'utilisateur recherche : "%(query)s"
+
+Produits disponibles :
+%(products)s
+
+Recommandes 3 produits maximum qui correspondent le mieux au besoin de l'utilisateur.
+Pour chaque recommandation, explique brièvement pourquoi ce produit est pertinent.
+
+Réponds au format :
+1. **Nom du produit** - Prix€
+   Raison de la recommandation
+
+2. **Nom du produit** - Prix€
+   Raison de la recommandation
+
+3. **Nom du produit** - Prix€
+   Raison de la recommandation
+"""
+
+
+def format_product_line(product: Dict) -> str:
+    """
+    Formate la ligne d'un produit pour le prompt de recommandation
+    
+    Args:
+        product: Dictionnaire avec name, description et price
+    
+    Returns:
+        str: Ligne prête à être insérée dans le prompt
+    """
+    return f"- {product['name']}: {product['description']} ({product['price']}€)"
+
+
+@functools.lru_cache(maxsize=None)
+def _get_token_encoder(model: str):
+    """Retourne l'encodeur tiktoken du modèle, ou None si tiktoken n'est pas installé"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@functools.lru_cache(maxsize=256)
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """
+    Compte les tokens d'un texte pour un modèle (résultat mis en cache)
+    
+    Sans tiktoken, le nombre est estimé à raison d'un token pour 4 caractères.
+    """
+    encoder = _get_token_encoder(model)
+    if encoder is None:
+        return len(text) // 4 + 1
+    return len(encoder.encode(text))
+
 
 class LLMInterface:
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-3.5-turbo",
+                 cache_path: Optional[str] = None):
         """
         Initialise l'interface LLM
         
         Args:
             api_key: Clé API OpenAI (optionnel, peut être dans .env)
             model: Modèle à utiliser
+            cache_path: Fichier sqlite du cache persistant des embeddings (optionnel)
         """
+        # Import différé : openai (et ses dépendances) n'est chargé que si le LLM est utilisé
+        import openai
+        
         self.model = model
         
         # Configuration de l'API
-        if api_key:
-            self.client = openai.OpenAI(api_key=api_key)
-        else:
+        if not api_key:
             api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("Clé API OpenAI manquante. Définissez OPENAI_API_KEY dans .env ou passez-la en paramètre.")
-            self.client = openai.OpenAI(api_key=api_key)
+        if not api_key:
+            # Le fichier .env n'est lu que si la clé n'est pas déjà dans l'environnement
+            from dotenv import load_dotenv
+            load_dotenv()
+            api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("Clé API OpenAI manquante. Définissez OPENAI_API_KEY dans .env ou passez-la en paramètre.")
+        self.client = openai.OpenAI(api_key=api_key)
         
         # Prompts système pour l'extraction d'intentions et paramètres
         self.intent_extraction_prompt = """
@@ -76,6 +159,15 @@ Réponds uniquement avec un JSON valide au format :
 """
 
         self.embedding_model = "text-embedding-3-small"
+        
+        # Embeddings normalisés des produits, indexés par leur description textuelle (LRU)
+        self._product_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        
+        # Cache persistant des embeddings entre deux sessions
+        self.embedding_cache = PersistentEmbeddingCache(cache_path) if cache_path else None
+        
+        # Thread des préchargements d'embeddings lancés en arrière-plan
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
     
     def extract_intent_and_parameters(self, user_query: str) -> Tuple[str, Dict, float]:
         """
@@ -99,19 +191,14 @@ Réponds uniquement avec un JSON valide au format :
                 model=self.model,
                 messages=messages,
                 temperature=0.1,  # Faible température pour plus de cohérence
-                max_tokens=500
+                max_tokens=500,
+                # Mode JSON : la réponse est un objet JSON brut, sans balises markdown
+                response_format={"type": "json_object"}
             )
             
             # Parsing de la réponse JSON
-            content = response.choices[0].message.content.strip()
-            
-            # Nettoyage du JSON (suppression de markdown si présent)
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            result = json.loads(content)
+            content = response.choices[0].message.content
+            result = orjson.loads(content)
             
             intent = result.get("intent", "unknown")
             parameters = result.get("parameters", {})
@@ -122,7 +209,7 @@ Réponds uniquement avec un JSON valide au format :
             
             return intent, parameters, confidence
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"❌ Erreur de parsing JSON: {e}")
             print(f"Contenu reçu: {content}")
             return "unknown", {}, 0.0
@@ -131,7 +218,7 @@ Réponds uniquement avec un JSON valide au format :
             print(f"❌ Erreur lors de l'extraction d'intention: {e}")
             return "unknown", {}, 0.0
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Génère un embedding réel pour un texte donné
         
@@ -139,17 +226,25 @@ Réponds uniquement avec un JSON valide au format :
             text: Texte à encoder
         
         Returns:
-            List[float]: Vecteur d'embedding
+            np.ndarray: Vecteur d'embedding (float32, dimension 1536)
         """
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get(self.embedding_model, text)
+            if cached is not None:
+                return cached
+        
         try:
             response = self.client.embeddings.create(
                 model=self.embedding_model,
                 input=text
             )
             
-            embedding = response.data[0].embedding
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
             print(f"🤖 LLM - Embedding généré pour: '{text[:50]}...'")
             
+            if self.embedding_cache is not None:
+                self.embedding_cache.put(self.embedding_model, text, embedding)
+            
             return embedding
             
         except Exception as e:
@@ -157,7 +252,93 @@ Réponds uniquement avec un JSON valide au format :
             # Fallback vers un embedding simulé
             return self._generate_fallback_embedding(text)
     
-    def _generate_fallback_embedding(self, text: str) -> List[float]:
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Génère les embeddings de plusieurs textes en un seul appel batch
+
+        Args:
+            texts: Textes à encoder
+
+        Returns:
+            np.ndarray: Matrice (len(texts), 1536) en float32, une ligne par texte
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            cached = None
+            if self.embedding_cache is not None:
+                cached = self.embedding_cache.get(self.embedding_model, text)
+            if cached is not None:
+                vectors[text] = cached
+            else:
+                missing.append(text)
+
+        if missing:
+            try:
+                response = self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=missing
+                )
+                for text, item in zip(missing, response.data):
+                    embedding = np.asarray(item.embedding, dtype=np.float32)
+                    vectors[text] = embedding
+                    if self.embedding_cache is not None:
+                        self.embedding_cache.put(self.embedding_model, text, embedding)
+                print(f"🤖 LLM - {len(missing)} embeddings générés en un appel")
+            except Exception as e:
+                print(f"❌ Erreur lors de la génération d'embeddings: {e}")
+                for text in missing:
+                    vectors[text] = self._generate_fallback_embedding(text)
+
+        return np.stack([vectors[text] for text in texts])
+
+    def prefetch_intents(self, queries: List[str]) -> concurrent.futures.Future:
+        """
+        Précharge en arrière-plan les embeddings de requêtes probables
+        
+        Les textes absents du cache persistant sont encodés en un seul appel
+        batch ; sans cache persistant, l'appel n'a pas d'effet.
+        
+        Args:
+            queries: Textes à précharger
+        
+        Returns:
+            Future[int]: Nombre d'embeddings ajoutés au cache
+        """
+        return self._pool.submit(self._prefetch_embeddings, list(queries))
+    
+    def _prefetch_embeddings(self, texts: List[str]) -> int:
+        """Encode en un appel batch les textes absents du cache persistant"""
+        if self.embedding_cache is None:
+            return 0
+        
+        missing = [
+            text for text in dict.fromkeys(texts)
+            if text and self.embedding_cache.get(self.embedding_model, text) is None
+        ]
+        if not missing:
+            return 0
+        
+        try:
+            response = self.client.embeddings.create(
+                model=self.embedding_model,
+                input=missing
+            )
+        except Exception as e:
+            print(f"⚠️ Préchargement des embeddings impossible: {e}")
+            return 0
+        
+        for text, item in zip(missing, response.data):
+            self.embedding_cache.put(self.embedding_model, text, np.asarray(item.embedding, dtype=np.float32))
+        return len(missing)
+    
+    def close(self):
+        """Attend les tâches en arrière-plan et ferme le cache persistant"""
+        self._pool.shutdown(wait=True)
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+    
+    def _generate_fallback_embedding(self, text: str) -> np.ndarray:
         """
         Génère un embedding de fallback (simulé) en cas d'erreur
         
@@ -165,31 +346,17 @@ Réponds uniquement avec un JSON valide au format :
             text: Texte à encoder
         
         Returns:
-            List[float]: Vecteur d'embedding simulé
+            np.ndarray: Vecteur d'embedding simulé (float32, dimension 1536)
         """
         import hashlib
         
-        # Utilise un hash du texte pour générer un vecteur déterministe
-        hash_obj = hashlib.md5(text.encode())
-        hash_bytes = hash_obj.digest()
-        
-        # Convertit les bytes en liste de floats entre -1 et 1
-        embedding = []
-        for i in range(0, len(hash_bytes), 4):
-            chunk = hash_bytes[i:i+4]
-            while len(chunk) < 4:
-                chunk += b'\x00'
-            
-            value = int.from_bytes(chunk, byteorder='big')
-            normalized_value = (value / (2**32 - 1)) * 2 - 1
-            embedding.append(normalized_value)
+        # Les 16 octets du hash servent de graine : le vecteur reste déterministe
+        # tout en ayant 1536 composantes réellement distinctes
+        hash_bytes = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        rng = np.random.default_rng(int.from_bytes(hash_bytes, byteorder='big'))
         
-        # S'assure d'avoir une dimension fixe (1536 pour text-embedding-3-small)
-        while len(embedding) < 1536:
-            remaining = 1536 - len(embedding)
-            embedding.extend(embedding[:min(remaining, len(embedding))])
-        
-        return embedding[:1536]
+        # Génère directement les 1536 valeurs entre -1 et 1 (text-embedding-3-small)
+        return rng.uniform(-1.0, 1.0, 1536).astype(np.float32)
     
     def get_recommendation_prompt(self, query_text: str, available_products: List[Dict]) -> str:
         """
@@ -202,46 +369,122 @@ Réponds uniquement avec un JSON valide au format :
         Returns:
             str: Prompt pour le LLM
         """
-        products_info = []
-        for product in available_products:
-            products_info.append(f"- {product['name']}: {product['description']} ({product['price']}€)")
+        products_info = "\n".join(
+            product['_llm_line'] if '_llm_line' in product else format_product_line(product)
+            for product in available_products
+        )
+        return RECOMMENDATION_PROMPT_TEMPLATE % {'query': query_text, 'products': products_info}
+    
+    def _embed_products(self, products: List[Dict]) -> np.ndarray:
+        """
+        Retourne la matrice des embeddings normalisés des produits
         
-        prompt = f"""
-Tu es un assistant spécialisé dans les recommandations de produits informatiques.
-
-L'utilisateur recherche : "{query_text}"
-
-Produits disponibles :
-{chr(10).join(products_info)}
-
-Recommandes 3 produits maximum qui correspondent le mieux au besoin de l'utilisateur.
-Pour chaque recommandation, explique brièvement pourquoi ce produit est pertinent.
-
-Réponds au format :
-1. **Nom du produit** - Prix€
-   Raison de la recommandation
-
-2. **Nom du produit** - Prix€
-   Raison de la recommandation
-
-3. **Nom du produit** - Prix€
-   Raison de la recommandation
-"""
-        return prompt
+        Les produits jamais vus sont encodés en un seul appel batch à l'API,
+        puis conservés en cache (LRU) pour les recommandations suivantes. Les
+        embeddings de secours (API en échec) ne sont pas conservés : ils seront
+        redemandés à l'API au prochain appel.
+        """
+        texts = [f"{product['name']}: {product['description']}" for product in products]
+        vectors: Dict[str, np.ndarray] = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            vector = self._product_embeddings.get(text)
+            if vector is not None:
+                self._product_embeddings.move_to_end(text)
+                vectors[text] = vector
+            else:
+                missing.append(text)
+        
+        if missing:
+            try:
+                response = self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=missing
+                )
+                fetched = [item.embedding for item in response.data]
+                cacheable = True
+            except Exception as e:
+                print(f"❌ Erreur lors de la génération des embeddings produits: {e}")
+                fetched = [self._generate_fallback_embedding(text) for text in missing]
+                cacheable = False
+            
+            for text, vector in zip(missing, fetched):
+                vector = np.asarray(vector, dtype=np.float32)
+                vectors[text] = vector / (np.linalg.norm(vector) or 1.0)
+                if cacheable:
+                    self._product_embeddings[text] = vectors[text]
+            while len(self._product_embeddings) > PRODUCT_EMBEDDINGS_CACHE_SIZE:
+                self._product_embeddings.popitem(last=False)
+        
+        return np.stack([vectors[text] for text in texts])
+    
+    def _select_products_for_prompt(self, query_text: str, available_products: List[Dict]) -> List[Dict]:
+        """
+        Réduit le catalogue aux produits les plus proches de la requête
+        
+        Au-delà de MAX_PROMPT_PRODUCTS produits, ne garde que les plus similaires
+        (cosinus entre embeddings), triés par pertinence. Retire ensuite les
+        derniers produits tant que le prompt dépasse MAX_PROMPT_TOKENS tokens.
+        
+        Args:
+            query_text: Description du besoin utilisateur
+            available_products: Liste des produits disponibles
+        
+        Returns:
+            List[Dict]: Produits à inclure dans le prompt
+        """
+        products = list(available_products)
+        
+        if len(products) > MAX_PROMPT_PRODUCTS:
+            query_vector = self.generate_embedding(query_text)
+            query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+            scores = self._embed_products(products) @ query_vector
+            top = np.argsort(-scores)[:MAX_PROMPT_PRODUCTS]
+            products = [products[i] for i in top]
+        
+        while (len(products) > 1 and
+               count_tokens(self.get_recommendation_prompt(query_text, products), self.model) > MAX_PROMPT_TOKENS):
+            products.pop()
+        
+        return products
+    
+    def _stream_completion(self, response) -> str:
+        """
+        Affiche une réponse en streaming au fur et à mesure de sa réception
+        
+        Args:
+            response: Itérateur de chunks retourné par l'API avec stream=True
+        
+        Returns:
+            str: Texte complet de la réponse
+        """
+        buffer = io.StringIO()
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content or ''
+            sys.stdout.write(token)
+            sys.stdout.flush()
+            buffer.write(token)
+        sys.stdout.write('\n')
+        return buffer.getvalue().strip()
     
-    def get_product_recommendations(self, query_text: str, available_products: List[Dict]) -> str:
+    def get_product_recommendations(self, query_text: str, available_products: List[Dict],
+                                    stream: bool = False) -> str:
         """
         Génère des recommandations de produits via le LLM
         
         Args:
             query_text: Description du besoin utilisateur
             available_products: Liste des produits disponibles
+            stream: Affiche les recommandations sur la sortie standard au fil de leur génération
         
         Returns:
             str: Recommandations formatées
         """
         try:
-            prompt = self.get_recommendation_prompt(query_text, available_products)
+            candidates = self._select_products_for_prompt(query_text, available_products)
+            prompt = self.get_recommendation_prompt(query_text, candidates)
             
             messages = [
                 {"role": "system", "content": "Tu es un expert en produits informatiques."},
@@ -252,10 +495,14 @@ Réponds au format :
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=800
+                max_tokens=800,
+                stream=stream
             )
             
-            recommendations = response.choices[0].message.content.strip()
+            if stream:
+                recommendations = self._stream_completion(response)
+            else:
+                recommendations = response.choices[0].message.content.strip()
             print(f"🤖 LLM - Recommandations générées pour: '{query_text}'")
             
             return recommendations
@@ -301,7 +548,8 @@ Réponds en français de manière concise et utile.
         except Exception as e:
             return f"Erreur lors de la génération d'explication: {e}"
     
-    def generate_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1000) -> str:
+    def generate_response(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1000,
+                          stream: bool = False) -> str:
         """
         Génère une réponse textuelle avec l'LLM
         
@@ -309,6 +557,7 @@ Réponds en français de manière concise et utile.
             prompt: Prompt à envoyer à l'LLM
             temperature: Contrôle la créativité (0.0 = déterministe, 1.0 = très créatif)
             max_tokens: Nombre maximum de tokens dans la réponse
+            stream: Affiche la réponse sur la sortie standard au fil de sa génération
         
         Returns:
             str: Réponse générée par l'LLM
@@ -321,9 +570,12 @@ Réponds en français de manière concise et utile.
                     {"role": "user", "content": prompt}
                 ],
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                stream=stream
             )
             
+            if stream:
+                return self._stream_completion(response)
             return response.choices[0].message.content.strip()
             
         except Exception as e:
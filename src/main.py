@@ -4,14 +4,48 @@ Point d'entrée principal du PoC - Système de Gestion Cognitif de Commande
 Interface CLI interactive pour tester le système avec vrai LLM
 """
 
+import argparse
 import os
+import re
 import sys
+from typing import Dict, Optional, Tuple
 from src.core.knowledge_base import KnowledgeBase
 from src.rag.vector_store import VectorStore
-from src.core.agent import CognitiveOrderAgent
+from src.core.agent import CANONICAL_SEARCH_QUERIES, CognitiveOrderAgent
 from src.llm.llm_interface import LLMInterface
 
 
+# Cache persistant des embeddings : hors du répertoire courant, dans le cache utilisateur
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'cognitive-order-system', 'embedding_cache.db'
+)
+
+# Requêtes canoniques traitées sans passer par le LLM : (motif, intention, paramètres capturés)
+_FAST_INTENTS = [
+    (re.compile(r'^(?:list(?:e|er)?\s+)?(?:les\s+|tous\s+les\s+)?clients?$', re.I), 'list_clients', ()),
+    (re.compile(r'^statu[ts]?\s+(?:de\s+la\s+)?commande\s+([\w-]+)$', re.I), 'check_status', ('order_id',)),
+    (re.compile(r'^introspec\w*\s+(?:(?:de\s+)?l\'\s*)?ontolog\w*$', re.I), 'introspect_ontology', ()),
+]
+
+
+def match_fast_intent(user_input: str) -> Optional[Tuple[str, Dict]]:
+    """
+    Reconnaît les requêtes canoniques sans appel au LLM
+    
+    Args:
+        user_input: Requête utilisateur
+    
+    Returns:
+        Optional[Tuple[str, Dict]]: (intention, paramètres) ou None si aucun motif ne correspond
+    """
+    for pattern, intent, param_names in _FAST_INTENTS:
+        match = pattern.match(user_input)
+        if match:
+            return intent, dict(zip(param_names, match.groups()))
+    return None
+
+
 def print_banner():
     """Affiche la bannière du PoC"""
     banner = """
@@ -84,28 +118,24 @@ def print_stats(knowledge_base: KnowledgeBase, vector_store: VectorStore):
     
     # Statistiques de la base de connaissances
     try:
-        clients = knowledge_base.get_instances_of_class("http://example.org/ontology/Client")
-        products = knowledge_base.get_instances_of_class("http://example.org/ontology/Product")
-        orders = knowledge_base.get_instances_of_class("http://example.org/ontology/Order")
+        snapshot = knowledge_base.get_stats_snapshot()
+        clients = snapshot['Client']
+        products = snapshot['Product']
         
         print(f"👥 Clients: {len(clients)}")
         print(f"📦 Produits: {len(products)}")
-        print(f"📋 Commandes: {len(orders)}")
+        print(f"📋 Commandes: {len(snapshot['Order'])}")
         
         # Affiche quelques exemples
         if clients:
             print(f"\n👤 Exemples de clients:")
-            for i, client_uri in enumerate(clients[:3], 1):
-                client_id = client_uri.split('/')[-1]
-                client_details = knowledge_base.get_client_details(client_id)
-                print(f"   {i}. {client_details.get('hasName', 'N/A')} ({client_id})")
+            for i, client in enumerate(clients[:3], 1):
+                print(f"   {i}. {client['name']} ({client['id']})")
         
         if products:
             print(f"\n📦 Exemples de produits:")
-            for i, product_uri in enumerate(products[:3], 1):
-                product_id = product_uri.split('/')[-1]
-                product_details = knowledge_base.get_product_details(product_id)
-                print(f"   {i}. {product_details.get('hasName', 'N/A')} - {product_details.get('hasPrice', 'N/A')}€ ({product_id})")
+            for i, product in enumerate(products[:3], 1):
+                print(f"   {i}. {product['name']} - {product['price']}€ ({product['id']})")
         
     except Exception as e:
         print(f"❌ Erreur lors de la récupération des stats KB: {e}")
@@ -136,7 +166,7 @@ def check_llm_status(llm_interface: LLMInterface) -> bool:
             
             # Test simple de l'API
             test_embedding = llm_interface.generate_embedding("test")
-            if test_embedding:
+            if test_embedding is not None and len(test_embedding) > 0:
                 print("✅ API OpenAI accessible")
                 print(f"   Dimension embedding: {len(test_embedding)}")
                 return True
@@ -153,8 +183,13 @@ def check_llm_status(llm_interface: LLMInterface) -> bool:
         return False
 
 
-def initialize_system():
-    """Initialise le système complet"""
+def initialize_system(cache_path: str = None):
+    """
+    Initialise le système complet
+    
+    Args:
+        cache_path: Fichier sqlite du cache persistant des embeddings (optionnel)
+    """
     print("🚀 Initialisation du système...")
     
     try:
@@ -167,7 +202,7 @@ def initialize_system():
         llm_interface = None
         try:
             print("🤖 Initialisation de l'interface LLM...")
-            llm_interface = LLMInterface()
+            llm_interface = LLMInterface(cache_path=cache_path)
             print("✅ Interface LLM initialisée")
         except Exception as e:
             print(f"⚠️ Interface LLM non disponible: {e}")
@@ -191,12 +226,29 @@ def initialize_system():
         sys.exit(1)
 
 
+def parse_args():
+    """Analyse les arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Système de Gestion Cognitif de Commande")
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="Fichier sqlite du cache persistant des embeddings ('' pour le désactiver)"
+    )
+    return parser.parse_args()
+
+
 def main():
     """Fonction principale"""
+    args = parse_args()
     print_banner()
     
     # Initialisation du système
-    knowledge_base, vector_store, agent, llm_interface = initialize_system()
+    knowledge_base, vector_store, agent, llm_interface = initialize_system(args.cache_path or None)
+    
+    # Précharge en arrière-plan, pendant la saisie de la première requête, les embeddings
+    # des requêtes de recherche fixes de l'agent (un seul appel batch)
+    if llm_interface:
+        llm_interface.prefetch_intents(list(CANONICAL_SEARCH_QUERIES))
     
     print("\n" + "=" * 60)
     print("💬 Entrez vos requêtes en langage naturel (ou 'help' pour l'aide)")
@@ -224,8 +276,15 @@ def main():
             elif not user_input:
                 continue
             
-            # Traitement de la requête par l'agent
-            response = agent.run_agent(user_input)
+            # Requêtes canoniques : exécution directe de l'outil, sans aller-retour LLM
+            fast_intent = match_fast_intent(user_input)
+            if fast_intent:
+                intent, params = fast_intent
+                print(f"⚡ Intention reconnue directement: {intent}")
+                response = agent._execute_intent(intent, params)
+            else:
+                # Traitement de la requête par l'agent
+                response = agent.run_agent(user_input)
             
             # Affichage de la réponse
             print(f"\n🤖 Agent: {response}")
@@ -239,6 +298,10 @@ def main():
         except Exception as e:
             print(f"\n❌ Erreur inattendue: {e}")
             print("💡 Essayez de reformuler votre requête ou tapez 'help' pour l'aide")
+    
+    # Termine les préchargements et écrit les embeddings en attente avant de quitter
+    if llm_interface:
+        llm_interface.close()
 
 
 if __name__ == "__main__":
@@ -3,14 +3,18 @@ Module MCP (Model Context Protocol)
 Gère le serveur et client MCP, ainsi que les outils exposés
 """
 
-from .mcp_server import MCPServer, MCPServerManager, start_mcp_server
-from .mcp_client import MCPClient, MCPToolInterface
+from .mcp_server import MCPServer, MCPServerManager, start_mcp_server, run_mcp_server
+from .mcp_client import MCPClient, MCPClientPool, MCPToolInterface, SyncMCPClient, ToolDesc
 from .tools import *
 
 __all__ = [
     'MCPServer', 
     'MCPServerManager', 
     'start_mcp_server',
+    'run_mcp_server',
     'MCPClient', 
-    'MCPToolInterface'
+    'MCPClientPool',
+    'MCPToolInterface',
+    'SyncMCPClient',
+    'ToolDesc'
 ] 
\ No newline at end of file
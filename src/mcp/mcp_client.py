@@ -4,51 +4,225 @@ Permet à l'agent de communiquer avec le serveur MCP pour utiliser les outils
 """
 
 import asyncio
+import concurrent.futures
 import json
 import logging
-from typing import Dict, List, Any
+import re
+import socket
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Awaitable, Callable, ClassVar, Dict, List, Any, Mapping, Optional, Tuple
 import websockets
 
+try:
+    # Implémentation asyncio native de websockets (>= 13)
+    from websockets.asyncio.client import connect as _ws_connect
+except ImportError:
+    _ws_connect = websockets.connect
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    
+    def _json_loads(data: Any) -> Any:
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+# Taille maximale d'une trame reçue (les réponses volumineuses des outils restent acceptées)
+MAX_FRAME_SIZE = 2 ** 22
+
+# Options de connexion websocket :
+# - la tâche de lecture consomme les trames au fil de l'eau, la file de réception n'est pas bornée
+# - pas de permessage-deflate : les messages JSON-RPC sont petits, la compression coûte plus qu'elle ne rapporte
+CONNECT_OPTIONS = {
+    "max_size": MAX_FRAME_SIZE,
+    "max_queue": None,
+    "compression": None,
+    "ping_interval": 20,
+    "ping_timeout": 20,
+}
+
+# Nombre maximal de requêtes en vol par client (taille de la table des requêtes en attente)
+MAX_PENDING_REQUESTS = 4096
+_PENDING_MASK = MAX_PENDING_REQUESTS - 1
+
+
+def _frame_template(message: Dict) -> bytes:
+    """Sérialise un message JSON-RPC en gabarit dont l'id entier est substitué par %d"""
+    return _json_dumps(dict(message, id="__id__")).replace(b'"__id__"', b"%d")
+
+
+# Trames constantes pré-sérialisées : seul l'id change d'un envoi à l'autre
+_INIT_TEMPLATE = _frame_template({
+    "jsonrpc": "2.0",
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {
+            "tools": {}
+        },
+        "clientInfo": {
+            "name": "CognitiveOrderAgent",
+            "version": "1.0.0"
+        }
+    }
+})
+_LIST_TOOLS_TEMPLATE = _frame_template({
+    "jsonrpc": "2.0",
+    "method": "tools/list",
+    "params": {}
+})
+
+# Enveloppe tools/call : le nom de l'outil est figé dans le préfixe, les arguments sont insérés avant le suffixe
+_TOOL_CALL_PREFIX = b'{"jsonrpc":"2.0","id":%%d,"method":"tools/call","params":{"name":%s,"arguments":'
+_TOOL_CALL_SUFFIX = b'}}'
+
+# Au-delà de cette taille, les réponses tools/call sont lues sans construire l'arbre JSON complet.
+# Le coût est dominé par le décodage du littéral texte (échappements compris), déjà fait en C :
+# en dessous de quelques dizaines de Ko, le décodage complet est aussi rapide que la lecture ciblée.
+LAZY_PARSE_THRESHOLD = 64 * 1024
+
+# Enveloppe d'une réponse tools/call textuelle : seul le texte final reste à décoder
+_TEXT_RESPONSE_HEAD = re.compile(
+    rb'\{\s*"jsonrpc"\s*:\s*"2\.0"\s*,\s*"id"\s*:\s*(\d+)\s*,\s*"result"\s*:\s*\{\s*"content"\s*:'
+    rb'\s*\[\s*\{\s*"type"\s*:\s*"text"\s*,\s*"text"\s*:\s*"'
+)
+_TEXT_RESPONSE_TAIL = re.compile(rb'"\s*\}\s*\]\s*\}\s*\}\s*$')
+
+
+def _parse_frame(message: Any) -> Any:
+    """
+    Décode une trame reçue du serveur
+    
+    Pour une réponse tools/call volumineuse, seul le littéral du texte est
+    décodé ; toute autre forme passe par le décodage JSON complet.
+    
+    Args:
+        message: Trame reçue
+    
+    Returns:
+        Any: Réponse ou liste de réponses
+    """
+    if isinstance(message, bytes) and len(message) > LAZY_PARSE_THRESHOLD:
+        head = _TEXT_RESPONSE_HEAD.match(message)
+        tail = _TEXT_RESPONSE_TAIL.search(message, len(message) - 16) if head else None
+        if tail:
+            try:
+                # Vue sur la trame reçue : le littéral est décodé sans copie intermédiaire
+                text = _json_loads(memoryview(message)[head.end() - 1:tail.start() + 1])
+            except ValueError:
+                text = None
+            if isinstance(text, str):
+                return {"id": int(head.group(1)), "result": {"content": [{"type": "text", "text": text}]}}
+    return _json_loads(message)
+
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, slots=True)
+class ToolDesc:
+    """Description immuable d'un outil exposé par le serveur MCP"""
+    name: str
+    description: str
+    input_schema: Mapping[str, Any]
+    
+    @classmethod
+    def from_dict(cls, tool: Dict) -> "ToolDesc":
+        """Construit la description à partir d'une entrée de tools/list"""
+        return cls(
+            name=tool["name"],
+            description=tool.get("description", ""),
+            input_schema=MappingProxyType(tool.get("inputSchema", {}))
+        )
+
+
 class MCPClient:
     """
     Client MCP pour communiquer avec le serveur MCP
     """
     
-    def __init__(self, server_url: str = "ws://localhost:8001"):
+    # Outils déjà récupérés, partagés entre clients : (url du serveur, version du protocole) -> outils
+    _global_tools_cache: ClassVar[Dict[Tuple[str, str], Tuple[ToolDesc, ...]]] = {}
+    
+    def __init__(self, server_url: str = "ws://localhost:8001", flush_interval: Optional[float] = None,
+                 transport: Optional[Callable[..., Awaitable[Any]]] = None):
         """
         Initialise le client MCP
         
         Args:
             server_url: URL du serveur MCP
+            flush_interval: Délai (secondes) de regroupement des requêtes en une
+                seule trame batch ; None pour envoyer chaque requête immédiatement
+            transport: Fabrique de connexion asynchrone (url, **CONNECT_OPTIONS -> connexion
+                exposant send/recv/close et l'itération asynchrone) ; websockets par défaut
         """
         self.server_url = server_url
+        self.flush_interval = flush_interval
+        self.transport = transport or _ws_connect
         self.websocket = None
         self.connected = False
         self.request_id = 0
-        self.tools_cache = None
+        self.tools_cache: Optional[Tuple[ToolDesc, ...]] = None
+        self.protocol_version: Optional[str] = None
+        
+        # Requêtes en vol, indexées par id, résolues par la tâche de lecture
+        # Table circulaire indexée par id & _PENDING_MASK (ids entiers croissants) : (id, future)
+        self._pending: List[Optional[Tuple[int, asyncio.Future]]] = [None] * MAX_PENDING_REQUESTS
+        self._in_flight = 0
+        self._reader_task: Optional[asyncio.Task] = None
+        
+        # Requêtes sérialisées en attente du prochain envoi groupé : (id, trame)
+        self._outbox: List[Tuple[int, bytes]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks = set()
+        
+        # Préfixe tools/call pré-sérialisé, par nom d'outil
+        self._tool_templates: Dict[str, bytes] = {}
     
     async def connect(self):
         """
         Se connecte au serveur MCP
         """
         try:
-            self.websocket = await websockets.connect(self.server_url)
+            self.websocket = await self.transport(self.server_url, **CONNECT_OPTIONS)
+            self._tune_socket()
             self.connected = True
-            logger.info(f"Connecté au serveur MCP: {self.server_url}")
+            self._reader_task = asyncio.create_task(self._reader())
+            logger.info("Connecté au serveur MCP: %s", self.server_url)
             
             # Initialise la connexion
             await self._initialize()
             
         except Exception as e:
-            logger.error(f"Erreur de connexion au serveur MCP: {e}")
+            logger.error("Erreur de connexion au serveur MCP: %s", e)
             self.connected = False
             raise
     
+    def _tune_socket(self):
+        """
+        Désactive l'algorithme de Nagle et active le keepalive TCP sur la connexion
+        
+        Les petites requêtes JSON-RPC partent ainsi sans attendre l'acquittement
+        de la précédente. Sans socket TCP accessible (transport personnalisé), rien n'est fait.
+        """
+        transport = getattr(self.websocket, "transport", None)
+        sock = transport.get_extra_info("socket") if transport is not None else None
+        if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+            return
+        
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except OSError as e:
+            logger.warning("Impossible de régler la socket MCP: %s", e)
+    
     async def disconnect(self):
         """
         Se déconnecte du serveur MCP
@@ -56,57 +230,95 @@ class MCPClient:
         if self.websocket:
             await self.websocket.close()
             self.connected = False
+            if self._reader_task:
+                await self._reader_task
+                self._reader_task = None
             logger.info("Déconnecté du serveur MCP")
     
+    async def _reader(self):
+        """
+        Lit en continu les réponses du serveur et les remet aux requêtes en attente
+        """
+        error: Exception = ConnectionError("Connexion au serveur MCP fermée")
+        try:
+            async for message in self.websocket:
+                data = _parse_frame(message)
+                # Une trame peut contenir une réponse unique ou un batch de réponses
+                for response in (data if isinstance(data, list) else (data,)):
+                    request_id = response.get("id")
+                    if not isinstance(request_id, int):
+                        continue
+                    future = self._pop_pending(request_id)
+                    if future is not None and not future.done():
+                        future.set_result(response)
+        except Exception as e:
+            error = e
+        finally:
+            self.connected = False
+            pending, self._pending = self._pending, [None] * MAX_PENDING_REQUESTS
+            self._in_flight = 0
+            for entry in pending:
+                if entry is not None and not entry[1].done():
+                    entry[1].set_exception(error)
+    
+    def _pop_pending(self, request_id: int) -> Optional[asyncio.Future]:
+        """
+        Retire et retourne la requête en attente associée à un id
+        
+        Args:
+            request_id: Id de la requête
+        
+        Returns:
+            Optional[asyncio.Future]: Future de la requête, None si aucune (ou si le slot
+            a été réattribué à une requête plus récente)
+        """
+        slot = request_id & _PENDING_MASK
+        entry = self._pending[slot]
+        if entry is None or entry[0] != request_id:
+            return None
+        self._pending[slot] = None
+        self._in_flight -= 1
+        return entry[1]
+    
     async def _initialize(self):
         """
         Initialise la connexion MCP
         """
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._get_next_id(),
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "clientInfo": {
-                    "name": "CognitiveOrderAgent",
-                    "version": "1.0.0"
-                }
-            }
-        }
-        
-        response = await self._send_request(request)
-        logger.info("Connexion MCP initialisée")
+        request_id = self._get_next_id()
+        response = await self._send_raw(request_id, _INIT_TEMPLATE % request_id)
+        self.protocol_version = response.get("result", {}).get("protocolVersion")
+        logger.debug("Connexion MCP initialisée (protocole %s)", self.protocol_version)
         return response
     
-    async def list_tools(self) -> List[Dict]:
+    async def list_tools(self) -> Tuple[ToolDesc, ...]:
         """
         Liste tous les outils disponibles
         
+        Le résultat est immuable et partagé entre les clients connectés au même
+        serveur avec la même version de protocole.
+        
         Returns:
-            List[Dict]: Liste des outils
+            Tuple[ToolDesc, ...]: Descriptions des outils
         """
-        if self.tools_cache:
+        if self.tools_cache is not None:
             return self.tools_cache
         
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._get_next_id(),
-            "method": "tools/list",
-            "params": {}
-        }
+        cache_key = (self.server_url, self.protocol_version)
+        cached = MCPClient._global_tools_cache.get(cache_key)
+        if cached is not None:
+            self.tools_cache = cached
+            return cached
         
-        response = await self._send_request(request)
+        request_id = self._get_next_id()
+        response = await self._send_raw(request_id, _LIST_TOOLS_TEMPLATE % request_id)
         
         if "result" in response and "tools" in response["result"]:
-            self.tools_cache = response["result"]["tools"]
+            self.tools_cache = tuple(ToolDesc.from_dict(tool) for tool in response["result"]["tools"])
+            MCPClient._global_tools_cache[cache_key] = self.tools_cache
             return self.tools_cache
         else:
             logger.error("Erreur lors de la récupération des outils")
-            return []
+            return ()
     
     async def call_tool(self, tool_name: str, arguments: Dict) -> Any:
         """
@@ -119,63 +331,204 @@ class MCPClient:
         Returns:
             Any: Résultat de l'appel
         """
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._get_next_id(),
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            }
-        }
+        request_id = self._get_next_id()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Appel MCP #%d: %s %r", request_id, tool_name, arguments)
+        response = await self._send_raw(request_id, self._tool_call_frame(tool_name, request_id, arguments))
+        return self._parse_tool_response(tool_name, response)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[Any]:
+        """
+        Appelle plusieurs outils en une seule requête JSON-RPC batch
+        
+        Args:
+            calls: Liste de (nom de l'outil, arguments)
+        
+        Returns:
+            List[Any]: Résultats, dans l'ordre des appels
+        """
+        request_ids = [self._get_next_id() for _ in calls]
+        frames = [
+            self._tool_call_frame(tool_name, request_id, arguments)
+            for (tool_name, arguments), request_id in zip(calls, request_ids)
+        ]
+        
+        responses = await self._send_frames(request_ids, frames, batch=True)
+        return [
+            self._parse_tool_response(tool_name, response)
+            for (tool_name, _), response in zip(calls, responses)
+        ]
+    
+    def _tool_call_frame(self, tool_name: str, request_id: int, arguments: Dict) -> bytes:
+        """
+        Sérialise une requête tools/call à partir de l'enveloppe mise en cache pour l'outil
+        
+        Args:
+            tool_name: Nom de l'outil
+            request_id: Id de la requête
+            arguments: Arguments de l'outil
+        
+        Returns:
+            bytes: Requête JSON-RPC encodée
+        """
+        prefix = self._tool_templates.get(tool_name)
+        if prefix is None:
+            # Les '%' du nom sont doublés pour ne pas perturber la substitution de l'id
+            prefix = _TOOL_CALL_PREFIX % _json_dumps(tool_name).replace(b"%", b"%%")
+            self._tool_templates[tool_name] = prefix
+        return prefix % request_id + _json_dumps(arguments) + _TOOL_CALL_SUFFIX
+    
+    def _parse_tool_response(self, tool_name: str, response: Dict) -> Any:
+        """
+        Extrait le résultat d'une réponse tools/call
         
-        response = await self._send_request(request)
+        Args:
+            tool_name: Nom de l'outil appelé
+            response: Réponse du serveur
         
-        if "result" in response and "content" in response["result"]:
+        Returns:
+            Any: Texte du résultat
+        """
+        # Chaque champ n'est lu qu'une fois : le chemin nominal fait deux accès au dictionnaire
+        result = response.get("result")
+        content = result.get("content") if result is not None else None
+        if content is not None:
             # Extrait le texte de la réponse
-            content = response["result"]["content"]
-            if content and len(content) > 0:
-                return content[0].get("text", "")
-            return ""
-        elif "error" in response:
-            error_msg = response["error"].get("message", "Unknown error")
-            logger.error(f"Erreur lors de l'appel de l'outil {tool_name}: "
-                        f"{error_msg}")
+            return content[0].get("text", "") if content else ""
+        
+        error = response.get("error")
+        if error is not None:
+            error_msg = error.get("message", "Unknown error")
+            logger.error("Erreur lors de l'appel de l'outil %s: %s", tool_name, error_msg)
             raise Exception(f"Tool call error: {error_msg}")
-        else:
-            logger.error(f"Réponse inattendue pour l'outil {tool_name}")
-            return None
+        
+        logger.error("Réponse inattendue pour l'outil %s", tool_name)
+        return None
     
     async def _send_request(self, request: Dict) -> Dict:
         """
         Envoie une requête au serveur MCP
         
+        Plusieurs requêtes peuvent être en vol simultanément sur la même
+        connexion : la réponse est associée à la requête par son id.
+        
         Args:
             request: Requête à envoyer
         
         Returns:
             Dict: Réponse du serveur
         """
+        return await self._send_raw(request["id"], _json_dumps(request))
+    
+    async def _send_raw(self, request_id: int, frame: bytes) -> Dict:
+        """
+        Envoie une requête déjà sérialisée
+        
+        Args:
+            request_id: Id de la requête contenue dans la trame
+            frame: Requête JSON-RPC encodée
+        
+        Returns:
+            Dict: Réponse du serveur
+        """
+        responses = await self._send_frames([request_id], [frame])
+        return responses[0]
+    
+    async def _send_frames(self, request_ids: List[int], frames: List[bytes], batch: bool = False) -> List[Dict]:
+        """
+        Envoie des requêtes sérialisées et attend les réponses correspondant aux ids
+        
+        Args:
+            request_ids: Ids des requêtes
+            frames: Requêtes JSON-RPC encodées, dans l'ordre des ids
+            batch: Envoie les requêtes dans une seule trame batch JSON-RPC
+        
+        Returns:
+            List[Dict]: Réponses, dans l'ordre des ids
+        """
         if not self.connected or not self.websocket:
             raise Exception("Client MCP non connecté")
         
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request_id in request_ids:
+            slot = request_id & _PENDING_MASK
+            if self._pending[slot] is not None:
+                for sent_id in request_ids[:len(futures)]:
+                    self._pop_pending(sent_id)
+                raise Exception(f"Trop de requêtes MCP en vol (maximum {MAX_PENDING_REQUESTS})")
+            future = loop.create_future()
+            self._pending[slot] = (request_id, future)
+            self._in_flight += 1
+            futures.append(future)
+        
         try:
-            await self.websocket.send(json.dumps(request))
-            response = await self.websocket.recv()
-            return json.loads(response)
+            if self.flush_interval is not None:
+                self._enqueue(request_ids, frames)
+            elif batch:
+                await self.websocket.send(b"[" + b",".join(frames) + b"]")
+            else:
+                await self.websocket.send(frames[0])
+            return await asyncio.gather(*futures)
         except Exception as e:
-            logger.error(f"Erreur lors de l'envoi de la requête MCP: {e}")
+            logger.error("Erreur lors de l'envoi de la requête MCP: %s", e)
             raise
+        finally:
+            # Libère les slots encore occupés, y compris quand l'appel est annulé (CancelledError)
+            for request_id in request_ids:
+                self._pop_pending(request_id)
+    
+    def _enqueue(self, request_ids: List[int], frames: List[bytes]):
+        """
+        Met des requêtes en attente et programme l'envoi groupé
+        
+        Args:
+            request_ids: Ids des requêtes
+            frames: Requêtes JSON-RPC encodées
+        """
+        self._outbox.extend(zip(request_ids, frames))
+        
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.flush_interval, self._flush)
+    
+    def _flush(self):
+        """
+        Envoie toutes les requêtes en attente dans une seule trame batch
+        """
+        self._flush_handle = None
+        outbox, self._outbox = self._outbox, []
+        if not outbox:
+            return
+        
+        task = asyncio.get_running_loop().create_task(self._send_outbox(outbox))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _send_outbox(self, outbox: List[Tuple[int, bytes]]):
+        """
+        Envoie une trame batch et signale l'échec aux requêtes concernées
+        
+        Args:
+            outbox: Requêtes sérialisées (id, trame)
+        """
+        try:
+            await self.websocket.send(b"[" + b",".join(frame for _, frame in outbox) + b"]")
+        except Exception as e:
+            logger.error("Erreur lors de l'envoi groupé des requêtes MCP: %s", e)
+            for request_id, _ in outbox:
+                future = self._pop_pending(request_id)
+                if future is not None and not future.done():
+                    future.set_exception(e)
     
-    def _get_next_id(self) -> str:
+    def _get_next_id(self) -> int:
         """
         Génère un ID unique pour les requêtes
         
         Returns:
-            str: ID unique
+            int: ID unique (entier croissant)
         """
         self.request_id += 1
-        return str(self.request_id)
+        return self.request_id
     
     async def __aenter__(self):
         """
@@ -191,127 +544,177 @@ class MCPClient:
         await self.disconnect()
 
 
-class MCPToolInterface:
+class MCPClientPool:
     """
-    Interface pour utiliser les outils MCP de manière synchrone
+    Pool de connexions MCP : chaque appel part sur la connexion la moins chargée
     """
     
-    def __init__(self, server_url: str = "ws://localhost:8001"):
+    def __init__(self, server_url: str = "ws://localhost:8001", size: int = 1, **client_options):
         """
-        Initialise l'interface
+        Initialise le pool
         
         Args:
             server_url: URL du serveur MCP
+            size: Nombre de connexions
+            **client_options: Options transmises à chaque MCPClient
         """
         self.server_url = server_url
-        self.client = None
-        self._loop = None
+        self.clients = [MCPClient(server_url, **client_options) for _ in range(max(1, size))]
     
-    def _ensure_loop(self):
-        """
-        S'assure qu'une boucle d'événements est disponible
-        """
-        try:
-            self._loop = asyncio.get_running_loop()
-        except RuntimeError:
-            # Crée une nouvelle boucle si aucune n'est en cours
-            self._loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self._loop)
+    def _least_loaded(self) -> MCPClient:
+        """Retourne le client ayant le moins de requêtes en vol"""
+        return min(self.clients, key=lambda client: client._in_flight)
     
-    def connect(self):
-        """
-        Se connecte au serveur MCP (synchrone)
-        """
-        self._ensure_loop()
-        
-        if self._loop and self._loop.is_running():
-            # Si une boucle est en cours, utilise asyncio.create_task
-            future = asyncio.create_task(self._connect_async())
-            # Attend la fin de la tâche
-            while not future.done():
-                pass
-            if future.exception():
-                raise future.exception()
-        else:
-            # Sinon, exécute directement
-            if self._loop:
-                self._loop.run_until_complete(self._connect_async())
+    async def connect(self):
+        """Ouvre toutes les connexions du pool"""
+        await asyncio.gather(*(client.connect() for client in self.clients))
     
-    async def _connect_async(self):
-        """
-        Connexion asynchrone
-        """
-        self.client = MCPClient(self.server_url)
-        await self.client.connect()
+    async def disconnect(self):
+        """Ferme toutes les connexions du pool"""
+        await asyncio.gather(*(client.disconnect() for client in self.clients))
     
-    def disconnect(self):
+    async def list_tools(self) -> Tuple[ToolDesc, ...]:
+        """Liste tous les outils disponibles"""
+        return await self.clients[0].list_tools()
+    
+    async def call_tool(self, tool_name: str, arguments: Dict) -> Any:
+        """Appelle un outil sur la connexion la moins chargée"""
+        return await self._least_loaded().call_tool(tool_name, arguments)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[Any]:
+        """Appelle plusieurs outils en une requête batch sur la connexion la moins chargée"""
+        return await self._least_loaded().call_tools_batch(calls)
+    
+    async def __aenter__(self):
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+
+class SyncMCPClient:
+    """
+    Client MCP synchrone : délègue à un MCPClient exécuté sur une boucle
+    d'événements dédiée, dans un thread d'arrière-plan
+    """
+    
+    def __init__(self, server_url: str = "ws://localhost:8001", timeout: Optional[float] = 30.0,
+                 pool_size: int = 1, **client_options):
         """
-        Se déconnecte du serveur MCP (synchrone)
+        Initialise le client; la boucle d'événements dédiée est démarrée par connect()
+        
+        Args:
+            server_url: URL du serveur MCP
+            timeout: Délai maximal d'attente d'un appel, en secondes
+            pool_size: Nombre de connexions au serveur (1 par défaut)
+            **client_options: Options transmises à MCPClient (flush_interval, transport)
         """
-        if self.client:
-            if self._loop and self._loop.is_running():
-                future = asyncio.create_task(self.client.disconnect())
-                while not future.done():
-                    pass
-            else:
-                if self._loop:
-                    self._loop.run_until_complete(self.client.disconnect())
+        self.server_url = server_url
+        self.timeout = timeout
+        if pool_size > 1:
+            self.client = MCPClientPool(server_url, pool_size, **client_options)
+        else:
+            self.client = MCPClient(server_url, **client_options)
+        self._loop = None
+        self._thread = None
     
-    def list_tools(self) -> List[Dict]:
+    def _ensure_loop(self):
         """
-        Liste tous les outils disponibles (synchrone)
-        
-        Returns:
-            List[Dict]: Liste des outils
+        S'assure qu'une boucle d'événements dédiée tourne dans un thread d'arrière-plan
         """
-        if not self.client:
-            raise Exception("Client MCP non connecté")
+        if self._loop is not None and self._loop.is_running():
+            return
         
-        if self._loop and self._loop.is_running():
-            future = asyncio.create_task(self.client.list_tools())
-            while not future.done():
-                pass
-            if future.exception():
-                raise future.exception()
-            return future.result()
-        else:
-            if self._loop:
-                return self._loop.run_until_complete(self.client.list_tools())
-            return []
+        # uvloop (Linux/macOS) si disponible, sinon boucle asyncio standard
+        try:
+            import uvloop
+            self._loop = uvloop.new_event_loop()
+        except ImportError:
+            self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-client-loop", daemon=True)
+        self._thread.start()
     
-    def call_tool(self, tool_name: str, arguments: Dict) -> Any:
+    def _run(self, coro) -> Any:
         """
-        Appelle un outil spécifique (synchrone)
+        Exécute une coroutine sur la boucle dédiée et attend son résultat
         
         Args:
-            tool_name: Nom de l'outil
-            arguments: Arguments de l'outil
+            coro: Coroutine à exécuter
         
         Returns:
-            Any: Résultat de l'appel
-        """
-        if not self.client:
-            raise Exception("Client MCP non connecté")
+            Any: Résultat de la coroutine
         
-        if self._loop and self._loop.is_running():
-            future = asyncio.create_task(
-                self.client.call_tool(tool_name, arguments)
-            )
-            while not future.done():
-                pass
-            if future.exception():
-                raise future.exception()
-            return future.result()
-        else:
-            if self._loop:
-                return self._loop.run_until_complete(
-                    self.client.call_tool(tool_name, arguments)
-                )
-            return None
+        Raises:
+            RuntimeError: Client non connecté, ou appelé depuis sa propre boucle
+            concurrent.futures.TimeoutError: Délai dépassé (la coroutine est annulée)
+        """
+        if self._loop is None:
+            coro.close()
+            raise RuntimeError("Le client MCP synchrone n'est pas connecté; appelez connect()")
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Le client MCP synchrone ne peut pas être appelé depuis sa propre boucle; "
+                               "utilisez MCPClient directement")
+        
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Sans annulation, la coroutine continuerait de tourner sur la boucle
+            future.cancel()
+            raise
+    
+    def connect(self):
+        """Démarre la boucle dédiée et se connecte au serveur MCP (la boucle est arrêtée en cas d'échec)"""
+        self._ensure_loop()
+        try:
+            self._run(self.client.connect())
+        except BaseException:
+            self.close()
+            raise
+    
+    def disconnect(self):
+        """Se déconnecte du serveur MCP et arrête la boucle dédiée"""
+        if not self._loop:
+            return
+        
+        try:
+            self._run(self.client.disconnect())
+        finally:
+            self.close()
+    
+    def close(self):
+        """Arrête la boucle dédiée et attend la fin de son thread"""
+        if self._loop is None:
+            return
+        
+        loop, thread = self._loop, self._thread
+        self._loop = None
+        self._thread = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    
+    def list_tools(self) -> Tuple[ToolDesc, ...]:
+        """Liste tous les outils disponibles"""
+        return self._run(self.client.list_tools())
+    
+    def call_tool(self, tool_name: str, arguments: Dict) -> Any:
+        """Appelle un outil spécifique"""
+        return self._run(self.client.call_tool(tool_name, arguments))
+    
+    def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[Any]:
+        """Appelle plusieurs outils en une seule requête batch"""
+        return self._run(self.client.call_tools_batch(calls))
+
+
+# Ancien nom, conservé pour la compatibilité
+MCPToolInterface = SyncMCPClient
 
 
 # Fonction utilitaire pour créer une interface MCP
-def create_mcp_interface(server_url: str = "ws://localhost:8001") -> MCPToolInterface:
+def create_mcp_interface(server_url: str = "ws://localhost:8001") -> SyncMCPClient:
     """
     Crée une interface MCP
     
@@ -319,9 +722,9 @@ def create_mcp_interface(server_url: str = "ws://localhost:8001") -> MCPToolInte
         server_url: URL du serveur MCP
     
     Returns:
-        MCPToolInterface: Interface MCP
+        SyncMCPClient: Client MCP synchrone
     """
-    return MCPToolInterface(server_url)
+    return SyncMCPClient(server_url)
 
 
 if __name__ == "__main__":
@@ -333,7 +736,7 @@ if __name__ == "__main__":
             print(f"Outils disponibles: {len(tools)}")
             
             for tool in tools:
-                print(f"- {tool['name']}: {tool['description']}")
+                print(f"- {tool.name}: {tool.description}")
             
             # Test d'appel d'outil
             try:
@@ -5,17 +5,25 @@ avec des agents externes
 """
 
 import asyncio
+import concurrent.futures
+import functools
 import json
 import logging
-import uuid
-from typing import Dict, List, Any, Optional
+import os
+import sys
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+import fastjsonschema
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
 from datetime import datetime
 
 # Import des outils existants
 from src.mcp.tools import (
-    create_order_tool, check_stock_tool, process_payment_tool,
+    create_order_tool, check_stock_tool, check_stock_batch_tool, process_payment_tool,
     update_order_status_tool, get_product_details_tool,
     get_client_details_tool, validate_order_tool, recommend_products_tool,
+    recommend_products_batch_tool,
     get_order_history_tool, add_client_tool, list_clients_tool,
     introspect_ontology_tool, extend_ontology_tool, create_instance_tool,
     query_ontology_tool, get_all_orders_tool, add_behavior_class_tool,
@@ -26,17 +34,159 @@ from src.mcp.tools import (
 from src.core.knowledge_base import KnowledgeBase
 from src.rag.vector_store import VectorStore
 
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+    
+    def _canonical_json(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def _json_dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:  # type: ignore[misc]
+        return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
+    
+    def _canonical_json(obj: Any) -> bytes:
+        return json.dumps(obj, sort_keys=True).encode("utf-8")
+    
+    _json_loads = json.loads  # type: ignore[assignment]
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Id d'une requête JSON-RPC (null pour les notifications et les erreurs de parsing)
+RequestId = Union[str, int, None]
+
+# Réponse MCP : dictionnaire, ou trame déjà sérialisée
+MCPResponse = Union[bytes, Dict[str, Any]]
+
+# Handler d'une méthode JSON-RPC : handler(request_id, params)
+MethodHandler = Callable[[RequestId, Dict[str, Any]], Awaitable[MCPResponse]]
+
+# Fragments de schéma partagés entre les outils (jamais modifiés)
+_STRING = {"type": "string"}
+_INTEGER = {"type": "integer"}
+_ARRAY = {"type": "array"}
+_NO_PARAMETERS = {"type": "object", "properties": {}}
+_PRODUCT_ID = {"type": "string", "description": "ID du produit"}
+_ORDER_ID = {"type": "string", "description": "ID de la commande"}
+_CLASS_NAME = {"type": "string", "description": "Nom de la classe"}
+_OPTIONAL_INSTANCE_ID = {"type": "string", "description": "ID de l'instance (optionnel)"}
+_METHOD_NAME = {"type": "string", "description": "Nom de la méthode"}
+
+# Pool de threads des outils synchrones, partagé par tous les serveurs MCP du processus
+# (taille réglable par la variable d'environnement MCP_WORKERS)
+_GLOBAL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get("MCP_WORKERS", (os.cpu_count() or 1) * 4)),
+    thread_name_prefix="mcp-tool"
+)
+
+# Domaines de la base de connaissances dont la version invalide les résultats mis en cache
+VERSION_TAGS = ("ontology", "products", "orders", "clients")
+
+# Nombre maximal de résultats d'outils en lecture conservés en cache
+RESULT_CACHE_SIZE = 1024
+
+# Options du serveur websocket :
+# - pas de permessage-deflate : les messages JSON-RPC sont petits, la compression coûte plus qu'elle ne rapporte
+# - file de réception bornée pour exercer une contre-pression sur les clients trop bavards
+SERVE_OPTIONS: Dict[str, Any] = {
+    "compression": None,
+    "max_size": 2 ** 20,
+    "max_queue": 64,
+    "ping_interval": 20,
+    "ping_timeout": 20,
+}
+
+# Réponses pré-sérialisées : seul l'id (et le détail d'une erreur) change d'une requête à l'autre
+_INIT_TEMPLATE = (
+    b'{"jsonrpc":"2.0","id":%s,"result":{"protocolVersion":"2024-11-05",'
+    b'"capabilities":{"tools":{}},'
+    b'"serverInfo":{"name":"CognitiveOrderAgent MCP Server","version":"1.0.0"}}}'
+)
+
+
+def _error_template(message: str, code: int) -> bytes:
+    """Gabarit de réponse d'erreur JSON-RPC dont l'id et le détail sont substitués par %s"""
+    return b'{"jsonrpc":"2.0","id":%%s,"error":{"code":%d,"message":%s,"data":%%s}}' % (
+        code, _json_dumps(message).replace(b"%", b"%%")
+    )
+
+
+# Code JSON-RPC de chaque message d'erreur (-32603, erreur interne, pour un message inconnu)
+_JSONRPC_CODES = {
+    "Parse error": -32700,
+    "Invalid Request": -32600,
+    "Method not found": -32601,
+    "Invalid params": -32602,
+    "Internal error": -32603,
+    "Tool execution error": -32603,
+    "Tool not found": -32601,
+}
+
+_ERROR_TEMPLATES = {message: _error_template(message, code) for message, code in _JSONRPC_CODES.items()}
+
+_TOOLS_LIST_PREFIX = b'{"jsonrpc":"2.0","id":'
+
+_PARSE_ERROR = _ERROR_TEMPLATES["Parse error"] % (b"null", b'"Invalid JSON"')
+
+
+def _json_default(obj: Any) -> Any:
+    """Sérialise les enregistrements des outils (as_dict) ; les autres valeurs passent par str()"""
+    as_dict = getattr(obj, "as_dict", None)
+    return as_dict() if as_dict is not None else str(obj)
+
+
+def _result_text(result: Any) -> str:
+    """
+    Texte renvoyé au client pour le résultat d'un outil
+    
+    Les structures (dict, list, tuple) sont émises en JSON, directement exploitable par l'hôte LLM,
+    plutôt qu'avec leur repr Python ; les valeurs simples restent converties par str().
+    
+    Args:
+        result: Résultat de l'outil
+    
+    Returns:
+        str: Texte du résultat
+    """
+    if isinstance(result, (dict, list, tuple)):
+        try:
+            return _json_dumps(result, default=_json_default).decode("utf-8")
+        except TypeError:
+            # Clés non sérialisables (ex. tuples) : repli sur la représentation Python
+            pass
+    return str(result)
+
+
+def _serialize_response(response: Union[MCPResponse, List[MCPResponse]]) -> bytes:
+    """
+    Sérialise une réponse MCP (ou un lot de réponses)
+    
+    Args:
+        response: Réponse déjà sérialisée, dictionnaire ou liste de réponses
+    
+    Returns:
+        bytes: Réponse JSON encodée en UTF-8
+    """
+    if isinstance(response, bytes):
+        return response
+    if isinstance(response, list):
+        return b"[" + b",".join(map(_serialize_response, response)) + b"]"
+    return _json_dumps(response)
+
 
 class MCPServer:
     """
     Serveur MCP qui expose les outils via le protocole MCP
     """
     
-    def __init__(self, knowledge_base: KnowledgeBase, vector_store: VectorStore):
+    __slots__ = (
+        "kb", "vector_store", "clients", "tool_registry", "_method_table", "_pending_calls",
+        "_kb_lock", "_version", "_result_cache", "_tools_list_suffix"
+    )
+    
+    def __init__(self, knowledge_base: KnowledgeBase, vector_store: VectorStore) -> None:
         """
         Initialise le serveur MCP
         
@@ -46,38 +196,69 @@ class MCPServer:
         """
         self.kb = knowledge_base
         self.vector_store = vector_store
-        self.clients = {}
+        # Connexions ouvertes : elles disparaissent d'elles-mêmes une fois fermées et libérées
+        self.clients: "weakref.WeakSet[Any]" = weakref.WeakSet()
         self.tool_registry = self._register_tools()
         
-    def _register_tools(self) -> Dict[str, Dict]:
+        # Méthodes JSON-RPC prises en charge : handler(request_id, params)
+        self._method_table: Dict[str, MethodHandler] = {
+            "tools/list": self._handle_list_tools,
+            "tools/call": self._handle_call_tool,
+            "initialize": self._handle_initialize,
+        }
+        
+        # Les outils sont synchrones : ils s'exécutent dans le pool partagé pour ne pas bloquer les autres
+        # clients. Le graphe rdflib n'étant pas thread-safe, les outils qui touchent la base de
+        # connaissances passent un par un (verrou asyncio, la boucle reste libre pendant l'attente).
+        self._pending_calls: Set[concurrent.futures.Future] = set()
+        self._kb_lock = asyncio.Lock()
+        
+        # Résultats des outils en lecture (LRU), indexés par (outil, version du domaine, arguments canoniques)
+        self._version: Dict[str, int] = dict.fromkeys(VERSION_TAGS, 0)
+        self._result_cache: "OrderedDict[Tuple[str, int, bytes], Any]" = OrderedDict()
+        
+        # Le registre ne change plus après l'initialisation : la réponse à tools/list est sérialisée une fois,
+        # seul l'id est inséré entre _TOOLS_LIST_PREFIX et ce suffixe
+        tools = [
+            {
+                "name": tool_info["name"],
+                "description": tool_info["description"],
+                "inputSchema": tool_info["parameters"]
+            }
+            for tool_info in self.tool_registry.values()
+        ]
+        self._tools_list_suffix = b',"result":{"tools":' + _json_dumps(tools) + b'}}'
+        
+    def _register_tools(self) -> Mapping[str, Dict[str, Any]]:
         """
         Enregistre tous les outils disponibles
         
         Returns:
-            Dict: Registre des outils avec leurs métadonnées
+            Mapping: Registre des outils avec leurs métadonnées (lecture seule)
         """
-        return {
+        registry: Dict[str, Dict[str, Any]] = {
             "create_order": {
                 "name": "create_order",
                 "description": "Crée une nouvelle commande pour un client",
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "client_id": {"type": "string", "description": "ID du client"},
+                        "client_id": {"type": "string", "description": "ID du client", "default": "default_client"},
                         "items_list": {
                             "type": "array",
                             "items": {
                                 "type": "object",
                                 "properties": {
-                                    "product_id": {"type": "string"},
-                                    "quantity": {"type": "integer"}
+                                    "product_id": _STRING,
+                                    "quantity": _INTEGER
                                 }
-                            }
+                            },
+                            "default": []
                         }
-                    },
-                    "required": ["client_id", "items_list"]
+                    }
                 },
-                "function": create_order_tool
+                "function": create_order_tool,
+                "mutates": ("orders",)
             },
             "check_stock": {
                 "name": "check_stock",
@@ -85,12 +266,36 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "product_id": {"type": "string", "description": "ID du produit"},
+                        "product_id": _PRODUCT_ID,
                         "quantity": {"type": "integer", "description": "Quantité demandée"}
                     },
                     "required": ["product_id", "quantity"]
                 },
-                "function": check_stock_tool
+                "function": check_stock_tool,
+                "mutates": ("products",)
+            },
+            "check_stock_batch": {
+                "name": "check_stock_batch",
+                "description": "Vérifie et réserve en une fois le stock de tous les articles d'une commande",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "items_list": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "product_id": _STRING,
+                                    "quantity": _INTEGER
+                                },
+                                "required": ["product_id", "quantity"]
+                            }
+                        }
+                    },
+                    "required": ["items_list"]
+                },
+                "function": check_stock_batch_tool,
+                "mutates": ("products",)
             },
             "process_payment": {
                 "name": "process_payment",
@@ -98,12 +303,13 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "order_id": {"type": "string", "description": "ID de la commande"},
+                        "order_id": _ORDER_ID,
                         "amount": {"type": "number", "description": "Montant à payer"}
                     },
                     "required": ["order_id", "amount"]
                 },
-                "function": process_payment_tool
+                "function": process_payment_tool,
+                "mutates": ("orders",)
             },
             "validate_order": {
                 "name": "validate_order",
@@ -111,11 +317,12 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "order_id": {"type": "string", "description": "ID de la commande"}
+                        "order_id": _ORDER_ID
                     },
                     "required": ["order_id"]
                 },
-                "function": validate_order_tool
+                "function": validate_order_tool,
+                "mutates": ("orders",)
             },
             "get_product_details": {
                 "name": "get_product_details",
@@ -123,11 +330,13 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "product_id": {"type": "string", "description": "ID du produit"}
+                        "product_id": _PRODUCT_ID
                     },
                     "required": ["product_id"]
                 },
-                "function": get_product_details_tool
+                "function": get_product_details_tool,
+                "cacheable": True,
+                "version_tag": "products"
             },
             "get_client_details": {
                 "name": "get_client_details",
@@ -139,7 +348,9 @@ class MCPServer:
                     },
                     "required": ["client_id"]
                 },
-                "function": get_client_details_tool
+                "function": get_client_details_tool,
+                "cacheable": True,
+                "version_tag": "clients"
             },
             "recommend_products": {
                 "name": "recommend_products",
@@ -152,7 +363,30 @@ class MCPServer:
                     },
                     "required": ["query_text"]
                 },
-                "function": recommend_products_tool
+                "function": recommend_products_tool,
+                "needs_vs": True,
+                "cacheable": True,
+                "version_tag": "products"
+            },
+            "recommend_products_batch": {
+                "name": "recommend_products_batch",
+                "description": "Recommande des produits pour plusieurs requêtes en un seul appel",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "query_texts": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Requêtes de recherche"
+                        },
+                        "top_k": {"type": "integer", "description": "Nombre de recommandations par requête", "default": 3}
+                    },
+                    "required": ["query_texts"]
+                },
+                "function": recommend_products_batch_tool,
+                "needs_vs": True,
+                "cacheable": True,
+                "version_tag": "products"
             },
             "add_client": {
                 "name": "add_client",
@@ -165,25 +399,24 @@ class MCPServer:
                     },
                     "required": ["name", "email"]
                 },
-                "function": add_client_tool
+                "function": add_client_tool,
+                "mutates": ("clients", "ontology")
             },
             "list_clients": {
                 "name": "list_clients",
                 "description": "Liste tous les clients",
-                "parameters": {
-                    "type": "object",
-                    "properties": {}
-                },
-                "function": list_clients_tool
+                "parameters": _NO_PARAMETERS,
+                "function": list_clients_tool,
+                "cacheable": True,
+                "version_tag": "clients"
             },
             "introspect_ontology": {
                 "name": "introspect_ontology",
                 "description": "Analyse la structure de l'ontologie",
-                "parameters": {
-                    "type": "object",
-                    "properties": {}
-                },
-                "function": introspect_ontology_tool
+                "parameters": _NO_PARAMETERS,
+                "function": introspect_ontology_tool,
+                "cacheable": True,
+                "version_tag": "ontology"
             },
             "extend_ontology": {
                 "name": "extend_ontology",
@@ -191,22 +424,23 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
+                        "class_name": {"type": "string", "description": "Nom de la classe", "default": "NewClass"},
                         "properties": {
                             "type": "array",
                             "items": {
                                 "type": "object",
                                 "properties": {
-                                    "name": {"type": "string"},
-                                    "type": {"type": "string"}
+                                    "name": _STRING,
+                                    "type": _STRING
                                 }
-                            }
+                            },
+                            "default": []
                         },
                         "namespace": {"type": "string", "description": "Namespace (optionnel)"}
-                    },
-                    "required": ["class_name", "properties"]
+                    }
                 },
-                "function": extend_ontology_tool
+                "function": extend_ontology_tool,
+                "mutates": ("ontology",)
             },
             "create_instance": {
                 "name": "create_instance",
@@ -214,13 +448,13 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
-                        "properties": {"type": "object", "description": "Propriétés de l'instance"},
-                        "instance_id": {"type": "string", "description": "ID de l'instance (optionnel)"}
-                    },
-                    "required": ["class_name", "properties"]
+                        "class_name": {"type": "string", "description": "Nom de la classe", "default": "DefaultClass"},
+                        "properties": {"type": "object", "description": "Propriétés de l'instance", "default": {}},
+                        "instance_id": _OPTIONAL_INSTANCE_ID
+                    }
                 },
-                "function": create_instance_tool
+                "function": create_instance_tool,
+                "mutates": VERSION_TAGS
             },
             "query_ontology": {
                 "name": "query_ontology",
@@ -238,11 +472,10 @@ class MCPServer:
             "get_all_orders": {
                 "name": "get_all_orders",
                 "description": "Récupère toutes les commandes",
-                "parameters": {
-                    "type": "object",
-                    "properties": {}
-                },
-                "function": get_all_orders_tool
+                "parameters": _NO_PARAMETERS,
+                "function": get_all_orders_tool,
+                "cacheable": True,
+                "version_tag": "orders"
             },
             "add_behavior_class": {
                 "name": "add_behavior_class",
@@ -250,22 +483,23 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
+                        "class_name": {"type": "string", "description": "Nom de la classe", "default": "DefaultBehavior"},
                         "methods": {
                             "type": "array",
                             "items": {
                                 "type": "object",
                                 "properties": {
-                                    "name": {"type": "string"},
-                                    "parameters": {"type": "array"},
-                                    "body": {"type": "string"}
+                                    "name": _STRING,
+                                    "parameters": _ARRAY,
+                                    "body": _STRING
                                 }
-                            }
+                            },
+                            "default": []
                         }
-                    },
-                    "required": ["class_name", "methods"]
+                    }
                 },
-                "function": add_behavior_class_tool
+                "function": add_behavior_class_tool,
+                "mutates": ("ontology",)
             },
             "add_state_machine": {
                 "name": "add_state_machine",
@@ -273,23 +507,24 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
-                        "states": {"type": "array", "items": {"type": "string"}},
+                        "class_name": {"type": "string", "description": "Nom de la classe", "default": "DefaultClass"},
+                        "states": {"type": "array", "items": _STRING, "default": ["initial", "final"]},
                         "transitions": {
                             "type": "array",
                             "items": {
                                 "type": "object",
                                 "properties": {
-                                    "from_state": {"type": "string"},
-                                    "to_state": {"type": "string"},
-                                    "condition": {"type": "string"}
+                                    "from_state": _STRING,
+                                    "to_state": _STRING,
+                                    "condition": _STRING
                                 }
-                            }
+                            },
+                            "default": []
                         }
-                    },
-                    "required": ["class_name", "states", "transitions"]
+                    }
                 },
-                "function": add_state_machine_tool
+                "function": add_state_machine_tool,
+                "mutates": ("ontology",)
             },
             "execute_behavior": {
                 "name": "execute_behavior",
@@ -298,12 +533,13 @@ class MCPServer:
                     "type": "object",
                     "properties": {
                         "instance_id": {"type": "string", "description": "ID de l'instance"},
-                        "method_name": {"type": "string", "description": "Nom de la méthode"},
+                        "method_name": _METHOD_NAME,
                         "parameters": {"type": "object", "description": "Paramètres de la méthode"}
                     },
                     "required": ["instance_id", "method_name"]
                 },
-                "function": execute_behavior_tool
+                "function": execute_behavior_tool,
+                "mutates": VERSION_TAGS
             },
             "create_semantic_proxy": {
                 "name": "create_semantic_proxy",
@@ -311,8 +547,8 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
-                        "instance_id": {"type": "string", "description": "ID de l'instance (optionnel)"}
+                        "class_name": _CLASS_NAME,
+                        "instance_id": _OPTIONAL_INSTANCE_ID
                     },
                     "required": ["class_name"]
                 },
@@ -325,12 +561,13 @@ class MCPServer:
                     "type": "object",
                     "properties": {
                         "proxy_id": {"type": "string", "description": "ID du proxy"},
-                        "method_name": {"type": "string", "description": "Nom de la méthode"},
+                        "method_name": _METHOD_NAME,
                         "parameters": {"type": "object", "description": "Paramètres"}
                     },
                     "required": ["proxy_id", "method_name"]
                 },
-                "function": execute_method_reflection_tool
+                "function": execute_method_reflection_tool,
+                "mutates": VERSION_TAGS
             },
             "reflect_class": {
                 "name": "reflect_class",
@@ -338,11 +575,13 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"}
+                        "class_name": _CLASS_NAME
                     },
                     "required": ["class_name"]
                 },
-                "function": reflect_class_tool
+                "function": reflect_class_tool,
+                "cacheable": True,
+                "version_tag": "ontology"
             },
             "instantiate_by_reflection": {
                 "name": "instantiate_by_reflection",
@@ -350,12 +589,13 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"},
+                        "class_name": _CLASS_NAME,
                         "properties": {"type": "object", "description": "Propriétés"}
                     },
                     "required": ["class_name", "properties"]
                 },
-                "function": instantiate_by_reflection_tool
+                "function": instantiate_by_reflection_tool,
+                "mutates": VERSION_TAGS
             },
             "list_proxy_methods": {
                 "name": "list_proxy_methods",
@@ -363,15 +603,65 @@ class MCPServer:
                 "parameters": {
                     "type": "object",
                     "properties": {
-                        "class_name": {"type": "string", "description": "Nom de la classe"}
+                        "class_name": _CLASS_NAME
                     },
                     "required": ["class_name"]
                 },
-                "function": list_proxy_methods_tool
+                "function": list_proxy_methods_tool,
+                "cacheable": True,
+                "version_tag": "ontology"
+            },
+            "batch_execute": {
+                "name": "batch_execute",
+                "description": "Exécute plusieurs appels d'outils en une seule requête",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "invocations": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "name": {"type": "string", "description": "Nom de l'outil"},
+                                    "arguments": {"type": "object", "description": "Arguments de l'outil", "default": {}}
+                                },
+                                "required": ["name"]
+                            }
+                        },
+                        "maxConcurrent": {"type": "integer", "minimum": 1, "description": "Appels simultanés maximum", "default": 5},
+                        "stopOnError": {"type": "boolean", "description": "Interrompt le lot à la première erreur", "default": False}
+                    },
+                    "required": ["invocations"]
+                },
+                "function": self._batch_execute,
+                "async": True,
+                "needs_kb": False
             }
         }
+        
+        # Les schémas sont compilés une seule fois : valider une requête revient à appeler une fonction
+        for tool_info in registry.values():
+            # Noms internés : la recherche d'un outil par nom compare d'abord les identités
+            tool_info["name"] = sys.intern(tool_info["name"])
+            tool_info["validator"] = fastjsonschema.compile(tool_info["parameters"])
+            # Dépendances injectées à l'appel : base de connaissances par défaut, base vectorielle sur demande
+            tool_info.setdefault("needs_kb", True)
+            tool_info.setdefault("needs_vs", False)
+            deps: Dict[str, Any] = {}
+            if tool_info["needs_kb"]:
+                deps["knowledge_base"] = self.kb
+            if tool_info["needs_vs"]:
+                deps["vector_store"] = self.vector_store
+            tool_info["deps"] = MappingProxyType(deps)
+            # Outil coroutine : attendu directement sur la boucle plutôt que confié au pool de threads
+            tool_info.setdefault("async", False)
+            # Cache des résultats : outils en lecture seule, invalidés par les outils qui modifient leur domaine
+            tool_info.setdefault("cacheable", False)
+            tool_info.setdefault("mutates", ())
+        
+        return MappingProxyType({tool_info["name"]: tool_info for tool_info in registry.values()})
     
-    async def handle_mcp_request(self, request: Dict) -> Dict:
+    async def handle_mcp_request(self, request: Dict[str, Any]) -> MCPResponse:
         """
         Gère une requête MCP
         
@@ -379,29 +669,25 @@ class MCPServer:
             request: Requête MCP
         
         Returns:
-            Dict: Réponse MCP
+            MCPResponse: Réponse MCP, éventuellement déjà sérialisée
         """
         try:
-            method = request.get("method")
+            method: str = request.get("method", "")
             params = request.get("params", {})
             request_id = request.get("id")
             
-            logger.info(f"Requête MCP reçue: {method}")
+            logger.info("Requête MCP reçue: %s", method)
             
-            if method == "tools/list":
-                return self._handle_list_tools(request_id)
-            elif method == "tools/call":
-                return await self._handle_call_tool(request_id, params)
-            elif method == "initialize":
-                return self._handle_initialize(request_id, params)
-            else:
+            handler = self._method_table.get(method)
+            if handler is None:
                 return self._create_error_response(request_id, "Method not found", f"Unknown method: {method}")
-                
+            return await handler(request_id, params)
+            
         except Exception as e:
-            logger.error(f"Erreur lors du traitement de la requête MCP: {e}")
+            logger.error("Erreur lors du traitement de la requête MCP: %s", e)
             return self._create_error_response(request.get("id"), "Internal error", str(e))
     
-    def _handle_initialize(self, request_id: str, params: Dict) -> Dict:
+    async def _handle_initialize(self, request_id: RequestId, params: Dict[str, Any]) -> bytes:
         """
         Gère l'initialisation du client MCP
         
@@ -410,50 +696,24 @@ class MCPServer:
             params: Paramètres d'initialisation
         
         Returns:
-            Dict: Réponse d'initialisation
-        """
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "serverInfo": {
-                    "name": "CognitiveOrderAgent MCP Server",
-                    "version": "1.0.0"
-                }
-            }
-        }
+            bytes: Réponse d'initialisation sérialisée
+        """
+        return _INIT_TEMPLATE % _json_dumps(request_id)
     
-    def _handle_list_tools(self, request_id: str) -> Dict:
+    async def _handle_list_tools(self, request_id: RequestId, params: Dict[str, Any]) -> bytes:
         """
         Liste tous les outils disponibles
         
         Args:
             request_id: ID de la requête
+            params: Paramètres de la requête (inutilisés)
         
         Returns:
-            Dict: Liste des outils
+            bytes: Liste des outils, sérialisée
         """
-        tools = []
-        for tool_id, tool_info in self.tool_registry.items():
-            tools.append({
-                "name": tool_info["name"],
-                "description": tool_info["description"],
-                "inputSchema": tool_info["parameters"]
-            })
-        
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": {
-                "tools": tools
-            }
-        }
+        return _TOOLS_LIST_PREFIX + _json_dumps(request_id) + self._tools_list_suffix
     
-    async def _handle_call_tool(self, request_id: str, params: Dict) -> Dict:
+    async def _handle_call_tool(self, request_id: RequestId, params: Dict[str, Any]) -> MCPResponse:
         """
         Appelle un outil spécifique
         
@@ -462,52 +722,23 @@ class MCPServer:
             params: Paramètres de l'appel
         
         Returns:
-            Dict: Résultat de l'appel
+            MCPResponse: Résultat de l'appel, ou erreur sérialisée
         """
-        tool_name = params.get("name")
-        arguments = params.get("arguments", {})
+        tool_name: str = params.get("name", "")
+        arguments: Dict[str, Any] = params.get("arguments", {})
         
-        if tool_name not in self.tool_registry:
+        tool_info = self.tool_registry.get(tool_name)
+        if tool_info is None:
             return self._create_error_response(request_id, "Tool not found", f"Tool {tool_name} not found")
         
+        # Validation des arguments par le schéma compilé (les valeurs "default" sont complétées)
         try:
-            tool_info = self.tool_registry[tool_name]
-            tool_function = tool_info["function"]
-            
-            # Ajoute les dépendances nécessaires aux arguments
-            if tool_name in ["create_order", "check_stock", "process_payment", "update_order_status", 
-                           "get_product_details", "get_client_details", "validate_order", 
-                           "get_order_history", "add_client", "list_clients", "introspect_ontology",
-                           "extend_ontology", "create_instance", "query_ontology", "get_all_orders",
-                           "add_behavior_class", "add_state_machine", "execute_behavior",
-                           "create_semantic_proxy", "execute_method_reflection", "reflect_class",
-                           "instantiate_by_reflection", "list_proxy_methods"]:
-                arguments["knowledge_base"] = self.kb
-            
-            if tool_name in ["recommend_products"]:
-                arguments["knowledge_base"] = self.kb
-                arguments["vector_store"] = self.vector_store
-            
-            # Ajoute des valeurs par défaut pour les outils qui en ont besoin
-            if tool_name == "add_state_machine":
-                arguments.setdefault("class_name", "DefaultClass")
-                arguments.setdefault("states", ["initial", "final"])
-                arguments.setdefault("transitions", [])
-            elif tool_name == "create_order":
-                arguments.setdefault("client_id", "default_client")
-                arguments.setdefault("items_list", [])
-            elif tool_name == "add_behavior_class":
-                arguments.setdefault("class_name", "DefaultBehavior")
-                arguments.setdefault("methods", [])
-            elif tool_name == "create_instance":
-                arguments.setdefault("class_name", "DefaultClass")
-                arguments.setdefault("properties", {})
-            elif tool_name == "extend_ontology":
-                arguments.setdefault("class_name", "NewClass")
-                arguments.setdefault("properties", [])
-            
-            # Exécute l'outil
-            result = tool_function(**arguments)
+            arguments = tool_info["validator"](arguments)
+        except fastjsonschema.JsonSchemaException as e:
+            return self._create_error_response(request_id, "Invalid params", e.message)
+        
+        try:
+            result = await self._run_tool(tool_info, arguments)
             
             return {
                 "jsonrpc": "2.0",
@@ -516,17 +747,172 @@ class MCPServer:
                     "content": [
                         {
                             "type": "text",
-                            "text": str(result)
+                            "text": _result_text(result)
                         }
                     ]
                 }
             }
             
         except Exception as e:
-            logger.error(f"Erreur lors de l'exécution de l'outil {tool_name}: {e}")
+            logger.error("Erreur lors de l'exécution de l'outil %s: %s", tool_name, e)
             return self._create_error_response(request_id, "Tool execution error", str(e))
     
-    def _create_error_response(self, request_id: str, code: str, message: str) -> Dict:
+    async def _run_tool(self, tool_info: Dict[str, Any], arguments: Dict[str, Any]) -> Any:
+        """
+        Exécute un outil dont les arguments ont déjà été validés
+        
+        Les outils en lecture sont servis depuis le cache tant que la version de leur domaine
+        n'a pas changé ; les outils qui modifient la base incrémentent la version des domaines touchés.
+        
+        Args:
+            tool_info: Entrée du registre des outils
+            arguments: Arguments validés
+        
+        Returns:
+            Any: Résultat de l'outil
+        """
+        if not tool_info["cacheable"]:
+            try:
+                return await self._execute_tool(tool_info, arguments)
+            finally:
+                for tag in tool_info["mutates"]:
+                    self._version[tag] += 1
+        
+        cache_key = (tool_info["name"], self._version[tool_info["version_tag"]], _canonical_json(arguments))
+        if cache_key in self._result_cache:
+            self._result_cache.move_to_end(cache_key)
+            return self._result_cache[cache_key]
+        
+        result = await self._execute_tool(tool_info, arguments)
+        self._result_cache[cache_key] = result
+        if len(self._result_cache) > RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return result
+    
+    async def _execute_tool(self, tool_info: Dict[str, Any], arguments: Dict[str, Any]) -> Any:
+        """
+        Exécute un outil, sur la boucle ou dans le pool de threads
+        
+        Args:
+            tool_info: Entrée du registre des outils
+            arguments: Arguments validés
+        
+        Returns:
+            Any: Résultat de l'outil
+        """
+        tool_function = tool_info["function"]
+        
+        # Exécute l'outil, les dépendances étant passées à côté des arguments du client (non modifiés)
+        if tool_info["async"]:
+            return await tool_function(**arguments, **tool_info["deps"])
+        
+        call = functools.partial(tool_function, **arguments, **tool_info["deps"])
+        if tool_info["needs_kb"]:
+            async with self._kb_lock:
+                future = self._submit(call)
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # L'appel continue dans son thread : le verrou n'est rendu qu'à sa fin,
+                    # sans quoi un autre outil accéderait au graphe en même temps
+                    while not future.done():
+                        try:
+                            await asyncio.wait((future,))
+                        except asyncio.CancelledError:
+                            pass
+                    raise
+        return await self._submit(call)
+    
+    def _submit(self, call: Callable[[], Any]) -> "asyncio.Future[Any]":
+        """
+        Confie un appel synchrone au pool de threads partagé
+        
+        Args:
+            call: Appel sans argument
+        
+        Returns:
+            asyncio.Future: Résultat attendable depuis la boucle courante
+        """
+        future = _GLOBAL_EXECUTOR.submit(call)
+        self._pending_calls.add(future)
+        future.add_done_callback(self._pending_calls.discard)
+        return asyncio.wrap_future(future)
+    
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """
+        Attend la fin des appels d'outils encore en cours pour ce serveur
+        
+        Le pool de threads étant partagé, il n'est pas arrêté. L'appel est idempotent ;
+        il est bloquant et se fait donc une fois la boucle d'événements arrêtée.
+        
+        Args:
+            timeout: Délai maximal d'attente en secondes (None : sans limite)
+        """
+        concurrent.futures.wait(list(self._pending_calls), timeout=timeout)
+    
+    async def _dispatch_single(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """
+        Valide puis exécute un appel d'outil
+        
+        Args:
+            tool_name: Nom de l'outil
+            arguments: Arguments de l'outil
+        
+        Returns:
+            Any: Résultat de l'outil
+        """
+        tool_info = self.tool_registry.get(tool_name)
+        if tool_info is None:
+            raise ValueError(f"Tool {tool_name} not found")
+        return await self._run_tool(tool_info, tool_info["validator"](arguments))
+    
+    async def _batch_execute(self, invocations: List[Dict[str, Any]], maxConcurrent: int = 5,
+                             stopOnError: bool = False) -> List[Dict[str, Any]]:
+        """
+        Exécute un lot d'appels d'outils en parallèle (outil batch_execute)
+        
+        Args:
+            invocations: Appels à effectuer, chacun avec name et arguments
+            maxConcurrent: Nombre maximal d'appels simultanés
+            stopOnError: Si vrai, la première erreur fait échouer tout le lot
+        
+        Returns:
+            List[Dict]: Résultat ou erreur de chaque appel, dans l'ordre du lot
+        """
+        semaphore = asyncio.Semaphore(maxConcurrent)
+        
+        async def run_one(invocation: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self._dispatch_single(invocation["name"], invocation["arguments"])
+        
+        if stopOnError and invocations:
+            # À la première erreur, les appels restants (en attente du sémaphore ou en cours)
+            # sont annulés avant de propager l'erreur
+            tasks = [asyncio.ensure_future(run_one(invocation)) for invocation in invocations]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            for task in tasks:
+                error = None if task.cancelled() else task.exception()
+                if error is not None:
+                    raise error
+            results = [task.result() for task in tasks]
+        else:
+            results = await asyncio.gather(
+                *(run_one(invocation) for invocation in invocations),
+                return_exceptions=True
+            )
+        
+        return [
+            {"name": invocation["name"], "error": str(result)} if isinstance(result, Exception)
+            else {"name": invocation["name"], "result": result}
+            for invocation, result in zip(invocations, results)
+        ]
+    
+    def _create_error_response(self, request_id: RequestId, code: str, message: str) -> bytes:
         """
         Crée une réponse d'erreur MCP
         
@@ -536,17 +922,12 @@ class MCPServer:
             message: Message d'erreur
         
         Returns:
-            Dict: Réponse d'erreur
-        """
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "error": {
-                "code": -32601 if code == "Method not found" else -32603,
-                "message": code,
-                "data": message
-            }
-        }
+            bytes: Réponse d'erreur sérialisée
+        """
+        template = _ERROR_TEMPLATES.get(code)
+        if template is None:
+            template = _error_template(code, -32603)
+        return template % (_json_dumps(request_id), _json_dumps(message))
 
 
 class MCPServerManager:
@@ -554,7 +935,9 @@ class MCPServerManager:
     Gestionnaire du serveur MCP
     """
     
-    def __init__(self, knowledge_base: KnowledgeBase, vector_store: VectorStore):
+    __slots__ = ("mcp_server", "server_task")
+    
+    def __init__(self, knowledge_base: KnowledgeBase, vector_store: VectorStore) -> None:
         """
         Initialise le gestionnaire
         
@@ -563,9 +946,9 @@ class MCPServerManager:
             vector_store: Instance de la base vectorielle
         """
         self.mcp_server = MCPServer(knowledge_base, vector_store)
-        self.server_task = None
+        self.server_task: Optional[asyncio.Task] = None
     
-    async def start_server(self, host: str = "localhost", port: int = 8001):
+    async def start_server(self, host: str = "localhost", port: int = 8001) -> None:
         """
         Démarre le serveur MCP
         
@@ -577,47 +960,46 @@ class MCPServerManager:
             # Crée le serveur WebSocket
             import websockets
             
-            async def handle_websocket(websocket):
+            async def handle_websocket(websocket: Any) -> None:
                 """Gère les connexions WebSocket"""
-                client_id = str(uuid.uuid4())
-                self.mcp_server.clients[client_id] = websocket
+                client_id = id(websocket)
+                self.mcp_server.clients.add(websocket)
                 
-                logger.info(f"Client MCP connecté: {client_id}")
+                logger.info("Client MCP connecté: %s", client_id)
                 
                 try:
                     async for message in websocket:
                         try:
-                            request = json.loads(message)
-                            response = await self.mcp_server.handle_mcp_request(request)
-                            await websocket.send(json.dumps(response))
+                            request = _json_loads(message)
+                            response: Union[MCPResponse, List[MCPResponse]]
+                            if isinstance(request, list):
+                                # Batch JSON-RPC : une trame de réponses pour une trame de requêtes
+                                response = await asyncio.gather(
+                                    *(self.mcp_server.handle_mcp_request(item) for item in request)
+                                )
+                            else:
+                                response = await self.mcp_server.handle_mcp_request(request)
+                            payload = _serialize_response(response)
                         except json.JSONDecodeError:
-                            error_response = {
-                                "jsonrpc": "2.0",
-                                "id": None,
-                                "error": {
-                                    "code": -32700,
-                                    "message": "Parse error",
-                                    "data": "Invalid JSON"
-                                }
-                            }
-                            await websocket.send(json.dumps(error_response))
+                            # orjson.JSONDecodeError dérive de json.JSONDecodeError
+                            payload = _PARSE_ERROR
+                        
+                        # La réponse suit le format de la requête : trame binaire par défaut, texte si le client en envoie
+                        await websocket.send(payload if isinstance(message, bytes) else payload.decode("utf-8"))
                 except websockets.exceptions.ConnectionClosed:
-                    logger.info(f"Client MCP déconnecté: {client_id}")
-                finally:
-                    if client_id in self.mcp_server.clients:
-                        del self.mcp_server.clients[client_id]
+                    logger.info("Client MCP déconnecté: %s", client_id)
             
             # Démarre le serveur
-            server = await websockets.serve(handle_websocket, host, port)
-            logger.info(f"Serveur MCP démarré sur ws://{host}:{port}")
+            server = await websockets.serve(handle_websocket, host, port, **SERVE_OPTIONS)
+            logger.info("Serveur MCP démarré sur ws://%s:%d", host, port)
             
             # Garde le serveur en vie
             await server.wait_closed()
             
         except Exception as e:
-            logger.error(f"Erreur lors du démarrage du serveur MCP: {e}")
+            logger.error("Erreur lors du démarrage du serveur MCP: %s", e)
     
-    def stop_server(self):
+    def stop_server(self) -> None:
         """
         Arrête le serveur MCP
         """
@@ -628,7 +1010,7 @@ class MCPServerManager:
 
 # Fonction utilitaire pour démarrer le serveur MCP
 async def start_mcp_server(knowledge_base: KnowledgeBase, vector_store: VectorStore, 
-                          host: str = "localhost", port: int = 8001):
+                          host: str = "localhost", port: int = 8001) -> None:
     """
     Démarre le serveur MCP
     
@@ -642,16 +1024,66 @@ async def start_mcp_server(knowledge_base: KnowledgeBase, vector_store: VectorSt
     await manager.start_server(host, port)
 
 
+# Boucles d'événements utilisables par le serveur ("auto" : uvloop si disponible, sinon asyncio)
+IO_BACKENDS = ("auto", "uvloop", "asyncio")
+
+
+def new_event_loop(io_backend: str = "auto") -> asyncio.AbstractEventLoop:
+    """
+    Crée la boucle d'événements du serveur : uvloop (Linux/macOS) si disponible,
+    sinon la boucle asyncio standard (Windows notamment)
+    
+    Args:
+        io_backend: Boucle souhaitée, parmi IO_BACKENDS
+    
+    Returns:
+        asyncio.AbstractEventLoop: Nouvelle boucle d'événements
+    """
+    if io_backend not in IO_BACKENDS:
+        raise ValueError(f"Backend d'E/S inconnu: {io_backend}")
+    if io_backend == "asyncio":
+        return asyncio.new_event_loop()
+    
+    try:
+        import uvloop
+        return uvloop.new_event_loop()
+    except ImportError:
+        if io_backend == "uvloop":
+            raise
+        return asyncio.new_event_loop()
+
+
+def run_mcp_server(knowledge_base: KnowledgeBase, vector_store: VectorStore,
+                   host: str = "localhost", port: int = 8001, io_backend: str = "auto") -> None:
+    """
+    Démarre le serveur MCP sur une boucle dédiée (uvloop si disponible) et bloque jusqu'à son arrêt
+    
+    Seul le transport change d'un backend à l'autre : le traitement des requêtes
+    (handle_mcp_request) est identique.
+    
+    Args:
+        knowledge_base: Instance de la base de connaissances
+        vector_store: Instance de la base vectorielle
+        host: Adresse d'écoute
+        port: Port d'écoute
+        io_backend: Boucle d'événements, parmi IO_BACKENDS
+    """
+    manager = MCPServerManager(knowledge_base, vector_store)
+    loop = new_event_loop(io_backend)
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(manager.start_server(host, port))
+    finally:
+        manager.mcp_server.shutdown()
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
 if __name__ == "__main__":
     # Test du serveur MCP
-    import asyncio
-    
-    async def test_mcp_server():
-        # Crée des instances mock pour le test
-        kb = KnowledgeBase()
-        vs = VectorStore()
-        
-        # Démarre le serveur
-        await start_mcp_server(kb, vs)
+    # Crée des instances mock pour le test
+    kb = KnowledgeBase()
+    vs = VectorStore()
     
-    asyncio.run(test_mcp_server()) 
\ No newline at end of file
+    # Démarre le serveur
+    run_mcp_server(kb, vs) 
\ No newline at end of file
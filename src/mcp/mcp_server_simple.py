@@ -3,22 +3,111 @@ Serveur MCP simplifié pour éviter les problèmes de signature WebSocket
 """
 
 import asyncio
+import functools
+import gc
+import itertools
 import json
 import logging
-import uuid
-from typing import Dict
+import multiprocessing
+import re
+import socket
+from typing import Any, Dict, Optional, Union
 import websockets
 
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    
+    _json_loads = json.loads
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Début commun des réponses pré-sérialisées : l'id est inséré juste après, puis le suffixe propre à la réponse
+_RESPONSE_PREFIX = b'{"jsonrpc":"2.0","id":'
+
+# Valeur brute de l'id d'une trame (chaîne, nombre, booléen ou null), recopiée telle quelle dans la réponse
+_ID_PATTERN = re.compile(
+    rb'"id"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|null|true|false)'
+)
+
+# Erreurs du transport, sérialisées une fois : la trame d'erreur interne ne varie que par son message
+_PARSE_ERROR = _json_dumps({
+    "jsonrpc": "2.0",
+    "id": None,
+    "error": {"code": -32700, "message": "Parse error", "data": "Invalid JSON"}
+})
+_INTERNAL_ERROR_PREFIX = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32603,"message":"Internal error","data":'
+
+# Débuts pré-sérialisés des erreurs de requête, à placer après l'id : seul le détail (data) reste à encoder
+_ERROR_PREFIXES = {
+    message: b',"error":{"code":%d,"message":%s,"data":' % (code, _json_dumps(message))
+    for message, code in (("Method not found", -32601), ("Internal error", -32603))
+}
+
+# Taille maximale d'une trame reçue : les requêtes de ce serveur tiennent en quelques centaines d'octets,
+# une trame plus grosse est refusée par websockets (code 1009) avant d'être assemblée et analysée
+MAX_MESSAGE_SIZE = 2 ** 16
+
+# Options du serveur websocket :
+# - pas de permessage-deflate : les messages JSON-RPC sont petits, la compression coûte plus qu'elle ne rapporte
+# - file de réception bornée, en amont de la file d'envoi de chaque connexion
+SERVE_OPTIONS: Dict[str, Any] = {
+    "compression": None,
+    "max_size": MAX_MESSAGE_SIZE,
+    "max_queue": 32,
+    "ping_interval": 20,
+    "ping_timeout": 20,
+}
+
+# Seuils du ramasse-miettes pour le processus serveur : chaque requête crée quelques dicts éphémères,
+# la génération 0 n'est collectée que tous les 100 000 objets au lieu de 700
+GC_THRESHOLD = (100000, 10, 10)
+
+# Nombre maximal de réponses en attente d'envoi par connexion : au-delà, le client est jugé trop lent
+SEND_QUEUE_SIZE = 64
+
+# Nombre maximal de requêtes traitées simultanément par connexion
+MAX_INFLIGHT_REQUESTS = 32
+
+# Résultats simulés des outils
+_TOOL_RESULTS = {
+    "list_clients": "📋 Aucun client trouvé dans la base de données.",
+    "introspect_ontology": "🔍 Structure de l'ontologie analysée avec succès.",
+    "get_all_orders": "📦 Aucune commande trouvée dans le système.",
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _tool_not_found_suffix(tool_name: str) -> bytes:
+    """
+    Erreur "Tool not found" pré-sérialisée (hors id) pour un nom d'outil
+    
+    Args:
+        tool_name: Nom de l'outil demandé
+    
+    Returns:
+        bytes: Fin de la réponse JSON-RPC, à placer après l'id
+    """
+    return b',"error":' + _json_dumps({
+        "code": -32603,
+        "message": "Tool not found",
+        "data": f"Tool {tool_name} not found"
+    }) + b'}'
+
 
 class SimpleMCPServer:
     """
     Serveur MCP simplifié
     """
     
+    __slots__ = ("clients", "tools", "_init_suffix", "_tools_list_suffix", "_tool_results", "_dispatch")
+    
     def __init__(self):
         self.clients = {}
         self.tools = {
@@ -47,172 +136,322 @@ class SimpleMCPServer:
                 }
             }
         }
+        
+        # Réponses constantes (hors id), sérialisées une fois pour toutes
+        self._init_suffix = b',"result":' + _json_dumps({
+            "protocolVersion": "2024-11-05",
+            "capabilities": {
+                "tools": {}
+            },
+            "serverInfo": {
+                "name": "Simple MCP Server",
+                "version": "1.0.0"
+            }
+        }) + b'}'
+        self._tools_list_suffix = b',"result":' + _json_dumps({
+            "tools": [
+                {
+                    "name": tool_info["name"],
+                    "description": tool_info["description"],
+                    "inputSchema": tool_info["parameters"]
+                }
+                for tool_info in self.tools.values()
+            ]
+        }) + b'}'
+        self._tool_results = {
+            tool_name: b',"result":{"content":[{"type":"text","text":' + _json_dumps(
+                _TOOL_RESULTS.get(tool_name, f"✅ Outil {tool_name} exécuté avec succès.")
+            ) + b'}]}}'
+            for tool_name in self.tools
+        }
+        
+        # Méthodes JSON-RPC prises en charge : handler(request_id, raw_id, params)
+        self._dispatch = {
+            "tools/list": self._handle_list_tools,
+            "tools/call": self._handle_call_tool,
+            "initialize": self._handle_initialize,
+        }
     
-    async def handle_mcp_request(self, request: Dict) -> Dict:
-        """Gère une requête MCP"""
+    async def handle_mcp_request(self, request: Dict, raw_id: Optional[bytes] = None) -> bytes:
+        """
+        Gère une requête MCP
+        
+        Args:
+            request: Requête JSON-RPC décodée
+            raw_id: Id de la requête tel qu'il apparaît dans la trame (voir _raw_id), sinon il est ré-encodé
+        
+        Returns:
+            bytes: Réponse JSON-RPC encodée
+        """
+        request_id = request.get("id")
+        if raw_id is None:
+            raw_id = _json_dumps(request_id)
+        
         try:
             method = request.get("method")
             params = request.get("params", {})
-            request_id = request.get("id")
             
-            logger.info(f"Requête MCP reçue: {method}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Requête MCP reçue: %s", method)
+            
+            handler = self._dispatch.get(method)
+            if handler is None:
+                return self._create_error_response(raw_id, "Method not found", f"Unknown method: {method}")
+            return await handler(request_id, raw_id, params)
             
-            if method == "tools/list":
-                return self._handle_list_tools(request_id)
-            elif method == "tools/call":
-                return await self._handle_call_tool(request_id, params)
-            elif method == "initialize":
-                return self._handle_initialize(request_id, params)
-            else:
-                return self._create_error_response(request_id, "Method not found", f"Unknown method: {method}")
-                
         except Exception as e:
-            logger.error(f"Erreur lors du traitement de la requête MCP: {e}")
-            return self._create_error_response(request.get("id"), "Internal error", str(e))
+            logger.error("Erreur lors du traitement de la requête MCP: %s", e)
+            return self._create_error_response(raw_id, "Internal error", str(e))
     
-    def _handle_initialize(self, request_id: str, params: Dict) -> Dict:
+    async def _handle_initialize(self, request_id: str, raw_id: bytes, params: Dict) -> bytes:
         """Gère l'initialisation"""
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "serverInfo": {
-                    "name": "Simple MCP Server",
-                    "version": "1.0.0"
-                }
-            }
-        }
+        return _RESPONSE_PREFIX + raw_id + self._init_suffix
     
-    def _handle_list_tools(self, request_id: str) -> Dict:
+    async def _handle_list_tools(self, request_id: str, raw_id: bytes, params: Dict) -> bytes:
         """Liste les outils"""
-        tools = []
-        for tool_id, tool_info in self.tools.items():
-            tools.append({
-                "name": tool_info["name"],
-                "description": tool_info["description"],
-                "inputSchema": tool_info["parameters"]
-            })
-        
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": {
-                "tools": tools
-            }
-        }
+        return _RESPONSE_PREFIX + raw_id + self._tools_list_suffix
     
-    async def _handle_call_tool(self, request_id: str, params: Dict) -> Dict:
-        """Appelle un outil"""
+    async def _handle_call_tool(self, request_id: str, raw_id: bytes, params: Dict) -> bytes:
+        """Appelle un outil (résultat simulé, pré-sérialisé)"""
         tool_name = params.get("name")
-        arguments = params.get("arguments", {})
         
-        if tool_name not in self.tools:
-            return self._create_error_response(request_id, "Tool not found", f"Tool {tool_name} not found")
+        # Les résultats ne dépendent que du nom de l'outil : succès et erreurs sont servis depuis des octets en cache
+        result = self._tool_results.get(tool_name)
+        if result is None:
+            result = _tool_not_found_suffix(tool_name)
+        return _RESPONSE_PREFIX + raw_id + result
+    
+    def _create_error_response(self, raw_id: bytes, code: str, message: str) -> bytes:
+        """
+        Crée une réponse d'erreur
         
-        try:
-            # Simulation des résultats
-            if tool_name == "list_clients":
-                result = "📋 Aucun client trouvé dans la base de données."
-            elif tool_name == "introspect_ontology":
-                result = "🔍 Structure de l'ontologie analysée avec succès."
-            elif tool_name == "get_all_orders":
-                result = "📦 Aucune commande trouvée dans le système."
-            else:
-                result = f"✅ Outil {tool_name} exécuté avec succès."
-            
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": result
-                        }
-                    ]
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de l'exécution de l'outil {tool_name}: {e}")
-            return self._create_error_response(request_id, "Tool execution error", str(e))
-    
-    def _create_error_response(self, request_id: str, code: str, message: str) -> Dict:
-        """Crée une réponse d'erreur"""
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "error": {
-                "code": -32601 if code == "Method not found" else -32603,
-                "message": code,
-                "data": message
-            }
-        }
+        Args:
+            raw_id: Id de la requête, déjà encodé
+            code: Erreur JSON-RPC, parmi les clés de _ERROR_PREFIXES
+            message: Détail de l'erreur
+        
+        Returns:
+            bytes: Réponse JSON-RPC encodée
+        """
+        return _RESPONSE_PREFIX + raw_id + _ERROR_PREFIXES[code] + _json_dumps(message) + b'}}'
+
+
+def _raw_id(frame: bytes, request: Dict) -> Optional[bytes]:
+    """
+    Extrait l'id d'une trame sans le ré-encoder
+    
+    La clé "id" doit apparaître une seule fois dans la trame : sinon elle peut venir
+    des paramètres et l'id est ré-encodé à partir de la requête décodée.
+    
+    Args:
+        frame: Trame reçue
+        request: Requête décodée
+    
+    Returns:
+        Optional[bytes]: Fragment JSON de l'id, ou None
+    """
+    if "id" not in request or frame.count(b'"id"') != 1:
+        return None
+    match = _ID_PATTERN.search(frame)
+    return match.group(1) if match else None
 
 
-async def start_simple_mcp_server(host: str = "localhost", port: int = 8001):
-    """Démarre le serveur MCP simplifié"""
+async def _process_message(server: SimpleMCPServer, message: Union[str, bytes]) -> bytes:
+    """
+    Traite une trame reçue et retourne la réponse sérialisée
+    
+    Args:
+        server: Serveur MCP
+        message: Trame JSON-RPC reçue
+    
+    Returns:
+        bytes: Réponse JSON-RPC encodée
+    """
+    try:
+        # Traces par message en DEBUG uniquement : le formatage des trames coûte plus cher que leur traitement
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Message reçu: %s", message)
+        frame = message.encode("utf-8") if isinstance(message, str) else message
+        request = _json_loads(frame)
+        response_bytes = await server.handle_mcp_request(request, _raw_id(frame, request))
+        if debug:
+            logger.debug("Envoi réponse: %s", response_bytes.decode('utf-8'))
+        return response_bytes
+    except json.JSONDecodeError as e:
+        # orjson.JSONDecodeError dérive de json.JSONDecodeError
+        logger.error("Erreur JSON: %s", e)
+        return _PARSE_ERROR
+    except Exception as e:
+        logger.error("Erreur dans le handler: %s", e)
+        return _INTERNAL_ERROR_PREFIX + _json_dumps(str(e)) + b'}}'
+
+
+async def _writer(websocket, out_q: asyncio.Queue):
+    """
+    Envoie, dans l'ordre, les réponses mises en file pour une connexion
+    
+    Args:
+        websocket: Connexion du client
+        out_q: File des réponses à envoyer
+    """
+    try:
+        while True:
+            await websocket.send(await out_q.get())
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def start_simple_mcp_server(host: str = "localhost", port: int = 8001,
+                                  sock: Optional[socket.socket] = None):
+    """
+    Démarre le serveur MCP simplifié
+    
+    Args:
+        host: Adresse d'écoute
+        port: Port d'écoute
+        sock: Socket d'écoute déjà lié (host et port ne servent alors qu'aux logs)
+    """
     server = SimpleMCPServer()
+    # Identifiants de connexion : un simple compteur suffit, ils ne sortent pas du processus
+    client_ids = itertools.count(1)
     
     async def handler(websocket):
         """Handler WebSocket simplifié"""
-        client_id = str(uuid.uuid4())
+        client_id = next(client_ids)
         server.clients[client_id] = websocket
         
-        logger.info(f"Client MCP connecté: {client_id}")
+        logger.info("Client MCP connecté: %s", client_id)
+        
+        # Les réponses passent par une file bornée vidée par une tâche d'écriture : un client qui ne lit
+        # plus est déconnecté au lieu de faire grossir la mémoire, et la lecture n'attend pas les envois
+        out_q: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        writer = asyncio.create_task(_writer(websocket, out_q))
+        
+        # Les requêtes d'une même connexion sont traitées en parallèle (les réponses portent leur id,
+        # l'ordre d'envoi n'a donc pas d'importance) ; le sémaphore suspend la lecture au-delà de la limite
+        inflight = asyncio.Semaphore(MAX_INFLIGHT_REQUESTS)
+        tasks = set()
+        
+        async def respond(message):
+            try:
+                out_q.put_nowait(await _process_message(server, message))
+            except asyncio.QueueFull:
+                logger.warning("Client MCP trop lent, connexion fermée: %s", client_id)
+                await websocket.close(code=1013, reason="Try again later")
+            finally:
+                inflight.release()
         
         try:
             async for message in websocket:
-                try:
-                    logger.info(f"Message reçu: {message}")
-                    request = json.loads(message)
-                    response = await server.handle_mcp_request(request)
-                    response_str = json.dumps(response)
-                    logger.info(f"Envoi réponse: {response_str}")
-                    await websocket.send(response_str)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Erreur JSON: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error",
-                            "data": "Invalid JSON"
-                        }
-                    }
-                    await websocket.send(json.dumps(error_response))
-                except Exception as e:
-                    logger.error(f"Erreur dans le handler: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32603,
-                            "message": "Internal error",
-                            "data": str(e)
-                        }
-                    }
-                    await websocket.send(json.dumps(error_response))
+                await inflight.acquire()
+                task = asyncio.create_task(respond(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
         except websockets.exceptions.ConnectionClosed:
-            logger.info(f"Client MCP déconnecté: {client_id}")
+            logger.info("Client MCP déconnecté: %s", client_id)
         except Exception as e:
-            logger.error(f"Erreur de connexion: {e}")
+            logger.error("Erreur de connexion: %s", e)
         finally:
+            for task in tasks:
+                task.cancel()
+            writer.cancel()
             if client_id in server.clients:
                 del server.clients[client_id]
     
     # Démarre le serveur (compatible websockets 15.x)
-    server_ws = await websockets.serve(handler, host, port)
-    logger.info(f"Serveur MCP simplifié démarré sur ws://{host}:{port}")
+    if sock is not None:
+        server_ws = await websockets.serve(handler, sock=sock, **SERVE_OPTIONS)
+    else:
+        server_ws = await websockets.serve(handler, host, port, **SERVE_OPTIONS)
+    logger.info("Serveur MCP simplifié démarré sur ws://%s:%s", host, port)
     
     # Garde le serveur en vie
     await server_ws.wait_closed()
 
 
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    """Crée la boucle d'événements : uvloop si installé, sinon la boucle asyncio standard"""
+    try:
+        import uvloop
+        return uvloop.new_event_loop()
+    except ImportError:
+        return asyncio.new_event_loop()
+
+
+def _reuse_port_socket(host: str, port: int) -> socket.socket:
+    """
+    Crée un socket d'écoute partageable entre processus : le noyau répartit les connexions
+    entre tous les sockets liés au même port avec SO_REUSEPORT
+    
+    Args:
+        host: Adresse d'écoute
+        port: Port d'écoute
+    
+    Returns:
+        socket.socket: Socket lié, pas encore en écoute
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+def _serve_forever(host: str, port: int, reuse_port: bool = False):
+    """
+    Fait tourner un serveur dans le processus courant, sur une boucle dédiée
+    
+    Args:
+        host: Adresse d'écoute
+        port: Port d'écoute
+        reuse_port: Écoute sur un socket SO_REUSEPORT (un par processus worker)
+    """
+    # Les objets créés au chargement (modules, tables pré-sérialisées) ne sont plus parcourus par le GC
+    gc.freeze()
+    gc.set_threshold(*GC_THRESHOLD)
+    sock = _reuse_port_socket(host, port) if reuse_port else None
+    loop = _new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(start_simple_mcp_server(host, port, sock=sock))
+    finally:
+        loop.close()
+
+
+def run_simple_mcp_server(host: str = "localhost", port: int = 8001, workers: int = 1):
+    """
+    Démarre le serveur MCP simplifié sur une boucle dédiée (uvloop si disponible) et bloque jusqu'à son arrêt
+    
+    Avec plusieurs workers, chaque processus a son propre SimpleMCPServer et son propre
+    socket sur le même port ; le noyau leur répartit les connexions.
+    
+    Args:
+        host: Adresse d'écoute
+        port: Port d'écoute
+        workers: Nombre de processus serveur
+    """
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("SO_REUSEPORT indisponible sur cette plateforme, démarrage d'un seul processus")
+        workers = 1
+    if workers <= 1:
+        _serve_forever(host, port)
+        return
+    
+    processes = [
+        multiprocessing.Process(target=_serve_forever, args=(host, port, True), name=f"mcp-simple-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
 if __name__ == "__main__":
-    asyncio.run(start_simple_mcp_server()) 
\ No newline at end of file
+    run_simple_mcp_server() 
\ No newline at end of file
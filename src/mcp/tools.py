@@ -3,10 +3,57 @@ Module d'outils (tools) - Fonctions mock simulant des APIs externes
 Ces fonctions interagissent avec la base de connaissances et la base vectorielle
 """
 
-import random
+import logging
 import uuid
-from typing import Dict, List, Tuple, Optional
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple, Optional
 from datetime import datetime
+import numpy as np
+
+from src.mcp.tools_records import ClientRow, OrderRow, ProductReco
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tirages des échecs simulés, générés par lots : un appel d'outil ne fait que dépiler un booléen
+_FAILURE_BATCH_SIZE = 4096
+_RNG = np.random.default_rng()
+_STOCK_FAILURES = deque()
+_PAYMENT_FAILURES = deque()
+
+# Statuts à partir desquels une commande peut être validée
+_OK_STATES = frozenset({'en_attente', 'nouvelle'})
+
+# Messages des règles de validation, indexés par bit d'échec
+_RULE_MSGS = (
+    "Montant minimum non atteint (10€)",
+    "Client non trouvé",
+    "Statut invalide: {status}",
+)
+
+# Cible (classe, instance) de chaque proxy sémantique créé, par proxy_id
+PROXY_TABLE_SIZE = 1024
+_PROXY_TABLE: "OrderedDict[str, Tuple[str, Optional[str]]]" = OrderedDict()
+
+
+def _simulated_failure(draws: deque, probability: float) -> bool:
+    """
+    Tire un échec simulé
+    
+    Args:
+        draws: File de tirages propre au type d'échec
+        probability: Probabilité d'échec
+    
+    Returns:
+        bool: True si l'opération doit échouer
+    """
+    try:
+        return draws.pop()
+    except IndexError:
+        draws.extend((_RNG.random(_FAILURE_BATCH_SIZE) < probability).tolist())
+        return draws.pop()
 
 
 def create_order_tool(client_id: str, items_list: List[Dict], 
@@ -26,29 +73,30 @@ def create_order_tool(client_id: str, items_list: List[Dict],
         # Génère un ID unique pour la commande
         order_id = f"order_{uuid.uuid4().hex[:8]}"
         
-        # Calcule le montant total
-        total_amount = 0.0
+        # Regroupe les quantités par produit : chaque produit n'est lu qu'une fois dans le graphe
+        quantity_by_product = Counter()
         for item in items_list:
-            product_id = item['product_id']
-            quantity = item['quantity']
-            
-            # Récupère les détails du produit depuis la base de connaissances
-            product_details = knowledge_base.get_product_details(product_id)
-            if product_details:
-                price = float(product_details.get('hasPrice', 0))
-                total_amount += price * quantity
+            quantity_by_product[item['product_id']] += item['quantity']
+        
+        # Calcule le montant total : prix lus en une seule requête, puis un produit scalaire
+        # (un produit inconnu compte pour 0)
+        details_by_product = knowledge_base.get_products_details(list(quantity_by_product))
+        prices = np.fromiter((details_by_product[product_id].get('hasPrice', 0)
+                              for product_id in quantity_by_product),
+                             dtype=np.float64, count=len(quantity_by_product))
+        quantities = np.fromiter(quantity_by_product.values(), dtype=np.float64, count=len(quantity_by_product))
+        total_amount = float(np.dot(prices, quantities))
         
         # Crée la commande dans le graphe RDF
         knowledge_base.add_order(order_id, client_id, total_amount, "en_attente")
         
-        print(f"✅ Commande {order_id} créée pour le client {client_id}")
-        print(f"   Montant total: {total_amount:.2f}€")
-        print(f"   Articles: {len(items_list)}")
+        logger.info("✅ Commande %s créée pour le client %s (%.2f€, %d articles)",
+                    order_id, client_id, total_amount, len(items_list))
         
         return order_id
         
     except Exception as e:
-        print(f"❌ Erreur lors de la création de la commande: {e}")
+        logger.error("❌ Erreur lors de la création de la commande: %s", e)
         return None
 
 
@@ -62,45 +110,102 @@ def check_stock_tool(product_id: str, quantity: int,
         quantity: Quantité demandée
         knowledge_base: Instance de KnowledgeBase
     
+    Returns:
+        Tuple[bool, str]: (succès, message)
+    """
+    return check_stock_batch_tool([{'product_id': product_id, 'quantity': quantity}], knowledge_base)
+
+
+def check_stock_batch_tool(items_list: List[Dict], knowledge_base) -> Tuple[bool, str]:
+    """
+    Vérifie en une fois la disponibilité en stock de tous les articles d'une commande
+    
+    Les stocks sont lus en une seule requête ; ils ne sont décrémentés que si
+    tous les articles sont disponibles, sous le verrou en écriture du graphe.
+    
+    Args:
+        items_list: Liste des articles avec product_id et quantity
+        knowledge_base: Instance de KnowledgeBase
+    
     Returns:
         Tuple[bool, str]: (succès, message)
     """
     try:
-        # Récupère les détails du produit
-        product_details = knowledge_base.get_product_details(product_id)
-        
-        if not product_details:
-            return False, f"Produit {product_id} non trouvé"
-        
-        current_stock = int(product_details.get('hasStock', 0))
-        product_name = product_details.get('hasName', 'Produit inconnu')
+        quantity_by_product = Counter()
+        for item in items_list:
+            quantity_by_product[item['product_id']] += item['quantity']
         
-        # Simule parfois un échec aléatoire (10% de chance)
-        if random.random() < 0.1:
-            return False, f"Erreur temporaire lors de la vérification du stock pour {product_name}"
+        # Simule parfois un échec aléatoire (10% de chance), tiré hors du verrou
+        simulated_failure = _simulated_failure(_STOCK_FAILURES, 0.1)
         
-        if current_stock >= quantity:
-            # Met à jour le stock
-            new_stock = current_stock - quantity
-            knowledge_base.update_product_stock(product_id, new_stock)
+        # Lecture, contrôle et décrément forment une seule transaction sous le verrou en écriture :
+        # deux commandes concurrentes ne peuvent pas réserver le même stock
+        with knowledge_base.wlock:
+            # Récupère le stock et le nom de tous les produits
+            stock_by_product = knowledge_base.get_products_stock(list(quantity_by_product))
             
-            print(f"✅ Stock vérifié pour {product_name}")
-            print(f"   Stock disponible: {current_stock} → {new_stock}")
-            print(f"   Quantité demandée: {quantity}")
+            missing = [product_id for product_id in quantity_by_product if product_id not in stock_by_product]
+            if missing:
+                return False, "; ".join(f"Produit {product_id} non trouvé" for product_id in missing)
             
-            return True, f"Stock suffisant pour {product_name}"
-        else:
-            print(f"❌ Stock insuffisant pour {product_name}")
-            print(f"   Stock disponible: {current_stock}")
-            print(f"   Quantité demandée: {quantity}")
+            product_names = ", ".join(stock_by_product[product_id][1] for product_id in quantity_by_product)
             
-            return False, f"Stock insuffisant pour {product_name} (disponible: {current_stock}, demandé: {quantity})"
+            if simulated_failure:
+                return False, f"Erreur temporaire lors de la vérification du stock pour {product_names}"
+            
+            shortages = []
+            for product_id, quantity in quantity_by_product.items():
+                current_stock, product_name = stock_by_product[product_id]
+                if current_stock < quantity:
+                    logger.info("❌ Stock insuffisant pour %s (disponible: %d, demandé: %d)",
+                                product_name, current_stock, quantity)
+                    
+                    shortages.append(f"Stock insuffisant pour {product_name} (disponible: {current_stock}, demandé: {quantity})")
+            
+            if shortages:
+                return False, "; ".join(shortages)
+            
+            # Met à jour le stock de tous les produits
+            new_stock_by_product = {}
+            for product_id, quantity in quantity_by_product.items():
+                current_stock, product_name = stock_by_product[product_id]
+                new_stock_by_product[product_id] = current_stock - quantity
+                
+                logger.info("✅ Stock vérifié pour %s (%d → %d, demandé: %d)",
+                            product_name, current_stock, current_stock - quantity, quantity)
+            
+            knowledge_base.set_products_stock(new_stock_by_product)
+        
+        return True, f"Stock suffisant pour {product_names}"
             
     except Exception as e:
-        print(f"❌ Erreur lors de la vérification du stock: {e}")
+        logger.error("❌ Erreur lors de la vérification du stock: %s", e)
         return False, f"Erreur lors de la vérification du stock: {e}"
 
 
+def _update_status_if_unchanged(knowledge_base, order_id: str,
+                                expected_status: Optional[str], new_status: str) -> bool:
+    """
+    Met à jour le statut d'une commande si elle a toujours le statut lu auparavant
+    
+    La relecture et l'écriture se font sous le verrou en écriture du graphe.
+    
+    Args:
+        knowledge_base: Instance de KnowledgeBase
+        order_id: Identifiant de la commande
+        expected_status: Statut lu avant la mise à jour
+        new_status: Nouveau statut
+    
+    Returns:
+        bool: False si le statut a changé entre-temps (aucune écriture)
+    """
+    with knowledge_base.wlock:
+        if knowledge_base.get_order_details(order_id).get('hasStatus') != expected_status:
+            return False
+        knowledge_base.update_order_status(order_id, new_status)
+    return True
+
+
 def process_payment_tool(order_id: str, amount: float, 
                         knowledge_base) -> Tuple[bool, str]:
     """
@@ -116,30 +221,33 @@ def process_payment_tool(order_id: str, amount: float,
     """
     try:
         # Récupère les détails de la commande
-        order_details = knowledge_base.get_order_details(order_id)
+        with knowledge_base.rlock:
+            order_details = knowledge_base.get_order_details(order_id)
         
         if not order_details:
             return False, f"Commande {order_id} non trouvée"
+        status_before = order_details.get('hasStatus')
         
+        # Le paiement (simulé ici, appel à une passerelle à terme) se fait sans verrou sur le graphe
         # Simule parfois un échec de paiement (5% de chance)
-        if random.random() < 0.05:
-            knowledge_base.update_order_status(order_id, "annulee_paiement_echec")
-            print(f"❌ Échec du paiement pour la commande {order_id}")
-            print(f"   Montant: {amount:.2f}€")
+        if _simulated_failure(_PAYMENT_FAILURES, 0.05):
+            if not _update_status_if_unchanged(knowledge_base, order_id, status_before, "annulee_paiement_echec"):
+                return False, f"Statut de la commande {order_id} modifié pendant le paiement"
+            logger.info("❌ Échec du paiement pour la commande %s (%.2f€)", order_id, amount)
             return False, "Échec du paiement - carte refusée"
         
         # Simule le traitement du paiement
-        print(f"💳 Traitement du paiement pour la commande {order_id}")
-        print(f"   Montant: {amount:.2f}€")
+        logger.debug("💳 Traitement du paiement pour la commande %s (%.2f€)", order_id, amount)
         
-        # Met à jour le statut de la commande
-        knowledge_base.update_order_status(order_id, "payee")
+        # Met à jour le statut, sauf si un autre outil l'a changé pendant le paiement
+        if not _update_status_if_unchanged(knowledge_base, order_id, status_before, "payee"):
+            return False, f"Statut de la commande {order_id} modifié pendant le paiement"
         
-        print(f"✅ Paiement traité avec succès pour la commande {order_id}")
+        logger.info("✅ Paiement traité avec succès pour la commande %s", order_id)
         return True, "Paiement traité avec succès"
         
     except Exception as e:
-        print(f"❌ Erreur lors du traitement du paiement: {e}")
+        logger.error("❌ Erreur lors du traitement du paiement: %s", e)
         return False, f"Erreur lors du traitement du paiement: {e}"
 
 
@@ -161,17 +269,17 @@ def update_order_status_tool(order_id: str, new_status: str,
         order_details = knowledge_base.get_order_details(order_id)
         
         if not order_details:
-            print(f"❌ Commande {order_id} non trouvée")
+            logger.info("❌ Commande %s non trouvée", order_id)
             return False
         
         # Met à jour le statut
         knowledge_base.update_order_status(order_id, new_status)
         
-        print(f"✅ Statut de la commande {order_id} mis à jour: {new_status}")
+        logger.info("✅ Statut de la commande %s mis à jour: %s", order_id, new_status)
         return True
         
     except Exception as e:
-        print(f"❌ Erreur lors de la mise à jour du statut: {e}")
+        logger.error("❌ Erreur lors de la mise à jour du statut: %s", e)
         return False
 
 
@@ -190,15 +298,13 @@ def get_product_details_tool(product_id: str,
     try:
         product_details = knowledge_base.get_product_details(product_id)
         
-        if product_details:
-            print(f"📦 Détails du produit {product_id}:")
-            for key, value in product_details.items():
-                print(f"   {key}: {value}")
+        if product_details and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📦 Détails du produit %s: %s", product_id, product_details)
         
         return product_details
         
     except Exception as e:
-        print(f"❌ Erreur lors de la récupération des détails: {e}")
+        logger.error("❌ Erreur lors de la récupération des détails: %s", e)
         return None
 
 
@@ -217,15 +323,13 @@ def get_client_details_tool(client_id: str, knowledge_base, **kwargs) -> Optiona
     try:
         client_details = knowledge_base.get_client_details(client_id)
         
-        if client_details:
-            print(f"👤 Détails du client {client_id}:")
-            for key, value in client_details.items():
-                print(f"   {key}: {value}")
+        if client_details and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("👤 Détails du client %s: %s", client_id, client_details)
         
         return client_details
         
     except Exception as e:
-        print(f"❌ Erreur lors de la récupération des détails client: {e}")
+        logger.error("❌ Erreur lors de la récupération des détails client: %s", e)
         return None
 
 
@@ -248,53 +352,47 @@ def validate_order_tool(order_id: str, knowledge_base, **kwargs) -> Tuple[bool,
         if not order_details:
             return False, f"Commande {order_id} non trouvée"
         
-        # Récupère les détails du client
+        # Récupère les détails du client (hasClient contient l'URI du client)
         client_id = order_details.get('hasClient', '')
+        client_id = client_id[client_id.rfind('/') + 1:]
+        
+        # Lecture en mémoire, mémorisée par la base de connaissances
         client_details = knowledge_base.get_client_details(client_id)
         
         # Récupère le montant
-        amount = float(order_details.get('hasAmount', 0))
-        
-        # Règles de validation simples
-        validation_rules = []
-        
-        # Règle 1: Montant minimum
-        if amount < 10:
-            validation_rules.append("Montant minimum non atteint (10€)")
-        
-        # Règle 2: Client valide
-        if not client_details:
-            validation_rules.append("Client non trouvé")
-        
-        # Règle 3: Statut initial
+        amount = order_details.get('hasAmount', 0)
         current_status = order_details.get('hasStatus', '')
-        if current_status not in ['en_attente', 'nouvelle']:
-            validation_rules.append(f"Statut invalide: {current_status}")
+        
+        # Règles de validation : un bit par règle non respectée
+        flags = ((amount < 10)
+                 | (not client_details) << 1
+                 | (current_status not in _OK_STATES) << 2)
         
         # Si toutes les règles sont respectées
-        if not validation_rules:
-            # Met à jour le statut
-            knowledge_base.update_order_status(order_id, "validee")
+        if not flags:
+            # Met à jour le statut, sauf si un autre outil l'a changé depuis la lecture
+            if not _update_status_if_unchanged(knowledge_base, order_id, current_status, "validee"):
+                return False, f"Statut de la commande {order_id} modifié pendant la validation"
             
-            print(f"✅ Commande {order_id} validée avec succès")
-            print(f"   Montant: {amount:.2f}€")
-            print(f"   Client: {client_id}")
+            logger.info("✅ Commande %s validée avec succès (%.2f€, client: %s)", order_id, amount, client_id)
             
             return True, "Commande validée avec succès"
-        else:
-            print(f"❌ Commande {order_id} rejetée:")
-            for rule in validation_rules:
-                print(f"   - {rule}")
-            
-            return False, f"Commande rejetée: {'; '.join(validation_rules)}"
+        
+        reasons = "; ".join(
+            message.format(status=current_status)
+            for bit, message in enumerate(_RULE_MSGS) if flags >> bit & 1
+        )
+        logger.info("❌ Commande %s rejetée: %s", order_id, reasons)
+        
+        return False, f"Commande rejetée: {reasons}"
             
     except Exception as e:
-        print(f"❌ Erreur lors de la validation: {e}")
+        logger.error("❌ Erreur lors de la validation: %s", e)
         return False, f"Erreur lors de la validation: {e}"
 
 
 def recommend_products_tool(query_text: str, vector_store, 
-                          knowledge_base, top_k: int = 3) -> List[Dict]:
+                          knowledge_base, top_k: int = 3) -> List[ProductReco]:
     """
     Recommande des produits basés sur une requête textuelle
     
@@ -305,7 +403,7 @@ def recommend_products_tool(query_text: str, vector_store,
         top_k: Nombre de recommandations
     
     Returns:
-        List[Dict]: Liste des produits recommandés
+        List[ProductReco]: Liste des produits recommandés
     """
     try:
         # Recherche des produits similaires
@@ -313,35 +411,81 @@ def recommend_products_tool(query_text: str, vector_store,
         
         recommendations = []
         for product in similar_products:
-            product_id = product['product_id']
-            
             # Récupère les détails complets du produit
-            product_details = knowledge_base.get_product_details(product_id)
+            product_details = knowledge_base.get_product_details(product['product_id'])
             
             if product_details:
-                recommendation = {
-                    'product_id': product_id,
-                    'name': product_details.get('hasName', 'Produit inconnu'),
-                    'price': product_details.get('hasPrice', 0),
-                    'description': product_details.get('hasDescription', ''),
-                    'stock': product_details.get('hasStock', 0),
-                    'similarity_score': product['similarity_score']
-                }
-                recommendations.append(recommendation)
-        
-        if recommendations:
-            print(f"🎯 Recommandations pour '{query_text}':")
-            for i, rec in enumerate(recommendations, 1):
-                print(f"   {i}. {rec['name']} - {rec['price']}€ (score: {rec['similarity_score']:.2f})")
+                recommendations.append(_build_recommendation(product, product_details))
         
+        _log_recommendations(query_text, recommendations)
         return recommendations
         
     except Exception as e:
-        print(f"❌ Erreur lors de la génération des recommandations: {e}")
+        logger.error("❌ Erreur lors de la génération des recommandations: %s", e)
         return []
 
 
-def get_order_history_tool(client_id: str, knowledge_base, **kwargs) -> List[Dict]:
+def recommend_products_batch_tool(query_texts: List[str], vector_store,
+                                  knowledge_base, top_k: int = 3) -> List[List[ProductReco]]:
+    """
+    Recommande des produits pour plusieurs requêtes textuelles en un seul appel
+    
+    Les requêtes sont encodées et recherchées en un lot, puis les détails de
+    tous les produits retenus sont lus en une seule requête SPARQL.
+    
+    Args:
+        query_texts: Textes des requêtes
+        vector_store: Instance de VectorStore
+        knowledge_base: Instance de KnowledgeBase
+        top_k: Nombre de recommandations par requête
+    
+    Returns:
+        List[List[ProductReco]]: Produits recommandés de chaque requête, dans l'ordre des requêtes
+    """
+    try:
+        similar_lists = vector_store.search_similar_products_batch(query_texts, top_k)
+        
+        product_ids = [product['product_id'] for similar_products in similar_lists for product in similar_products]
+        details_by_id = knowledge_base.get_products_details(product_ids)
+        
+        batch = []
+        for query_text, similar_products in zip(query_texts, similar_lists):
+            recommendations = [
+                _build_recommendation(product, details_by_id[product['product_id']])
+                for product in similar_products
+                if details_by_id[product['product_id']]
+            ]
+            _log_recommendations(query_text, recommendations)
+            batch.append(recommendations)
+        
+        return batch
+        
+    except Exception as e:
+        logger.error("❌ Erreur lors de la génération des recommandations groupées: %s", e)
+        return [[] for _ in query_texts]
+
+
+def _build_recommendation(product: Dict, product_details: Dict) -> ProductReco:
+    """Assemble une recommandation à partir d'un résultat vectoriel et des détails du produit"""
+    return ProductReco(
+        product_id=product['product_id'],
+        name=product_details.get('hasName', 'Produit inconnu'),
+        price=product_details.get('hasPrice', 0),
+        description=product_details.get('hasDescription', ''),
+        stock=product_details.get('hasStock', 0),
+        similarity_score=product['similarity_score']
+    )
+
+
+def _log_recommendations(query_text: str, recommendations: List[ProductReco]):
+    """Trace les recommandations d'une requête (niveau DEBUG)"""
+    if recommendations and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🎯 Recommandations pour '%s':", query_text)
+        for i, rec in enumerate(recommendations, 1):
+            logger.debug("   %d. %s - %s€ (score: %.2f)", i, rec.name, rec.price, rec.similarity_score)
+
+
+def get_order_history_tool(client_id: str, knowledge_base, **kwargs) -> List[OrderRow]:
     """
     Récupère l'historique des commandes d'un client
     
@@ -351,46 +495,37 @@ def get_order_history_tool(client_id: str, knowledge_base, **kwargs) -> List[Dic
         **kwargs: Paramètres optionnels (ignorés pour cette fonction)
     
     Returns:
-        List[Dict]: Historique des commandes
+        List[OrderRow]: Historique des commandes
     """
     try:
-        # Récupère toutes les commandes
+        # Une seule requête SPARQL filtrée sur le client, déjà triée par date (plus récent en premier)
         all_orders = []
-        order_uris = knowledge_base.get_instances_of_class(
-            "http://example.org/ontology/Order"
-        )
-        
-        for order_uri in order_uris:
-            order_id = str(order_uri).split('/')[-1]
-            order_details = knowledge_base.get_order_details(order_id)
+        total_amount = 0.0
+        for order in knowledge_base.get_orders_by_client(client_id):
+            amount = order['amount'] if order['amount'] is not None else 0.0
+            total_amount += amount
+            all_orders.append(OrderRow(
+                order_id=order['order_id'],
+                client_id=client_id,
+                amount=amount,
+                status=order['status'] if order['status'] is not None else 'inconnu',
+                date=order['date'] if order['date'] is not None else 'N/A'
+            ))
+        
+        logger.info("📋 Historique des commandes pour le client %s: %d commandes, %.2f€",
+                    client_id, len(all_orders), total_amount)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for order in islice(all_orders, 5):  # Affiche les 5 dernières
+                logger.debug("   - %s: %s€ (%s)", order.order_id, order.amount, order.status)
             
-            if order_details and order_details.get('hasClient') == client_id:
-                all_orders.append({
-                    'order_id': order_id,
-                    'amount': order_details.get('hasAmount', 0),
-                    'status': order_details.get('hasStatus', 'inconnu'),
-                    'date': order_details.get('hasDate', 'N/A')
-                })
-        
-        # Trie par date (plus récent en premier)
-        all_orders.sort(key=lambda x: x['date'], reverse=True)
-        
-        print(f"📋 Historique des commandes pour le client {client_id}:")
-        print(f"   Nombre de commandes: {len(all_orders)}")
-        
-        total_amount = sum(order['amount'] for order in all_orders)
-        print(f"   Montant total: {total_amount:.2f}€")
-        
-        for order in all_orders[:5]:  # Affiche les 5 dernières
-            print(f"   - {order['order_id']}: {order['amount']}€ ({order['status']})")
-        
-        if len(all_orders) > 5:
-            print(f"   ... et {len(all_orders) - 5} autres commandes")
+            if len(all_orders) > 5:
+                logger.debug("   ... et %d autres commandes", len(all_orders) - 5)
         
         return all_orders
         
     except Exception as e:
-        print(f"❌ Erreur lors de la récupération de l'historique: {e}")
+        logger.error("❌ Erreur lors de la récupération de l'historique: %s", e)
         return []
 
 
@@ -408,14 +543,8 @@ def add_client_tool(name: str, email: str, knowledge_base) -> Tuple[bool, str]:
     """
     try:
         # Vérifie que l'email n'est pas déjà utilisé
-        existing_clients = knowledge_base.get_instances_of_class(
-            "http://example.org/ontology/Client"
-        )
-        
-        for client_uri in existing_clients:
-            client_details = knowledge_base.get_client_details(client_uri)
-            if client_details and client_details.get('hasEmail') == email:
-                return False, f"Un client avec l'email {email} existe déjà"
+        if knowledge_base.client_email_exists(email):
+            return False, f"Un client avec l'email {email} existe déjà"
         
         # Génère un ID unique pour le client
         client_id = f"client_{uuid.uuid4().hex[:8]}"
@@ -423,19 +552,34 @@ def add_client_tool(name: str, email: str, knowledge_base) -> Tuple[bool, str]:
         # Ajoute le client dans la base de connaissances
         knowledge_base.add_client(client_id, name, email)
         
-        print(f"✅ Nouveau client ajouté:")
-        print(f"   ID: {client_id}")
-        print(f"   Nom: {name}")
-        print(f"   Email: {email}")
+        logger.info("✅ Nouveau client ajouté: %s (%s, %s)", client_id, name, email)
         
         return True, f"Client {name} ajouté avec succès (ID: {client_id})"
         
     except Exception as e:
-        print(f"❌ Erreur lors de l'ajout du client: {e}")
+        logger.error("❌ Erreur lors de l'ajout du client: %s", e)
         return False, f"Erreur lors de l'ajout du client: {e}"
 
 
-def list_clients_tool(knowledge_base, **kwargs) -> List[Dict]:
+def _iter_clients(knowledge_base) -> Iterator[ClientRow]:
+    """
+    Parcourt les clients un à un, chacun étant tracé (niveau DEBUG) au passage
+    
+    Args:
+        knowledge_base: Instance de KnowledgeBase
+    
+    Returns:
+        Iterator[ClientRow]: Clients avec id, name, email
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for client in knowledge_base.iter_clients():
+        row = ClientRow(id=client['id'], name=client['name'], email=client['email'])
+        if debug:
+            logger.debug("   - %s (%s) - ID: %s", row.name, row.email, row.id)
+        yield row
+
+
+def list_clients_tool(knowledge_base, **kwargs) -> List[ClientRow]:
     """
     Liste tous les clients dans la base de connaissances
     
@@ -444,20 +588,16 @@ def list_clients_tool(knowledge_base, **kwargs) -> List[Dict]:
         **kwargs: Paramètres optionnels (ignorés pour cette fonction)
     
     Returns:
-        List[Dict]: Liste des clients avec leurs détails
+        List[ClientRow]: Liste des clients avec leurs détails
     """
     try:
-        # Utilise la méthode get_clients de la base de connaissances
-        clients = knowledge_base.get_clients()
-        
-        print(f"📋 Liste des clients ({len(clients)} clients):")
-        for client in clients:
-            print(f"   - {client.get('name', 'N/A')} ({client.get('email', 'N/A')}) - ID: {client.get('id', 'N/A')}")
+        clients = list(_iter_clients(knowledge_base))
         
+        logger.info("📋 Liste des clients (%d clients)", len(clients))
         return clients
         
     except Exception as e:
-        print(f"❌ Erreur lors de la récupération des clients: {e}")
+        logger.error("❌ Erreur lors de la récupération des clients: %s", e)
         return []
 
 
@@ -477,18 +617,18 @@ def introspect_ontology_tool(knowledge_base, **kwargs) -> Dict:
     try:
         ontology_info = knowledge_base.introspect_ontology()
         
-        print("🔍 Introspection de l'ontologie:")
-        print(f"   Classes: {len(ontology_info.get('classes', []))}")
-        print(f"   Propriétés: {len(ontology_info.get('properties', []))}")
-        print(f"   Namespaces: {len(ontology_info.get('namespaces', {}))}")
+        logger.info("🔍 Introspection de l'ontologie: %d classes, %d propriétés, %d namespaces",
+                    len(ontology_info.get('classes', [])), len(ontology_info.get('properties', [])),
+                    len(ontology_info.get('namespaces', {})))
         
-        for class_info in ontology_info.get('classes', []):
-            print(f"   - {class_info['name']}: {class_info['instances_count']} instances")
+        if logger.isEnabledFor(logging.DEBUG):
+            for class_info in ontology_info.get('classes', []):
+                logger.debug("   - %s: %s instances", class_info['name'], class_info['instances_count'])
         
         return ontology_info
         
     except Exception as e:
-        print(f"❌ Erreur lors de l'introspection: {e}")
+        logger.error("❌ Erreur lors de l'introspection: %s", e)
         return {}
 
 
@@ -515,7 +655,7 @@ def extend_ontology_tool(class_name: str, properties: List[Dict],
             return False, f"Échec de l'ajout de la classe '{class_name}'"
         
     except Exception as e:
-        print(f"❌ Erreur lors de l'extension de l'ontologie: {e}")
+        logger.error("❌ Erreur lors de l'extension de l'ontologie: %s", e)
         return False, f"Erreur lors de l'extension: {e}"
 
 
@@ -542,7 +682,7 @@ def create_instance_tool(class_name: str, properties: Dict,
             return False, f"Échec de la création de l'instance de type '{class_name}'"
         
     except Exception as e:
-        print(f"❌ Erreur lors de la création de l'instance: {e}")
+        logger.error("❌ Erreur lors de la création de l'instance: %s", e)
         return False, f"Erreur lors de la création: {e}"
 
 
@@ -561,26 +701,55 @@ def query_ontology_tool(query_type: str, knowledge_base, **kwargs) -> List[Dict]
     try:
         results = knowledge_base.query_ontology_introspectively(query_type, **kwargs)
         
-        print(f"🔍 Requête '{query_type}' - {len(results)} résultats")
+        logger.info("🔍 Requête '%s' - %d résultats", query_type, len(results))
         
-        if query_type == 'classes':
-            for class_info in results:
-                print(f"   - {class_info['name']}: {class_info['instances_count']} instances")
-        elif query_type == 'properties':
-            for prop_info in results:
-                print(f"   - {prop_info['name']} ({prop_info['type']}): {prop_info['range']}")
-        elif query_type == 'instances':
-            for instance_info in results:
-                print(f"   - {instance_info['id']} ({instance_info['class']})")
+        if logger.isEnabledFor(logging.DEBUG):
+            if query_type == 'classes':
+                for class_info in results:
+                    logger.debug("   - %s: %s instances", class_info['name'], class_info['instances_count'])
+            elif query_type == 'properties':
+                for prop_info in results:
+                    logger.debug("   - %s (%s): %s", prop_info['name'], prop_info['type'], prop_info['range'])
+            elif query_type == 'instances':
+                for instance_info in results:
+                    logger.debug("   - %s (%s)", instance_info['id'], instance_info['class'])
         
         return results
         
     except Exception as e:
-        print(f"❌ Erreur lors de la requête: {e}")
+        logger.error("❌ Erreur lors de la requête: %s", e)
         return []
 
 
-def get_all_orders_tool(knowledge_base, **kwargs) -> List[Dict]:
+def _iter_all_orders(knowledge_base) -> Iterator[OrderRow]:
+    """
+    Parcourt toutes les commandes une à une, chacune étant tracée (niveau DEBUG) au passage
+    
+    Les appelants qui n'ont besoin que d'une partie des commandes peuvent
+    composer ce générateur (itertools.islice, heapq.nlargest) sans matérialiser la liste.
+    
+    Args:
+        knowledge_base: Instance de KnowledgeBase
+    
+    Returns:
+        Iterator[OrderRow]: Commandes avec order_id, client_id, amount, status, date ('N/A' si absent)
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # Une seule requête SPARQL pour toutes les commandes et leurs propriétés
+    for order in knowledge_base.iter_all_orders():
+        row = OrderRow(
+            order_id=order['order_id'],
+            client_id=order['client_id'] if order['client_id'] is not None else 'N/A',
+            amount=order['amount'] if order['amount'] is not None else 'N/A',
+            status=order['status'] if order['status'] is not None else 'N/A',
+            date=order['date'] if order['date'] is not None else 'N/A'
+        )
+        if debug:
+            logger.debug("   - %s: %s€ (%s)", row.order_id, row.amount, row.status)
+        yield row
+
+
+def get_all_orders_tool(knowledge_base, **kwargs) -> List[OrderRow]:
     """
     Récupère toutes les commandes dans la base de connaissances
     
@@ -589,34 +758,16 @@ def get_all_orders_tool(knowledge_base, **kwargs) -> List[Dict]:
         **kwargs: Paramètres optionnels (ignorés pour cette fonction)
     
     Returns:
-        List[Dict]: Liste des commandes avec leurs détails
+        List[OrderRow]: Liste des commandes avec leurs détails
     """
     try:
-        orders = []
-        order_uris = knowledge_base.get_instances_of_class(
-            "http://example.org/ontology/Order"
-        )
-        
-        for order_uri in order_uris:
-            order_id = str(order_uri).split('/')[-1]
-            order_details = knowledge_base.get_order_details(order_id)
-            if order_details:
-                orders.append({
-                    'order_id': order_id,
-                    'client_id': order_details.get('hasClient', 'N/A'),
-                    'amount': order_details.get('hasAmount', 'N/A'),
-                    'status': order_details.get('hasStatus', 'N/A'),
-                    'date': order_details.get('hasDate', 'N/A')
-                })
-        
-        print(f"📋 Liste des commandes ({len(orders)} commandes):")
-        for order in orders:
-            print(f"   - {order['order_id']}: {order['amount']}€ ({order['status']})")
+        orders = list(_iter_all_orders(knowledge_base))
         
+        logger.info("📋 Liste des commandes (%d commandes)", len(orders))
         return orders
         
     except Exception as e:
-        print(f"❌ Erreur lors de la récupération des commandes: {e}")
+        logger.error("❌ Erreur lors de la récupération des commandes: %s", e)
         return []
 
 
@@ -637,15 +788,15 @@ def add_behavior_class_tool(class_name: str, methods: List[Dict],
         success = knowledge_base.add_behavior_class(class_name, methods)
         
         if success:
-            print(f"✅ Classe comportementale '{class_name}' créée avec succès")
-            print(f"   Méthodes ajoutées: {len(methods)}")
-            for method in methods:
-                print(f"     - {method['name']}")
-                if 'parameters' in method:
-                    params = [p['name'] for p in method['parameters']]
-                    print(f"       Paramètres: {', '.join(params)}")
-                if 'return_type' in method:
-                    print(f"       Retour: {method['return_type']}")
+            logger.info("✅ Classe comportementale '%s' créée avec succès (%d méthodes)", class_name, len(methods))
+            if logger.isEnabledFor(logging.DEBUG):
+                for method in methods:
+                    logger.debug("     - %s", method['name'])
+                    if 'parameters' in method:
+                        params = [p['name'] for p in method['parameters']]
+                        logger.debug("       Paramètres: %s", ', '.join(params))
+                    if 'return_type' in method:
+                        logger.debug("       Retour: %s", method['return_type'])
             
             return True, f"Classe comportementale '{class_name}' ajoutée avec succès"
         else:
@@ -674,12 +825,13 @@ def add_state_machine_tool(class_name: str, states: List[str],
         success = knowledge_base.add_state_machine(class_name, states, transitions)
         
         if success:
-            print(f"✅ Machine à états pour '{class_name}' créée avec succès")
-            print(f"   États: {', '.join(states)}")
-            print(f"   Transitions: {len(transitions)}")
-            for trans in transitions:
-                trigger = trans.get('trigger', 'automatique')
-                print(f"     - {trans['from']} -> {trans['to']} (trigger: {trigger})")
+            logger.info("✅ Machine à états pour '%s' créée avec succès (%d états, %d transitions)",
+                        class_name, len(states), len(transitions))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   États: %s", ', '.join(states))
+                for trans in transitions:
+                    trigger = trans.get('trigger', 'automatique')
+                    logger.debug("     - %s -> %s (trigger: %s)", trans['from'], trans['to'], trigger)
             
             return True, f"Machine à états pour '{class_name}' ajoutée avec succès"
         else:
@@ -689,6 +841,32 @@ def add_state_machine_tool(class_name: str, states: List[str],
         return False, f"Erreur: {e}"
 
 
+def _behavior_passer_commande(parameters: Dict, knowledge_base, instance_details: Dict) -> str:
+    """Simulation de création de commande"""
+    order_id = f"order_{uuid.uuid4().hex[:8]}"
+    return f"Commande créée: {order_id}"
+
+
+def _behavior_payer(parameters: Dict, knowledge_base, instance_details: Dict) -> str:
+    """Simulation de paiement"""
+    amount = parameters.get('montant', 0)
+    return f"Paiement de {amount}€ traité"
+
+
+def _behavior_changer_etat(parameters: Dict, knowledge_base, instance_details: Dict) -> str:
+    """Simulation de changement d'état"""
+    new_state = parameters.get('nouvel_etat', 'inconnu')
+    return f"État changé vers: {new_state}"
+
+
+# Comportements simulés, indexés par nom de méthode
+_BEHAVIOR_HANDLERS = {
+    "passer_commande": _behavior_passer_commande,
+    "payer": _behavior_payer,
+    "changer_etat": _behavior_changer_etat,
+}
+
+
 def execute_behavior_tool(instance_id: str, method_name: str, 
                          parameters: Dict, knowledge_base) -> Tuple[bool, str]:
     """
@@ -710,35 +888,30 @@ def execute_behavior_tool(instance_id: str, method_name: str,
             return False, f"Instance '{instance_id}' non trouvée"
         
         # Simule l'exécution du comportement
-        print(f"🔄 Exécution de '{method_name}' sur l'instance '{instance_id}'")
-        print(f"   Paramètres: {parameters}")
+        logger.debug("🔄 Exécution de '%s' sur l'instance '%s' (paramètres: %s)", method_name, instance_id, parameters)
         
         # Logique d'exécution selon la méthode
-        if method_name == "passer_commande":
-            # Simulation de création de commande
-            order_id = f"order_{uuid.uuid4().hex[:8]}"
-            result = f"Commande créée: {order_id}"
-            
-        elif method_name == "payer":
-            # Simulation de paiement
-            amount = parameters.get('montant', 0)
-            result = f"Paiement de {amount}€ traité"
-            
-        elif method_name == "changer_etat":
-            # Simulation de changement d'état
-            new_state = parameters.get('nouvel_etat', 'inconnu')
-            result = f"État changé vers: {new_state}"
-            
+        handler = _BEHAVIOR_HANDLERS.get(method_name)
+        if handler is not None:
+            result = handler(parameters, knowledge_base, instance_details)
         else:
             result = f"Méthode '{method_name}' exécutée avec succès"
         
-        print(f"   Résultat: {result}")
+        logger.debug("   Résultat: %s", result)
         return True, result
         
     except Exception as e:
         return False, f"Erreur lors de l'exécution: {e}"
 
 
+def _register_proxy(proxy_id: str, class_name: str, instance_id: Optional[str]):
+    """Enregistre la cible d'un proxy (LRU borné à PROXY_TABLE_SIZE entrées)"""
+    _PROXY_TABLE[proxy_id] = (class_name, instance_id)
+    _PROXY_TABLE.move_to_end(proxy_id)
+    if len(_PROXY_TABLE) > PROXY_TABLE_SIZE:
+        _PROXY_TABLE.popitem(last=False)
+
+
 def create_semantic_proxy_tool(knowledge_base, class_name: str, instance_id: str = None) -> Tuple[bool, str]:
     """
     Crée un proxy sémantique pour une classe ou une instance
@@ -752,13 +925,14 @@ def create_semantic_proxy_tool(knowledge_base, class_name: str, instance_id: str
         Tuple[bool, str]: (succès, message avec proxy_id)
     """
     try:
-        from knowledge_base import SemanticProxy
+        from src.core.knowledge_base import SemanticProxy
         
         proxy_manager = SemanticProxy(knowledge_base)
         proxy = proxy_manager.create_proxy(class_name, instance_id)
         
         if proxy:
             proxy_id = f"proxy_{class_name}_{instance_id or 'class'}"
+            _register_proxy(proxy_id, class_name, instance_id)
             return True, f"Proxy sémantique créé: {proxy_id}"
         else:
             return False, "Erreur lors de la création du proxy"
@@ -782,15 +956,20 @@ def execute_method_reflection_tool(proxy_id: str, method_name: str,
         Tuple[bool, str]: (succès, résultat)
     """
     try:
-        from knowledge_base import SemanticProxy
+        from src.core.knowledge_base import SemanticProxy
         
-        # Parse le proxy_id pour extraire class_name et instance_id
-        parts = proxy_id.replace('proxy_', '').split('_')
-        if len(parts) >= 2:
-            class_name = parts[0]
-            instance_id = '_'.join(parts[1:]) if len(parts) > 1 else None
+        # Retrouve class_name et instance_id enregistrés à la création du proxy
+        target = _PROXY_TABLE.get(proxy_id)
+        if target is not None:
+            _PROXY_TABLE.move_to_end(proxy_id)
+            class_name, instance_id = target
         else:
-            return False, "Format de proxy_id invalide"
+            # Proxy inconnu (créé ailleurs ou évincé) : repli sur le format proxy_<classe>_<instance>
+            class_name, sep, instance_id = proxy_id[len('proxy_'):].partition('_')
+            if not proxy_id.startswith('proxy_') or not sep or not class_name:
+                return False, "Format de proxy_id invalide"
+            if instance_id == 'class':
+                instance_id = None
         
         proxy_manager = SemanticProxy(knowledge_base)
         proxy = proxy_manager.get_proxy(class_name, instance_id)
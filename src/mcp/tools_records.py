@@ -0,0 +1,62 @@
+"""
+Enregistrements retournés par les outils MCP
+Structures immuables et compactes (slots) pour les commandes, clients et recommandations
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Union
+
+
+@dataclass(slots=True, frozen=True)
+class OrderRow:
+    """Ligne de commande retournée par l'historique et la liste des commandes"""
+    order_id: str
+    client_id: str
+    amount: Union[float, str]
+    status: str
+    date: Union[datetime, str]
+
+    def as_dict(self) -> Dict:
+        """Représentation dictionnaire (sérialisation JSON)"""
+        return {
+            'order_id': self.order_id,
+            'client_id': self.client_id,
+            'amount': self.amount,
+            'status': self.status,
+            'date': self.date
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class ClientRow:
+    """Client retourné par la liste des clients"""
+    id: str
+    name: str
+    email: str
+
+    def as_dict(self) -> Dict:
+        """Représentation dictionnaire (sérialisation JSON)"""
+        return {'id': self.id, 'name': self.name, 'email': self.email}
+
+
+@dataclass(slots=True, frozen=True)
+class ProductReco:
+    """Produit recommandé, avec son score de similarité"""
+    product_id: str
+    name: str
+    price: Union[float, str]
+    description: str
+    stock: Union[int, str]
+    similarity_score: float
+
+    def as_dict(self) -> Dict:
+        """Représentation dictionnaire (sérialisation JSON)"""
+        return {
+            'product_id': self.product_id,
+            'name': self.name,
+            'price': self.price,
+            'description': self.description,
+            'stock': self.stock,
+            'similarity_score': self.similarity_score
+        }
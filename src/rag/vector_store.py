@@ -4,6 +4,7 @@ Utilise chromadb pour stocker et rechercher des embeddings de produits
 """
 
 import chromadb
+import numpy as np
 from typing import List, Dict, Optional
 import hashlib
 
@@ -45,9 +46,9 @@ class VectorStore:
                 metadata={"description": "Collection des embeddings de produits"}
             )
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
-        Génère un embedding pour un texte donné
+        Génère un embedding pour un texte donné (vecteur float32)
         Utilise un vrai LLM si disponible, sinon un embedding simulé
         """
         if self.llm_interface:
@@ -57,7 +58,7 @@ class VectorStore:
             # Fallback vers l'embedding simulé
             return self._generate_mock_embedding(text)
     
-    def _generate_mock_embedding(self, text: str) -> List[float]:
+    def _generate_mock_embedding(self, text: str) -> np.ndarray:
         """
         Génère un embedding simulé pour un texte donné
         Dans un système réel, cette fonction utiliserait un modèle d'embedding
@@ -86,10 +87,10 @@ class VectorStore:
             remaining = self.embedding_dimension - len(embedding)
             embedding.extend(embedding[:min(remaining, len(embedding))])
         
-        return embedding[:self.embedding_dimension]
+        return np.asarray(embedding[:self.embedding_dimension], dtype=np.float32)
     
     def add_product_embedding(self, product_id: str, description_text: str, 
-                            vector_data: Optional[List[float]] = None) -> bool:
+                            vector_data: Optional[np.ndarray] = None) -> bool:
         """
         Ajoute un embedding de produit à la base vectorielle
         
@@ -106,6 +107,9 @@ class VectorStore:
             if vector_data is None:
                 vector_data = self.generate_embedding(description_text)
             
+            # ChromaDB attend des listes Python : conversion à la frontière uniquement
+            vector_data = np.asarray(vector_data, dtype=np.float32).tolist()
+            
             # Vérifie si le produit existe déjà
             existing = self.collection.get(ids=[product_id])
             if existing['ids']:
@@ -148,28 +152,74 @@ class VectorStore:
             
             # Recherche dans la base vectorielle
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[query_embedding.tolist()],
                 n_results=top_k,
                 include=['metadatas', 'documents', 'distances']
             )
             
-            # Formate les résultats
-            similar_products = []
-            if results['ids'] and results['ids'][0]:
-                for i, product_id in enumerate(results['ids'][0]):
-                    similar_products.append({
-                        'product_id': product_id,
-                        'description': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'similarity_score': 1.0 - results['distances'][0][i]  # Convertit distance en similarité
-                    })
-            
-            return similar_products
+            return self._format_results(results, 0)
             
         except Exception as e:
             print(f"Erreur lors de la recherche: {e}")
             return []
     
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Génère les embeddings de plusieurs textes (matrice float32, une ligne par texte)
+        Le LLM encode tout le lot en un seul appel
+        """
+        if self.llm_interface:
+            return self.llm_interface.generate_embeddings(texts)
+        return np.stack([self._generate_mock_embedding(text) for text in texts])
+    
+    def search_similar_products_batch(self, query_texts: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """
+        Recherche des produits similaires pour plusieurs requêtes en une seule interrogation
+        
+        Args:
+            query_texts: Textes des requêtes
+            top_k: Nombre maximum de résultats par requête
+        
+        Returns:
+            List[List[Dict]]: Produits similaires de chaque requête, dans l'ordre des requêtes
+        """
+        if not query_texts:
+            return []
+        
+        try:
+            # Encode le lot une seule fois puis interroge la collection en un appel
+            query_embeddings = self.generate_embeddings(query_texts)
+            results = self.collection.query(
+                query_embeddings=query_embeddings.tolist(),
+                n_results=top_k,
+                include=['metadatas', 'documents', 'distances']
+            )
+            
+            return [self._format_results(results, i) for i in range(len(query_texts))]
+            
+        except Exception as e:
+            print(f"Erreur lors de la recherche groupée: {e}")
+            return [[] for _ in query_texts]
+    
+    @staticmethod
+    def _format_results(results: Dict, index: int) -> List[Dict]:
+        """Met en forme les résultats de la requête d'indice donné d'un appel à collection.query"""
+        similar_products = []
+        if results['ids'] and index < len(results['ids']) and results['ids'][index]:
+            # Convertit les distances en similarités en une seule opération vectorielle
+            similarity_scores = (1.0 - np.asarray(results['distances'][index], dtype=np.float64)).tolist()
+            for product_id, description, metadata, similarity_score in zip(
+                    results['ids'][index], results['documents'][index], results['metadatas'][index],
+                    similarity_scores):
+                similar_products.append({
+                    'product_id': product_id,
+                    'description': description,
+                    'metadata': metadata,
+                    'similarity_score': similarity_score
+                })
+        
+        return similar_products
+    
     def search_by_product_name(self, product_name: str, top_k: int = 3) -> List[Dict]:
         """
         Recherche des produits similaires basée sur le nom d'un produit existant
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test du cache persistant des embeddings
+Vérifie qu'un embedding écrit lors d'une session est relu lors de la suivante
+"""
+
+import sys
+import os
+
+# Ajout du répertoire racine au path pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.llm.cache import PersistentEmbeddingCache
+
+
+def test_cache_survives_restart(tmp_path):
+    """Un embedding enregistré est relu après réouverture du fichier"""
+    path = str(tmp_path / "emb.db")
+    vector = np.arange(1536, dtype=np.float32)
+
+    cache = PersistentEmbeddingCache(path)
+    cache.put("text-embedding-3-small", "Super Laptop", vector)
+    cache.close()
+
+    cache = PersistentEmbeddingCache(path)
+    cached = cache.get("text-embedding-3-small", "Super Laptop")
+    assert cached is not None
+    assert cached.dtype == np.float32
+    assert np.array_equal(cached, vector)
+    cache.close()
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    """Le même texte n'est pas partagé entre deux modèles"""
+    cache = PersistentEmbeddingCache(str(tmp_path / "emb.db"))
+    cache.put("model-a", "texte", np.ones(4, dtype=np.float32))
+    cache.close()
+
+    cache = PersistentEmbeddingCache(str(tmp_path / "emb.db"))
+    assert cache.get("model-b", "texte") is None
+    assert cache.get("model-a", "inconnu") is None
+    cache.close()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test des requêtes de commandes de la base de connaissances
+Vérifie que les requêtes SPARQL retournent les mêmes commandes que le parcours du graphe
+"""
+
+import sys
+import os
+
+# Ajout du répertoire racine au path pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+# src.core importe l'agent, qui dépend de chromadb
+pytest.importorskip("chromadb")
+
+from rdflib import Literal, URIRef
+
+from src.core.knowledge_base import KnowledgeBase
+
+
+@pytest.fixture
+def kb():
+    """Base avec trois commandes réparties sur deux clients"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_order("order_1", "client_a", 20.0)
+    knowledge_base.add_order("order_2", "client_a", 35.5, "payee")
+    knowledge_base.add_order("order_3", "client_b", 12.0)
+    for order_id, date in (("order_1", "2024-01-01"), ("order_2", "2024-03-01")):
+        knowledge_base.graph.add((URIRef(f"{knowledge_base.ns['order']}{order_id}"),
+                                  knowledge_base.ns['ex'].hasDate, Literal(date)))
+    return knowledge_base
+
+
+def test_orders_by_client_filters_and_sorts(kb):
+    """Seules les commandes du client sont retournées, la plus récente d'abord"""
+    orders = kb.get_orders_by_client("client_a")
+    assert [order['order_id'] for order in orders] == ["order_2", "order_1"]
+    assert orders[0]['status'] == "payee"
+    assert orders[0]['amount'] == 35.5
+
+
+def test_orders_by_unknown_client(kb):
+    """Un client sans commande donne une liste vide"""
+    assert kb.get_orders_by_client("client_z") == []
+
+
+def test_all_orders(kb):
+    """Toutes les commandes sont retournées avec leur client"""
+    orders = {order['order_id']: order for order in kb.get_all_orders()}
+    assert set(orders) == {"order_1", "order_2", "order_3"}
+    assert orders["order_3"]['client_id'] == "client_b"
+    assert orders["order_3"]['date'] is None
+
+
+def test_client_email_exists():
+    """L'unicité de l'email est vérifiée sur les clients du graphe"""
+    knowledge_base = KnowledgeBase()
+    assert not knowledge_base.client_email_exists("john@example.org")
+    knowledge_base.add_client("client_a", "John", "john@example.org")
+    assert knowledge_base.client_email_exists("john@example.org")
+    assert not knowledge_base.client_email_exists("jane@example.org")
+
+
+def test_products_stock_roundtrip():
+    """Les stocks sont lus en une requête et mis à jour en bloc"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    knowledge_base.add_product("p2", "Mouse", 20.0, 3, "Souris")
+    assert knowledge_base.get_products_stock(["p1", "p2", "p3"]) == {"p1": (10, "Laptop"), "p2": (3, "Mouse")}
+    knowledge_base.set_products_stock({"p1": 7})
+    assert knowledge_base.get_product_details("p1")['hasStock'] == 7
+
+
+def test_product_details_memo_invalidated_on_write():
+    """Les détails mémorisés d'un produit suivent les mises à jour de stock"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    assert knowledge_base.get_product_details("p1")['hasStock'] == 10
+    knowledge_base.update_product_stock("p1", 4)
+    assert knowledge_base.get_product_details("p1")['hasStock'] == 4
+
+
+def test_products_details_batch_matches_single_lookups():
+    """La lecture groupée des détails donne les mêmes résultats que produit par produit"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    knowledge_base.add_product("p2", "Mouse", 20.0, 3, "Souris")
+    details = knowledge_base.get_products_details(["p2", "p3", "p1"])
+    assert list(details) == ["p2", "p3", "p1"]
+    assert details["p3"] == {}
+    assert details["p1"] == knowledge_base.get_product_details("p1")
+    assert details["p2"]['hasStock'] == 3
+
+
+def test_details_are_typed():
+    """Les littéraux sont convertis selon leur type XSD, les URIs restent des chaînes"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    knowledge_base.add_order("order_1", "client_a", 20.0)
+    product = knowledge_base.get_product_details("p1")
+    assert product['hasPrice'] == 1200.0 and isinstance(product['hasPrice'], float)
+    assert product['hasStock'] == 10 and isinstance(product['hasStock'], int)
+    assert type(product['hasName']) is str
+    order = knowledge_base.get_order_details("order_1")
+    assert order['hasAmount'] == 20.0
+    assert order['hasClient'] == f"{knowledge_base.ns['client']}client_a"
+
+
+def test_write_lock_is_reentrant():
+    """Les méthodes d'écriture prennent wlock, y compris quand l'appelant le détient déjà"""
+    knowledge_base = KnowledgeBase()
+    with knowledge_base.wlock:
+        with knowledge_base.rlock:
+            knowledge_base.add_order("order_1", "client_a", 20.0)
+        knowledge_base.update_order_status("order_1", "payee")
+    assert knowledge_base.get_order_details("order_1")['hasStatus'] == "payee"
+
+
+def test_product_details_memo_invalidated_by_instance_update():
+    """La mise à jour générique d'une propriété invalide la fiche produit mémorisée"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    assert knowledge_base.get_product_details("p1")['hasName'] == "Laptop"
+    assert knowledge_base.update_instance_property("p1", "hasName", "Ultrabook")
+    assert knowledge_base.get_product_details("p1")['hasName'] == "Ultrabook"
+    assert not knowledge_base.update_instance_property("p_unknown", "hasName", "X")
+
+
+def test_order_details_memo_invalidated_on_status_update(kb):
+    """Le changement de statut d'une commande invalide ses détails mémorisés"""
+    assert kb.get_order_details("order_1")['hasStatus'] == "en_attente"
+    kb.update_order_status("order_1", "payee")
+    assert kb.get_order_details("order_1")['hasStatus'] == "payee"
+
+
+def test_untyped_numeric_literals_are_coerced():
+    """Les propriétés numériques écrites sous forme de texte sont relues typées"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    assert knowledge_base.update_instance_property("p1", "hasStock", "3")
+    product_uri = f"{knowledge_base.ns['product']}p1"
+    knowledge_base.update_triple(product_uri, f"{knowledge_base.ns['ex']}hasPrice", "1200.0", "999.5")
+    details = knowledge_base.get_product_details("p1")
+    assert details['hasStock'] == 3 and details['hasPrice'] == 999.5
+    assert knowledge_base.get_products_stock(["p1"])["p1"][0] == 3
+
+    knowledge_base.graph.add((URIRef(f"{knowledge_base.ns['order']}o1"),
+                              knowledge_base.ns['ex'].hasAmount, Literal("42.5")))
+    assert knowledge_base.get_order_details("o1")['hasAmount'] == 42.5
+
+
+def test_stats_snapshot_dedupes_and_follows_writes():
+    """Une instance multi-valuée n'est comptée qu'une fois et l'instantané suit les écritures"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    knowledge_base.add_triple(f"{knowledge_base.ns['product']}p1",
+                              f"{knowledge_base.ns['ex']}hasName", "Ultrabook")
+    snapshot = knowledge_base.get_stats_snapshot()
+    assert [row['id'] for row in snapshot['Product']] == ["p1"]
+
+    snapshot['Product'].clear()
+    knowledge_base.add_client("c1", "Alice", "alice@example.com")
+    snapshot = knowledge_base.get_stats_snapshot()
+    assert len(snapshot['Product']) == 1
+    assert [row['id'] for row in snapshot['Client']] == ["c1"]
+
+
+def test_details_read_overlapping_a_write_are_not_memoized():
+    """Des détails lus pendant une écriture ne sont pas mémorisés (ils peuvent être périmés)"""
+    knowledge_base = KnowledgeBase()
+    knowledge_base.add_product("p1", "Laptop", 1200.0, 10, "Portable")
+    generation = knowledge_base._write_generation
+    knowledge_base.update_product_stock("p1", 4)
+    knowledge_base._remember_details('product', generation, {"p1": {'hasStock': 10}})
+    assert knowledge_base.get_cached_details('product', "p1") is None
+    assert knowledge_base.get_product_details("p1")['hasStock'] == 4
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test de la compilation des conditions de règles
+Vérifie que les conditions du RuleAssistant sont compilées et évaluées correctement
+"""
+
+import sys
+import os
+
+# Ajout du répertoire racine au path pour les imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.llm.llm_assistants import RuleAssistant, _compile_condition
+
+
+def test_compile_simple_comparison():
+    """Les formes `variable op littéral` sont évaluées sur le contexte"""
+    condition = _compile_condition('stock < 5')
+    assert condition({'stock': 3})
+    assert not condition({'stock': 10})
+
+
+def test_compile_missing_variable():
+    """Une variable absente rend la condition fausse"""
+    assert not _compile_condition('guests >= 8')({})
+    assert not _compile_condition('check_constraint_2')({})
+
+
+def test_compile_boolean_expression():
+    """Les expressions composées passent par le code objet compilé"""
+    condition = _compile_condition("order_amount > 1000 and payment_method == 'card'")
+    assert condition({'order_amount': 1500, 'payment_method': 'card'})
+    assert not condition({'order_amount': 1500, 'payment_method': 'paypal'})
+
+
+def test_compile_is_cached():
+    """Une même condition n'est compilée qu'une fois"""
+    assert _compile_condition('amount >= 100') is _compile_condition('amount >= 100')
+
+
+def test_compile_rejects_calls():
+    """Les appels de fonction sont refusés"""
+    with pytest.raises(ValueError):
+        _compile_condition("__import__('os').system('ls')")
+
+
+def test_evaluate_rules_for_domain():
+    """Seules les règles dont la condition est vraie sont retournées"""
+    assistant = RuleAssistant()
+    rules = assistant.evaluate_rules('ecommerce', {'amount': 150, 'stock': 20})
+    assert [rule.action for rule in rules] == ['apply_free_shipping']
+
+
+def test_evaluate_rules_first_match():
+    """Avec first_match, seule la règle la plus prioritaire est retournée"""
+    assistant = RuleAssistant()
+    context = {'amount': 150, 'stock': 2, 'customer_type': 'fidèle'}
+    rules = assistant.evaluate_rules('ecommerce', context, first_match=True)
+    assert [rule.priority for rule in rules] == [1]
+    assert len(assistant.evaluate_rules('ecommerce', context)) == 3
+
+
+def test_rule_templates_are_shared_and_read_only():
+    """Les templates sont partagés entre instances et non modifiables"""
+    first, second = RuleAssistant(), RuleAssistant()
+    assert first.rule_templates is second.rule_templates
+    with pytest.raises(TypeError):
+        first.rule_templates['ecommerce'][0]['priority'] = 10
+
+
+def test_rule_assistant_singleton():
+    """L'accesseur retourne toujours la même instance"""
+    from src.llm.llm_assistants import get_rule_assistant
+    assert get_rule_assistant() is get_rule_assistant()